@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message, CrisisLog
+from .models import Conversation, Message, ArchivedMessage, CrisisLog
 
 
 @admin.register(Conversation)
@@ -16,6 +16,13 @@ class MessageAdmin(admin.ModelAdmin):
     search_fields = ['content']
 
 
+@admin.register(ArchivedMessage)
+class ArchivedMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation', 'role', 'detected_emotion', 'is_crisis', 'created_at', 'archived_at']
+    list_filter = ['role', 'detected_emotion', 'is_crisis', 'created_at']
+    search_fields = ['content']
+
+
 @admin.register(CrisisLog)
 class CrisisLogAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'created_at']
@@ -0,0 +1,107 @@
+"""
+Archival of old chat messages.
+
+Everything on the hot path (the chat context, pattern analysis over the last
+30 days, the newest message of each conversation) reads recent messages, so
+messages older than CHAT_MESSAGE_HOT_DAYS are moved to ArchivedMessage in
+batches: copied with their original ids, then deleted from Message in the
+same transaction. The Message table, its indexes and its vacuum work then
+stay proportional to recent traffic rather than to the age of the service.
+
+Messages with a CrisisLog stay in Message, since the log points at them, so
+an old conversation can have messages in both tables. Conversation history
+is read through history(), which merges them by time, and conversation
+lists through with_summary(), which annotates counts and the newest message
+of each table.
+"""
+import heapq
+from datetime import timedelta
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ArchivedMessage, CrisisLog, Message
+
+ARCHIVED_FIELDS = ('id', 'conversation_id', 'role', 'content', 'detected_emotion', 'is_crisis', 'created_at')
+
+
+def archivable(older_than_days=None, now=None):
+    if older_than_days is None:
+        older_than_days = settings.CHAT_MESSAGE_HOT_DAYS
+    now = now or timezone.now()
+    return Message.objects.filter(created_at__lt=now - timedelta(days=older_than_days)).exclude(
+        Exists(CrisisLog.objects.filter(message=OuterRef('pk')))
+    )
+
+
+def archive_messages(older_than_days=None, now=None, batch_size=1000):
+    """Move messages older than ``older_than_days`` to the archive; returns how many"""
+    old = archivable(older_than_days, now).order_by('created_at')
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(old.values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ArchivedMessage.objects.bulk_create(
+                [ArchivedMessage(**row) for row in rows], ignore_conflicts=True
+            )
+            Message.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+    return archived
+
+
+SUMMARY_FIELDS = ('content', 'role', 'created_at')
+
+
+def history(conversation):
+    """All messages of a conversation from both tables, oldest to newest"""
+    order = ('created_at', 'id')
+    return list(heapq.merge(
+        conversation.archived_messages.order_by(*order),
+        conversation.messages.order_by(*order),
+        key=attrgetter(*order),
+    ))
+
+
+def message_count(conversation):
+    if hasattr(conversation, 'hot_count'):
+        return conversation.hot_count + conversation.archived_count
+    return conversation.archived_messages.count() + conversation.messages.count()
+
+
+def last_message(conversation):
+    """Newest message as a dict of SUMMARY_FIELDS, or None"""
+    if hasattr(conversation, 'hot_count'):
+        candidates = [
+            {field: getattr(conversation, f'last_{prefix}_{field}') for field in SUMMARY_FIELDS}
+            for prefix in ('hot', 'archived')
+        ]
+    else:
+        candidates = [
+            queryset.order_by('-created_at', '-id').values(*SUMMARY_FIELDS).first()
+            for queryset in (conversation.messages, conversation.archived_messages)
+        ]
+    candidates = [message for message in candidates if message and message['created_at'] is not None]
+    return max(candidates, key=lambda message: message['created_at'], default=None)
+
+
+def _per_conversation(model):
+    return model.objects.filter(conversation=OuterRef('pk')).order_by()
+
+
+def with_summary(conversations):
+    """Annotate message counts and the newest message of both tables, in the same query"""
+    annotations = {}
+    for prefix, model in (('hot', Message), ('archived', ArchivedMessage)):
+        annotations[f'{prefix}_count'] = Coalesce(Subquery(
+            _per_conversation(model).values('conversation').annotate(count=Count('id')).values('count')
+        ), 0)
+        newest = _per_conversation(model).order_by('-created_at', '-id')
+        for field in SUMMARY_FIELDS:
+            annotations[f'last_{prefix}_{field}'] = Subquery(newest.values(field)[:1])
+    return conversations.annotate(**annotations)
@@ -0,0 +1,42 @@
+"""
+Move old chat messages out of the hot Message table.
+
+Run once from cron, or keep it running as a small scheduler process:
+
+    python manage.py archive_messages --every 3600
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from chat import archive
+
+
+class Command(BaseCommand):
+    help = 'Move chat messages older than the hot window to the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Repeat every N seconds instead of running once'
+        )
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.CHAT_MESSAGE_HOT_DAYS,
+            help='Archive messages older than this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            archived = archive.archive_messages(
+                older_than_days=options['older_than_days'],
+                batch_size=options['batch_size'],
+            )
+            if archived or options['verbosity'] > 1:
+                self.stdout.write(f"Archived {archived} message(s).")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+            close_old_connections()
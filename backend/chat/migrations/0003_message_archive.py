@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='chat_messag_convers_3154fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['created_at'], name='chat_messag_created_b6b51c_idx'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('role', models.CharField(choices=[('user', 'User'), ('assistant', 'Assistant'), ('system', 'System')], max_length=20)),
+                ('content', models.TextField()),
+                ('detected_emotion', models.CharField(blank=True, choices=[('happy', 'Happy'), ('sad', 'Sad'), ('anxious', 'Anxious'), ('angry', 'Angry'), ('calm', 'Calm'), ('stressed', 'Stressed'), ('confused', 'Confused'), ('hopeful', 'Hopeful'), ('neutral', 'Neutral')], max_length=20, null=True)),
+                ('is_crisis', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='chat.conversation')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['conversation', 'created_at'], name='chat_archiv_convers_287f10_idx')],
+            },
+        ),
+    ]
@@ -65,11 +65,47 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at']),
+            # Archival scans for the oldest messages
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
 
 
+class ArchivedMessage(models.Model):
+    """A message moved out of the Message table by chat.archive, keeping its id."""
+    
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(
+        Conversation, 
+        on_delete=models.CASCADE, 
+        related_name='archived_messages'
+    )
+    role = models.CharField(max_length=20, choices=Message.ROLE_CHOICES)
+    content = models.TextField()
+    detected_emotion = models.CharField(
+        max_length=20, 
+        choices=Message.EMOTION_CHOICES, 
+        blank=True, 
+        null=True
+    )
+    is_crisis = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.role}: {self.content[:50]}... (archived)"
+
+
 class CrisisLog(models.Model):
     """Log of detected crisis situations for safety monitoring."""
     
@@ -1,8 +1,11 @@
 from django.urls import path
 from .consumers import ChatConsumer
-from games.consumers import GameConsumer
+from games.consumers import GameConsumer, MatchmakingConsumer
+from insights.consumers import NotificationConsumer
 
 websocket_urlpatterns = [
     path('ws/chat/<int:conversation_id>/', ChatConsumer.as_asgi()),
     path('ws/game/<str:room_code>/', GameConsumer.as_asgi()),
+    path('ws/matchmaking/', MatchmakingConsumer.as_asgi()),
+    path('ws/insights/', NotificationConsumer.as_asgi()),
 ]
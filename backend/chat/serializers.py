@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from . import archive
 from .models import Conversation, Message, CrisisLog
 
 
@@ -10,7 +11,7 @@ class MessageSerializer(serializers.ModelSerializer):
 
 
 class ConversationSerializer(serializers.ModelSerializer):
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
     message_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -18,8 +19,12 @@ class ConversationSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'created_at', 'updated_at', 'is_active', 'messages', 'message_count']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def get_messages(self, obj):
+        # Archived messages have the same fields, so they serialize alike
+        return MessageSerializer(archive.history(obj), many=True).data
+    
     def get_message_count(self, obj):
-        return obj.messages.count()
+        return archive.message_count(obj)
 
 
 class ConversationListSerializer(serializers.ModelSerializer):
@@ -32,17 +37,17 @@ class ConversationListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'created_at', 'updated_at', 'is_active', 'last_message', 'message_count']
     
     def get_last_message(self, obj):
-        last_msg = obj.messages.last()
+        last_msg = archive.last_message(obj)
         if last_msg:
             return {
-                'content': last_msg.content[:100],
-                'role': last_msg.role,
-                'created_at': last_msg.created_at
+                'content': last_msg['content'][:100],
+                'role': last_msg['role'],
+                'created_at': last_msg['created_at']
             }
         return None
     
     def get_message_count(self, obj):
-        return obj.messages.count()
+        return archive.message_count(obj)
 
 
 class ChatInputSerializer(serializers.Serializer):
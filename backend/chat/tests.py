@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dost.testing import QueryBudgetMixin
+from . import archive
+from .models import ArchivedMessage, Conversation, CrisisLog, Message
+
+User = get_user_model()
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='chatter', email='chatter@example.com', password='x')
+        self.now = timezone.now()
+        self.conversation = Conversation.objects.create(user=self.user, title='Old chat')
+        # Days ago for each message, oldest first; the 150-day one has a crisis log
+        self.messages = [self.message(days) for days in (200, 150, 120, 10, 1)]
+        CrisisLog.objects.create(
+            user=self.user, message=self.messages[1], trigger_phrase='help', response_given='here',
+        )
+
+    def message(self, days_ago, conversation=None):
+        message = Message.objects.create(
+            conversation=conversation or self.conversation, role='user', content=f'{days_ago} days ago',
+        )
+        Message.objects.filter(pk=message.pk).update(created_at=self.now - timedelta(days=days_ago))
+        return message
+
+    def test_moves_old_messages_except_crisis_linked_ones(self):
+        archived = archive.archive_messages(older_than_days=90, now=self.now, batch_size=1)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual(
+            set(ArchivedMessage.objects.values_list('id', flat=True)),
+            {self.messages[0].pk, self.messages[2].pk},
+        )
+        self.assertEqual(
+            set(Message.objects.values_list('id', flat=True)),
+            {self.messages[1].pk, self.messages[3].pk, self.messages[4].pk},
+        )
+        self.assertEqual(CrisisLog.objects.count(), 1)
+        self.assertEqual(archive.archive_messages(older_than_days=90, now=self.now), 0)
+
+    def test_history_merges_both_tables_by_time(self):
+        archive.archive_messages(older_than_days=90, now=self.now)
+
+        history = archive.history(self.conversation)
+        self.assertEqual([message.pk for message in history], [message.pk for message in self.messages])
+        self.assertEqual(archive.message_count(self.conversation), 5)
+
+    def test_conversation_apis_read_archived_history(self):
+        only_old = Conversation.objects.create(user=self.user, title='Archived only')
+        self.message(300, conversation=only_old)
+        archive.archive_messages(older_than_days=90, now=self.now)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        detail = client.get(f'/api/chat/conversations/{self.conversation.pk}/').json()
+        self.assertEqual([message['content'] for message in detail['messages']], [
+            '200 days ago', '150 days ago', '120 days ago', '10 days ago', '1 days ago',
+        ])
+        self.assertEqual(detail['message_count'], 5)
+
+        listed = {row['id']: row for row in client.get('/api/chat/conversations/').json()['results']}
+        self.assertEqual(listed[self.conversation.pk]['message_count'], 5)
+        self.assertEqual(listed[self.conversation.pk]['last_message']['content'], '1 days ago')
+        self.assertEqual(listed[only_old.pk]['message_count'], 1)
+        self.assertEqual(listed[only_old.pk]['last_message']['content'], '300 days ago')
+
+
+class ChatQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        # Page count and one annotated select, however many conversations
+        '/api/chat/conversations/': 2,
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='budget', email='budget@example.com', password='x')
+        for index in range(10):
+            conversation = Conversation.objects.create(user=self.user, title=f'Chat {index}')
+            for role in ('user', 'assistant'):
+                Message.objects.create(conversation=conversation, role=role, content=f'{role} {index}')
+            Message.objects.filter(conversation=conversation, role='user').update(
+                created_at=timezone.now() - timedelta(days=200)
+            )
+        archive.archive_messages(older_than_days=90)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
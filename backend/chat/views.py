@@ -1,12 +1,16 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from . import archive
 from .models import Conversation, Message, CrisisLog
 from .serializers import (
     ConversationSerializer, ConversationListSerializer, 
     MessageSerializer, ChatInputSerializer
 )
 from .ai_service import get_chat_response
+from dost import events
+from users import deletion
+from users.serializers import DeletionJobSerializer
 
 
 class ConversationListView(generics.ListCreateAPIView):
@@ -14,7 +18,7 @@ class ConversationListView(generics.ListCreateAPIView):
     serializer_class = ConversationListSerializer
     
     def get_queryset(self):
-        return Conversation.objects.filter(user=self.request.user)
+        return archive.with_summary(Conversation.objects.filter(user=self.request.user))
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -60,6 +64,25 @@ class ChatView(APIView):
         user_tone = request.user.preferred_tone
         result = get_chat_response(user_message, history, user_tone)
         
+        with events.batch():
+            user_msg, assistant_msg = self._save_exchange(request.user, conversation, user_message, result)
+            event = events.emit(request.user, 'chat', 'Had a conversation')
+        
+        response_data = {
+            'conversation_id': conversation.id,
+            'user_message': MessageSerializer(user_msg).data,
+            'assistant_message': MessageSerializer(assistant_msg).data,
+            'pet': event.results.get('pet'),
+        }
+        
+        # Include coping suggestion if available
+        if result.get('coping_suggestion'):
+            response_data['coping_suggestion'] = result['coping_suggestion']
+        
+        return Response(response_data)
+    
+    def _save_exchange(self, user, conversation, user_message, result):
+        """Store one user/assistant exchange and any crisis log."""
         # Save user message
         user_msg = Message.objects.create(
             conversation=conversation,
@@ -80,7 +103,7 @@ class ChatView(APIView):
         # Log crisis if detected
         if result['is_crisis']:
             CrisisLog.objects.create(
-                user=request.user,
+                user=user,
                 message=user_msg,
                 trigger_phrase=user_message,
                 response_given=result['response']
@@ -88,23 +111,15 @@ class ChatView(APIView):
         
         # Update conversation
         conversation.save()  # Updates updated_at
-        
-        response_data = {
-            'conversation_id': conversation.id,
-            'user_message': MessageSerializer(user_msg).data,
-            'assistant_message': MessageSerializer(assistant_msg).data
-        }
-        
-        # Include coping suggestion if available
-        if result.get('coping_suggestion'):
-            response_data['coping_suggestion'] = result['coping_suggestion']
-        
-        return Response(response_data)
+        return user_msg, assistant_msg
 
 
 class DeleteChatHistoryView(APIView):
-    """Delete all chat history for the user."""
+    """Delete all chat history for the user in the background."""
     
     def delete(self, request):
-        Conversation.objects.filter(user=request.user).delete()
-        return Response({"message": "Chat history deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+        job = deletion.schedule(request.user, 'chat')
+        return Response({
+            "message": "Chat history scheduled for deletion.",
+            "job": DeletionJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CopingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'coping'
+
+    def ready(self):
+        # Connects the catalog's invalidation signals
+        from . import catalog  # noqa: F401
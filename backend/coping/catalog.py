@@ -0,0 +1,7 @@
+"""Cached catalogs of active coping tools and affirmations, grouped by category."""
+from dost.catalog import ModelCatalog
+
+from .models import CopingTool, Affirmation
+
+tool_catalog = ModelCatalog(CopingTool, group_by='category', filters={'is_active': True})
+affirmation_catalog = ModelCatalog(Affirmation, group_by='category', filters={'is_active': True})
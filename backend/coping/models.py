@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class CopingTool(models.Model):
@@ -63,7 +64,7 @@ class CopingToolUsage(models.Model):
     mood_before = models.IntegerField(null=True, blank=True)  # 1-5
     mood_after = models.IntegerField(null=True, blank=True)  # 1-5
     feedback = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)  # Not auto_now_add, so imports keep it
     
     class Meta:
         ordering = ['-created_at']
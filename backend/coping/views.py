@@ -3,7 +3,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 import random
-from .models import CopingTool, CopingToolUsage, Affirmation
+from dost import events
+from .models import CopingTool, CopingToolUsage
+from .catalog import tool_catalog, affirmation_catalog
 from .serializers import (
     CopingToolSerializer, CopingToolListSerializer,
     CopingToolUsageSerializer, AffirmationSerializer
@@ -47,8 +49,16 @@ class CopingToolUsageView(generics.ListCreateAPIView):
     def get_queryset(self):
         return CopingToolUsage.objects.filter(user=self.request.user)
     
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['pet'] = self.activity_event.results.get('pet')
+        return response
+    
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with events.batch():
+            usage = serializer.save(user=self.request.user)
+            activity_type = 'breathing' if usage.tool.category == 'breathing' else 'coping'
+            self.activity_event = events.emit(self.request.user, activity_type, f"Used {usage.tool.title}")
 
 
 class RecommendedToolView(APIView):
@@ -70,19 +80,14 @@ class RecommendedToolView(APIView):
         
         categories = emotion_tool_map.get(emotion.lower(), ['breathing', 'mindfulness'])
         
-        tools = CopingTool.objects.filter(
-            is_active=True, 
-            category__in=categories
-        )
-        
-        if tools.exists():
-            tool = random.choice(list(tools))
+        tool = tool_catalog.choice(keys=categories)
+        if tool:
             return Response(CopingToolSerializer(tool).data)
         
         # Return any tool if no specific match
-        tool = CopingTool.objects.filter(is_active=True).first()
-        if tool:
-            return Response(CopingToolSerializer(tool).data)
+        all_tools = tool_catalog.all()
+        if all_tools:
+            return Response(CopingToolSerializer(all_tools[0]).data)
         
         return Response({"message": "No coping tools available"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -94,12 +99,8 @@ class AffirmationView(APIView):
     def get(self, request):
         category = request.query_params.get('category')
         
-        affirmations = Affirmation.objects.filter(is_active=True)
-        if category:
-            affirmations = affirmations.filter(category=category)
-        
-        if affirmations.exists():
-            affirmation = random.choice(list(affirmations))
+        affirmation = affirmation_catalog.choice(keys=[category] if category else None)
+        if affirmation:
             return Response(AffirmationSerializer(affirmation).data)
         
         # Fallback affirmations
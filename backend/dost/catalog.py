@@ -0,0 +1,113 @@
+"""
+In-memory catalogs for small, read-mostly tables.
+
+Games, coping tools, affirmations and journal prompts are a few dozen rows
+edited through the admin. Loading them once per process and sampling in
+Python avoids ORDER BY RANDOM() and materialising the table on every
+request. Saves and deletes of the model drop the cached copy; a TTL bounds
+staleness for edits made from other processes.
+"""
+import heapq
+import random
+import threading
+import time
+
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+
+
+class ModelCatalog:
+    """Active rows of a model, grouped by one field and cached in memory."""
+
+    def __init__(self, model, group_by, filters=None, ttl=300):
+        self.model = model
+        self.group_by = group_by
+        self.filters = filters or {}
+        self.ttl = ttl
+        self._cache = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        uid = f'catalog-{model._meta.label_lower}-{group_by}'
+        post_save.connect(self._on_change, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self._on_change, sender=model, weak=False, dispatch_uid=uid)
+
+    def all(self):
+        return self._cached('rows', self._load_rows)['all']
+
+    def group(self, key):
+        return self._cached('rows', self._load_rows)['groups'].get(key, ())
+
+    def counts(self):
+        """Active rows per group, from one grouped aggregate."""
+        return self._cached('counts', self._load_counts)
+
+    def sample(self, k=1, keys=None, predicate=None, weight=None, rng=random):
+        """Pick up to ``k`` distinct rows at random.
+
+        ``keys`` restricts to those groups, ``predicate`` filters rows and
+        ``weight`` maps a row to a positive weight (uniform if omitted).
+        """
+        if keys is None:
+            candidates = self.all()
+        else:
+            candidates = [obj for key in keys for obj in self.group(key)]
+        if predicate is not None:
+            candidates = [obj for obj in candidates if predicate(obj)]
+        if not candidates or k <= 0:
+            return []
+        if weight is None:
+            return rng.sample(candidates, min(k, len(candidates)))
+        # Weighted sampling without replacement (Efraimidis-Spirakis keys)
+        return heapq.nlargest(
+            k, candidates,
+            key=lambda obj: rng.random() ** (1.0 / max(weight(obj), 1e-9))
+        )
+
+    def choice(self, keys=None, predicate=None, weight=None, rng=random):
+        picked = self.sample(1, keys=keys, predicate=predicate, weight=weight, rng=rng)
+        return picked[0] if picked else None
+
+    def invalidate(self):
+        self._generation += 1
+        self._cache = {}
+
+    def _on_change(self, sender, **kwargs):
+        self.invalidate()
+
+    def _cached(self, name, loader):
+        entry = self._cache.get(name)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+            generation = self._generation
+            value = loader()
+            # An edit that landed mid-load must not be masked by stale rows
+            if generation == self._generation:
+                self._cache[name] = (time.monotonic(), value)
+            return value
+
+    def _queryset(self):
+        return self.model.objects.filter(**self.filters)
+
+    def _load_rows(self):
+        rows = tuple(self._queryset())
+        groups = {}
+        for obj in rows:
+            groups.setdefault(getattr(obj, self.group_by), []).append(obj)
+        return {
+            'all': rows,
+            'groups': {key: tuple(objs) for key, objs in groups.items()},
+        }
+
+    def _load_counts(self):
+        return dict(
+            self._queryset()
+            .order_by()
+            .values(self.group_by)
+            .annotate(count=Count('pk'))
+            .values_list(self.group_by, 'count')
+        )
@@ -0,0 +1,79 @@
+"""
+In-process domain events shared between apps.
+
+Apps announce what a user just did (logged a mood, wrote a journal entry,
+chatted, used a coping tool) and other apps react, without the client making
+a second request. Events are delivered after the surrounding transaction
+commits, and events collected inside ``batch()`` are delivered together:
+
+    with events.batch():
+        entry = serializer.save(user=request.user)
+        event = events.emit(request.user, 'journal', 'Wrote journal entry')
+    event.results.get('pet')   # filled in by receivers once committed
+
+Receivers get ``events=[ActivityEvent, ...]`` and may store per-event
+results on ``event.results``. A failing receiver never fails the request.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Sent with events=[ActivityEvent, ...]
+activities_completed = Signal()
+
+_local = threading.local()
+
+
+class ActivityEvent:
+    def __init__(self, user, activity_type, description=''):
+        self.user = user
+        self.activity_type = activity_type
+        self.description = description
+        self.results = {}
+
+    def __repr__(self):
+        return f'<ActivityEvent {self.activity_type} user={self.user.pk}>'
+
+
+def _batches():
+    if not hasattr(_local, 'batches'):
+        _local.batches = []
+    return _local.batches
+
+
+def _deliver(events):
+    if not events:
+        return
+    for receiver, response in activities_completed.send_robust(sender=ActivityEvent, events=events):
+        if isinstance(response, Exception):
+            logger.error('Activity receiver %r failed', receiver, exc_info=response)
+
+
+@contextmanager
+def batch():
+    """Run a block atomically and deliver its events together on commit."""
+    events = []
+    stack = _batches()
+    stack.append(events)
+    try:
+        with transaction.atomic():
+            yield events
+            transaction.on_commit(lambda: _deliver(events))
+    finally:
+        stack.pop()
+
+
+def emit(user, activity_type, description=''):
+    """Announce a completed activity; returns the event."""
+    event = ActivityEvent(user, activity_type, description)
+    stack = _batches()
+    if stack:
+        stack[-1].append(event)
+    else:
+        transaction.on_commit(lambda: _deliver([event]))
+    return event
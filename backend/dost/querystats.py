@@ -0,0 +1,114 @@
+"""
+Per-request database query statistics.
+
+QueryStats is a connection execute wrapper that counts queries, adds up
+their time and groups them by fingerprint (the SQL with literals and
+parameter lists collapsed), so one statement run for every row of a list,
+an N+1, shows up as a single fingerprint with a high count.
+
+QueryStatsMiddleware records each request when QUERY_STATS is on (it
+follows DEBUG by default) and reports through a Server-Timing header, which
+browser dev tools show next to the request:
+
+    Server-Timing: db;dur=12.4;desc="9 queries", db-repeated;desc="6 repeated"
+
+Repeated statements are also logged with their fingerprints. Queries run
+while a streaming response is being consumed are not counted.
+
+Tests hold endpoints to a query budget with dost.testing.QueryBudgetMixin.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """``sql`` with literals and parameters replaced, for grouping alike queries"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """Execute wrapper counting queries, their time and their fingerprints."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """``[(fingerprint, count), ...]`` run more than once, most repeated first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    @property
+    def repeated(self):
+        return sum(count - 1 for _, count in self.duplicates())
+
+    def server_timing(self):
+        metrics = [f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"']
+        if self.repeated:
+            metrics.append(f'db-repeated;desc="{self.repeated} repeated"')
+        return ', '.join(metrics)
+
+    def report(self, limit=5):
+        """Readable summary listing the most repeated fingerprints"""
+        lines = [f'{self.count} queries in {self.duration * 1000:.1f} ms, {self.repeated} repeated']
+        lines.extend(f'  {count}x {sql}' for sql, count in self.duplicates()[:limit])
+        return '\n'.join(lines)
+
+
+@contextmanager
+def record(using=None):
+    """Collect QueryStats for every query run inside the block"""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for connection in [connections[using]] if using else connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+class QueryStatsMiddleware:
+    """Add query count and database time to responses as Server-Timing."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_STATS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record() as stats:
+            response = self.get_response(request)
+
+        timing = stats.server_timing()
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+        if stats.repeated:
+            logger.warning('%s %s: %s', request.method, request.path, stats.report())
+        return response
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dost.querystats.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -84,6 +85,21 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Query count and database time per request as Server-Timing (see dost.querystats)
+QUERY_STATS = os.getenv('QUERY_STATS', str(DEBUG)).lower() == 'true'
+
+# Multiplayer room lifecycle (see games.lifecycle)
+GAME_ROOM_IDLE_MINUTES = int(os.getenv('GAME_ROOM_IDLE_MINUTES', '15'))
+GAME_ROOM_STALE_MINUTES = int(os.getenv('GAME_ROOM_STALE_MINUTES', '120'))
+GAME_ROOM_RETENTION_DAYS = int(os.getenv('GAME_ROOM_RETENTION_DAYS', '30'))
+
+# Chat messages older than this move to the archive table (see chat.archive);
+# keep it above the 30 days pattern analysis reads
+CHAT_MESSAGE_HOT_DAYS = int(os.getenv('CHAT_MESSAGE_HOT_DAYS', '90'))
+
+# Account and chat history deletion (see users.deletion): rows per DELETE statement
+DATA_DELETION_BATCH_SIZE = int(os.getenv('DATA_DELETION_BATCH_SIZE', '1000'))
+
 # Database
 DATABASES = {
     "default": dj_database_url.config(
@@ -0,0 +1,35 @@
+"""
+Test helpers shared between apps.
+
+QueryBudgetMixin holds endpoints to a maximum number of database queries,
+so a view that turns N+1 fails the suite instead of slowing down in
+production. Declare GET budgets per URL and authenticate ``self.client`` in
+setUp; other requests go through assertQueryBudget():
+
+    class NotificationBudgetTests(QueryBudgetMixin, TestCase):
+        query_budgets = {'/api/insights/notifications/': 2}
+
+        def setUp(self):
+            self.client = APIClient()
+            self.client.force_authenticate(user)
+"""
+from .querystats import record
+
+
+class QueryBudgetMixin:
+    # {url: most queries a GET may run}
+    query_budgets = {}
+
+    def assertQueryBudget(self, budget, url, method='get', **kwargs):
+        """Request ``url`` and fail if it runs more than ``budget`` queries"""
+        with record() as stats:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f'{method.upper()} {url} returned {response.status_code}')
+        if stats.count > budget:
+            self.fail(f'{method.upper()} {url} is over its budget of {budget} queries: {stats.report()}')
+        return response
+
+    def test_query_budgets(self):
+        for url, budget in self.query_budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(budget, url)
@@ -0,0 +1,72 @@
+import random
+from collections import Counter
+
+from django.test import TestCase
+
+from games.catalog import game_catalog
+from games.models import TherapeuticGame
+
+
+class ModelCatalogTests(TestCase):
+    def setUp(self):
+        # The catalog is process-wide and test rollbacks send no signals
+        game_catalog.invalidate()
+        self.addCleanup(game_catalog.invalidate)
+
+    def game(self, name, category='anger', intensity=3, is_active=True):
+        return TherapeuticGame.objects.create(
+            name=name, description='', emotion_category=category, game_type='action',
+            therapeutic_benefit='Helps', intensity_level=intensity, is_active=is_active,
+        )
+
+    def test_samples_distinct_active_rows(self):
+        anger = {self.game('Smash'), self.game('Punch'), self.game('Scream')}
+        self.game('Dance', category='joy')
+        self.game('Retired', is_active=False)
+
+        picked = game_catalog.sample(2, keys=['anger'])
+        self.assertEqual(len(set(picked)), 2)
+        self.assertLessEqual(set(picked), anger)
+        self.assertEqual(set(game_catalog.sample(10, keys=['anger'])), anger)
+        self.assertEqual(len(game_catalog.all()), 4)
+        self.assertEqual(
+            {game.name for game in game_catalog.sample(10, predicate=lambda game: game.name.startswith('S'))},
+            {'Smash', 'Scream'},
+        )
+
+    def test_weighted_sampling_favours_heavier_rows(self):
+        self.game('Gentle', intensity=1)
+        self.game('Fierce', intensity=5)
+        rng = random.Random(7)
+
+        picks = Counter(
+            game_catalog.choice(keys=['anger'], weight=lambda game: game.intensity_level, rng=rng).name
+            for _ in range(600)
+        )
+        # Fierce weighs five times as much, so wins about 5 draws in 6
+        self.assertGreater(picks['Fierce'], 3 * picks['Gentle'])
+        self.assertGreater(picks['Gentle'], 0)
+
+    def test_empty_groups(self):
+        self.game('Smash')
+        self.assertEqual(game_catalog.group('fear'), ())
+        self.assertEqual(game_catalog.sample(3, keys=['fear']), [])
+        self.assertIsNone(game_catalog.choice(keys=['fear', 'sadness']))
+        self.assertIsNone(game_catalog.choice(predicate=lambda game: False))
+        self.assertEqual(game_catalog.sample(0), [])
+
+    def test_saves_and_deletes_refresh_the_catalog(self):
+        smash = self.game('Smash')
+        game_catalog.all()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(game_catalog.all()), 1)
+
+        punch = self.game('Punch')
+        self.assertEqual(set(game_catalog.group('anger')), {smash, punch})
+
+        smash.is_active = False
+        smash.save()
+        self.assertEqual(game_catalog.all(), (punch,))
+
+        punch.delete()
+        self.assertEqual(game_catalog.all(), ())
@@ -5,3 +5,7 @@ class GamesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'games'
     verbose_name = 'Emotion Games'
+
+    def ready(self):
+        # Connects the catalog's invalidation signals
+        from . import catalog  # noqa: F401
@@ -0,0 +1,6 @@
+"""Cached catalog of active therapeutic games, grouped by emotion category."""
+from dost.catalog import ModelCatalog
+
+from .models import TherapeuticGame
+
+game_catalog = ModelCatalog(TherapeuticGame, group_by='emotion_category', filters={'is_active': True})
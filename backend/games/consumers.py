@@ -2,6 +2,7 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import MultiplayerGameSession, Player
+from . import lifecycle, matchmaking
 
 
 class GameConsumer(AsyncWebsocketConsumer):
@@ -18,6 +19,8 @@ class GameConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         await self.accept()
+        lifecycle.presence.join(self.room_code, self.channel_name)
+        await self.mark_connected()
         
         # Send current game state to the newly connected client
         game_session = await self.get_game_session()
@@ -35,6 +38,9 @@ class GameConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        # Rooms evicted by the reaper were already zeroed out
+        if lifecycle.presence.leave(self.room_code, self.channel_name):
+            await self.mark_disconnected()
     
     async def receive(self, text_data):
         """Handle incoming WebSocket messages."""
@@ -67,6 +73,13 @@ class GameConsumer(AsyncWebsocketConsumer):
             }))
             return
         
+        if game_session.status == 'abandoned':
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'This game room has expired.',
+            }))
+            return
+        
         # Check if already a player
         is_player = await self.is_user_player(game_session)
         
@@ -184,7 +197,24 @@ class GameConsumer(AsyncWebsocketConsumer):
             'username': event['username'],
         }))
     
+    async def room_closed(self, event):
+        """Room was abandoned by the lifecycle reaper."""
+        lifecycle.presence.evict([self.room_code])
+        await self.send(text_data=json.dumps({
+            'type': 'room_closed',
+            'status': event['status'],
+        }))
+        await self.close()
+    
     # Database helper methods
+    @database_sync_to_async
+    def mark_connected(self):
+        lifecycle.mark_connected(self.room_code)
+    
+    @database_sync_to_async
+    def mark_disconnected(self):
+        lifecycle.mark_disconnected(self.room_code)
+    
     @database_sync_to_async
     def get_game_session(self):
         try:
@@ -238,3 +268,77 @@ class GameConsumer(AsyncWebsocketConsumer):
         if new_state.get('winner'):
             game_session.status = 'finished'
         game_session.save()
+
+
+class MatchmakingConsumer(AsyncWebsocketConsumer):
+    """WebSocket consumer for quick-play matchmaking.
+
+    Clients send ``{"type": "enqueue", "game_type": ...}`` and get a
+    ``match_found`` message with the new room code once paired. Closing the
+    socket leaves the queue, unless another socket of the same user has
+    queued since.
+    """
+    
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+        
+        self.group_name = matchmaking.matchmaking_group(self.user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+    
+    async def disconnect(self, close_code):
+        if not self.user or not self.user.is_authenticated:
+            return
+        matchmaking.match_queue.cancel(self.user.id, owner=self.channel_name)
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    
+    async def receive(self, text_data):
+        data = json.loads(text_data)
+        message_type = data.get('type')
+        
+        if message_type == 'enqueue':
+            await self.handle_enqueue(data)
+        elif message_type == 'cancel':
+            matchmaking.match_queue.cancel(self.user.id)
+            await self.send(text_data=json.dumps({'type': 'cancelled'}))
+    
+    async def handle_enqueue(self, data):
+        game_type = data.get('game_type', 'tic-tac-toe')
+        if game_type not in matchmaking.MATCHMAKING_GAME_TYPES:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Quick play is not available for this game.',
+            }))
+            return
+        
+        match = matchmaking.match_queue.enqueue(self.user.id, game_type, owner=self.channel_name)
+        if match is None:
+            await self.send(text_data=json.dumps({
+                'type': 'queued',
+                'game_type': game_type,
+            }))
+            return
+        
+        opponent_id, _ = match
+        game_session = await self.create_match(opponent_id, game_type)
+        event = {
+            'type': 'match_found',
+            'room_code': str(game_session.room_code),
+            'game_type': game_type,
+        }
+        await self.channel_layer.group_send(matchmaking.matchmaking_group(opponent_id), event)
+        await self.channel_layer.group_send(self.group_name, event)
+    
+    async def match_found(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'match_found',
+            'room_code': event['room_code'],
+            'game_type': event['game_type'],
+        }))
+    
+    @database_sync_to_async
+    def create_match(self, opponent_id, game_type):
+        return matchmaking.create_match(opponent_id, self.user.id, game_type)
@@ -0,0 +1,152 @@
+"""
+Lifecycle management for multiplayer game rooms.
+
+Tracks who is connected to each room, marks rooms abandoned once they have
+been idle for too long, and purges old closed rooms so the rooms table (and
+its room_code/status indexes) stays small as history accumulates.
+
+The reap_game_rooms command runs in its own process, so telling connected
+players that their room closed needs a channel layer shared between
+processes (e.g. channels_redis). With the in-memory layer the rooms are
+still closed in the database, and players find out on their next move or
+reconnect.
+"""
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MultiplayerGameSession, Player
+
+ACTIVE_STATUSES = ('waiting', 'in-progress')
+CLOSED_STATUSES = ('finished', 'abandoned')
+
+
+def idle_timeout():
+    """How long an empty room may sit before it is abandoned."""
+    return timedelta(minutes=settings.GAME_ROOM_IDLE_MINUTES)
+
+
+def stale_timeout():
+    """Abandon rooms with no activity at all, even if sockets look connected.
+
+    Covers connection counts left behind by a worker that crashed before its
+    consumers could disconnect.
+    """
+    return timedelta(minutes=settings.GAME_ROOM_STALE_MINUTES)
+
+
+class RoomPresence:
+    """Process-local map of room code -> connected channel names."""
+
+    def __init__(self):
+        self._rooms = {}
+
+    def join(self, room_code, channel_name):
+        channels = self._rooms.setdefault(str(room_code), set())
+        channels.add(channel_name)
+        return len(channels)
+
+    def leave(self, room_code, channel_name):
+        """Remove a channel; returns False if it was never tracked."""
+        channels = self._rooms.get(str(room_code))
+        if not channels or channel_name not in channels:
+            return False
+        channels.discard(channel_name)
+        if not channels:
+            del self._rooms[str(room_code)]
+        return True
+
+    def count(self, room_code):
+        return len(self._rooms.get(str(room_code), ()))
+
+    def evict(self, room_codes):
+        for room_code in room_codes:
+            self._rooms.pop(str(room_code), None)
+
+
+presence = RoomPresence()
+
+
+def mark_connected(room_code):
+    MultiplayerGameSession.objects.filter(room_code=room_code).update(
+        connected_players=F('connected_players') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+def mark_disconnected(room_code):
+    MultiplayerGameSession.objects.filter(room_code=room_code).update(
+        connected_players=Greatest(F('connected_players') - 1, 0),
+        updated_at=timezone.now(),
+    )
+
+
+def reap_idle_rooms(now=None, batch_size=500):
+    """Mark idle waiting/in-progress rooms as abandoned.
+
+    Returns the room codes that were abandoned. Connected clients are told via
+    a ``room_closed`` group message so every worker drops its state for them
+    (only reaching other processes through a shared channel layer).
+    """
+    now = now or timezone.now()
+    idle = MultiplayerGameSession.objects.filter(status__in=ACTIVE_STATUSES).filter(
+        Q(connected_players=0, updated_at__lt=now - idle_timeout()) |
+        Q(updated_at__lt=now - stale_timeout())
+    )
+
+    abandoned = []
+    while True:
+        batch = list(idle.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        # Re-apply the idle filter so a move that landed in between wins
+        idle.filter(pk__in=batch).update(
+            status='abandoned',
+            connected_players=0,
+            updated_at=now,
+        )
+        # Only the rooms this update closed; rooms that won the race stay open
+        abandoned.extend(
+            MultiplayerGameSession.objects.filter(pk__in=batch, status='abandoned', updated_at=now)
+            .values_list('room_code', flat=True)
+        )
+
+    if abandoned:
+        presence.evict(abandoned)
+        _notify_closed(abandoned)
+    return abandoned
+
+
+def purge_closed_rooms(older_than_days=None, now=None, batch_size=1000):
+    """Delete finished/abandoned rooms untouched for ``older_than_days``."""
+    if older_than_days is None:
+        older_than_days = settings.GAME_ROOM_RETENTION_DAYS
+    now = now or timezone.now()
+    old = MultiplayerGameSession.objects.filter(
+        status__in=CLOSED_STATUSES,
+        updated_at__lt=now - timedelta(days=older_than_days),
+    )
+
+    deleted = 0
+    while True:
+        ids = list(old.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        Player.objects.filter(game_session_id__in=ids).delete()
+        MultiplayerGameSession.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+    return deleted
+
+
+def _notify_closed(room_codes):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    send = async_to_sync(channel_layer.group_send)
+    for room_code in room_codes:
+        send(f'game_{room_code}', {'type': 'room_closed', 'status': 'abandoned'})
@@ -0,0 +1,100 @@
+"""
+Benchmark for the quick-play matchmaking queue.
+
+Simulates thousands of players arriving across game types (with some of them
+giving up while queued), queues the whole population and then pairs it, so
+the queues are deep enough for the FIFO check to mean something. Reports
+queue throughput plus how long players waited in simulated time. With --with-db it also creates the matched rooms in
+a throwaway test database to measure the cost per match.
+
+    python manage.py bench_matchmaking --players 20000 --with-db
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from games.management.commands.loadtest_ws import QueryCounter, percentile
+from games.matchmaking import MATCHMAKING_GAME_TYPES, MatchQueue, create_match
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark matchmaking enqueue/cancel/pairing over thousands of queued players.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=10000)
+        parser.add_argument('--arrival-rate', type=float, default=200.0, help='Simulated arrivals per second')
+        parser.add_argument('--cancel-ratio', type=float, default=0.1, help='Share of queued players who give up')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--with-db', action='store_true', help='Also create rooms for matched pairs')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        players = options['players']
+        game_types = [rng.choice(MATCHMAKING_GAME_TYPES) for _ in range(players)]
+        cancels = {i for i in range(players) if rng.random() < options['cancel_ratio']}
+
+        queue = MatchQueue()
+        matches = []
+        waits = []
+        fifo_violations = 0
+        peak_waiting = 0
+
+        started = time.perf_counter()
+        for user_id, game_type in enumerate(game_types):
+            # Players who give up leave just before the next arrival
+            if user_id - 1 in cancels:
+                queue.cancel(user_id - 1)
+            queue.enqueue(user_id, game_type, now=user_id / options['arrival_rate'], pair=False)
+            peak_waiting = max(peak_waiting, queue.waiting_count(game_type))
+        if players - 1 in cancels:
+            queue.cancel(players - 1)
+
+        now = players / options['arrival_rate']
+        for game_type in MATCHMAKING_GAME_TYPES:
+            # Pairs must come out in arrival order, skipping whoever gave up
+            expected = iter(uid for uid, kind in enumerate(game_types) if kind == game_type and uid not in cancels)
+            while (match := queue.pop_match(game_type, now=now)) is not None:
+                first_id, second_id, waited = match
+                waits.append(waited)
+                matches.append((first_id, second_id, game_type))
+                if (first_id, second_id) != (next(expected, None), next(expected, None)):
+                    fifo_violations += 1
+        elapsed = time.perf_counter() - started
+
+        waits.sort()
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Queue: {players} players over {len(MATCHMAKING_GAME_TYPES)} game types'))
+        operations = players + len(cancels) + len(matches)
+        self.stdout.write(f'  operations:       {operations} in {elapsed * 1000:.1f}ms ({operations / elapsed:,.0f} ops/s)')
+        self.stdout.write(f'  matches:          {len(matches)}')
+        self.stdout.write(f'  peak queue depth: {peak_waiting}')
+        self.stdout.write(f'  wait (sim s):     p50 {percentile(waits, 50):.3f}  p95 {percentile(waits, 95):.3f}  '
+                          f'max {waits[-1] if waits else 0:.3f}')
+        self.stdout.write(f'  FIFO violations:  {fifo_violations}')
+
+        if options['with_db']:
+            self._bench_rooms(matches, players)
+
+    def _bench_rooms(self, matches, players):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            User.objects.bulk_create(
+                [User(id=i + 1, username=f'mm-{i}', email=f'mm-{i}@bench.local', password='!') for i in range(players)],
+                batch_size=1000,
+            )
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                for first, second, game_type in matches:
+                    create_match(first + 1, second + 1, game_type)
+                elapsed = time.perf_counter() - started
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Room creation'))
+        self.stdout.write(f'  rooms:            {len(matches)} in {elapsed:.2f}s ({len(matches) / elapsed:,.0f} rooms/s)')
+        self.stdout.write(f'  queries/match:    {counter.count / len(matches):.1f}' if matches else '  queries/match:    0')
@@ -0,0 +1,305 @@
+"""
+Load test for the game and chat WebSocket consumers.
+
+Spins up simulated players in-process with channels' WebsocketCommunicator,
+drives join/move/chat traffic at a target rate and reports move-to-broadcast
+latency percentiles, message throughput and DB queries per move.
+
+Runs against a throwaway test database and a stubbed AI provider, so it is
+safe to point at any settings module:
+
+    python manage.py loadtest_ws --rooms 50 --chats 20 --duration 15 --rate 2
+"""
+import asyncio
+import json
+import time
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from chat.models import Conversation
+from chat.routing import websocket_urlpatterns
+from games.models import MultiplayerGameSession, Player, initial_game_state
+
+User = get_user_model()
+
+RECEIVE_TIMEOUT = 10
+
+
+def stub_chat_response(user_message, conversation_history, user_tone='friendly'):
+    """Canned replacement for chat.ai_service.get_chat_response."""
+    return {
+        'response': "That sounds like a lot. What's weighing on you the most?",
+        'is_crisis': False,
+        'detected_emotion': 'neutral',
+        'stress_level': 'low',
+        'conversation_impact': {'impact': 'neutral', 'trend': 'User is opening up'},
+        'coping_suggestion': None,
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class UserScopeMiddleware(BaseMiddleware):
+    """Puts a fixed user in the scope, standing in for AuthMiddlewareStack."""
+
+    def __init__(self, inner, user):
+        super().__init__(inner)
+        self.user = user
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope, user=self.user)
+        return await super().__call__(scope, receive, send)
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries on the consumers' DB thread."""
+
+    def __init__(self):
+        self.count = 0
+
+    def install(self):
+        # Must run on the thread database_sync_to_async uses, since
+        # connections are per-thread.
+        connection.execute_wrappers.append(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class PhaseStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.operations = 0
+        self.messages = 0
+        self.errors = 0
+        self.queries = 0
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+        return {
+            'operations': self.operations,
+            'operations_per_sec': round(self.operations / self.elapsed, 1) if self.elapsed else 0,
+            'messages': self.messages,
+            'messages_per_sec': round(self.messages / self.elapsed, 1) if self.elapsed else 0,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50) * 1000, 2),
+                'p95': round(percentile(latencies, 95) * 1000, 2),
+                'p99': round(percentile(latencies, 99) * 1000, 2),
+            },
+            'queries_per_operation': round(self.queries / self.operations, 2) if self.operations else 0,
+            'errors': self.errors,
+            'elapsed_sec': round(self.elapsed, 2),
+        }
+
+
+class Command(BaseCommand):
+    help = 'Load test GameConsumer/ChatConsumer with simulated players over the ASGI routes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=20, help='Concurrent 2-player game rooms')
+        parser.add_argument('--chats', type=int, default=10, help='Concurrent chat conversations')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+        parser.add_argument('--rate', type=float, default=2.0, help='Moves (or chat sends) per second per room')
+        parser.add_argument('--chat-every', type=int, default=5, help='Send an in-game chat message every N moves (0 disables)')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with mock.patch('chat.consumers.get_chat_response', stub_chat_response):
+                results = asyncio.run(self._run(options))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for phase, data in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{phase} ({data['elapsed_sec']}s)"))
+            self.stdout.write(f"  operations:   {data['operations']} ({data['operations_per_sec']}/s)")
+            self.stdout.write(f"  messages:     {data['messages']} ({data['messages_per_sec']}/s)")
+            latency = data['latency_ms']
+            self.stdout.write(f"  latency (ms): p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}")
+            self.stdout.write(f"  queries/op:   {data['queries_per_operation']}")
+            if data['errors']:
+                self.stdout.write(self.style.WARNING(f"  errors:       {data['errors']}"))
+
+    async def _run(self, options):
+        counter = QueryCounter()
+        await database_sync_to_async(counter.install)()
+
+        results = {}
+        if options['rooms']:
+            rooms = await database_sync_to_async(self._create_rooms)(options['rooms'])
+            stats = await self._run_games(rooms, counter, options)
+            results[f"game rooms x{options['rooms']} (move -> broadcast)"] = stats.as_dict()
+        if options['chats']:
+            conversations = await database_sync_to_async(self._create_conversations)(options['chats'])
+            stats = await self._run_chats(conversations, counter, options)
+            results[f"chat sessions x{options['chats']} (send -> reply)"] = stats.as_dict()
+        return results
+
+    # Fixtures
+
+    def _create_users(self, prefix, count):
+        users = [
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@loadtest.local', password='!')
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users)
+        return list(User.objects.filter(username__startswith=prefix).order_by('id'))
+
+    def _create_rooms(self, count):
+        users = self._create_users('lt-player-', count * 2)
+        rooms = []
+        for i in range(count):
+            host, guest = users[2 * i], users[2 * i + 1]
+            session = MultiplayerGameSession.objects.create(
+                host=host,
+                game_type='tic-tac-toe',
+                game_state=initial_game_state('tic-tac-toe'),
+            )
+            Player.objects.create(user=host, game_session=session, symbol='X')
+            rooms.append((session.room_code, host, guest))
+        return rooms
+
+    def _create_conversations(self, count):
+        users = self._create_users('lt-chatter-', count)
+        return [
+            (Conversation.objects.create(user=user, title='Load test').id, user)
+            for user in users
+        ]
+
+    # Phases
+
+    def _communicator(self, path, user):
+        application = UserScopeMiddleware(URLRouter(websocket_urlpatterns), user)
+        return WebsocketCommunicator(application, path)
+
+    async def _receive(self, communicator, stats, expected_type=None):
+        """Receive messages until one of the expected type arrives."""
+        while True:
+            data = json.loads(await communicator.receive_from(timeout=RECEIVE_TIMEOUT))
+            stats.messages += 1
+            if expected_type is None or data.get('type') == expected_type:
+                return data
+
+    async def _run_games(self, rooms, counter, options):
+        stats = PhaseStats('games')
+        players = []
+        for room_code, host, guest in rooms:
+            host_ws = self._communicator(f'/ws/game/{room_code}/', host)
+            guest_ws = self._communicator(f'/ws/game/{room_code}/', guest)
+            await host_ws.connect()
+            await self._receive(host_ws, stats, 'game_state')
+            await guest_ws.connect()
+            await self._receive(guest_ws, stats, 'game_state')
+
+            await guest_ws.send_json_to({'type': 'join_game'})
+            await self._receive(host_ws, stats, 'game_update')
+            await self._receive(guest_ws, stats, 'game_update')
+            players.append((host_ws, guest_ws))
+
+        interval = 1.0 / options['rate'] if options['rate'] > 0 else 0
+        counter.count = 0
+        started = time.perf_counter()
+        stop_at = started + options['duration']
+        await asyncio.gather(*[
+            self._play_room(host_ws, guest_ws, stats, stop_at, interval, options['chat_every'])
+            for host_ws, guest_ws in players
+        ])
+        stats.elapsed = time.perf_counter() - started
+        stats.queries = counter.count
+
+        for host_ws, guest_ws in players:
+            await host_ws.disconnect()
+            await guest_ws.disconnect()
+        return stats
+
+    async def _play_room(self, host_ws, guest_ws, stats, stop_at, interval, chat_every):
+        sockets = [host_ws, guest_ws]
+        symbols = ['X', 'O']
+        board = [' '] * 9
+        turn = 0
+        next_at = time.perf_counter()
+        while time.perf_counter() < stop_at:
+            mover, watcher = sockets[turn % 2], sockets[(turn + 1) % 2]
+            if ' ' not in board:
+                board = [' '] * 9
+            board[board.index(' ')] = symbols[turn % 2]
+            game_state = {'board': board, 'turn': symbols[(turn + 1) % 2], 'winner': None}
+
+            try:
+                sent_at = time.perf_counter()
+                await mover.send_json_to({'type': 'make_move', 'game_state': game_state})
+                await self._receive(watcher, stats, 'game_update')
+                stats.latencies.append(time.perf_counter() - sent_at)
+                await self._receive(mover, stats, 'game_update')
+                stats.operations += 1
+
+                if chat_every and turn % chat_every == 0:
+                    await mover.send_json_to({'type': 'chat_message', 'message': 'gg'})
+                    await self._receive(watcher, stats, 'chat_message')
+                    await self._receive(mover, stats, 'chat_message')
+            except asyncio.TimeoutError:
+                stats.errors += 1
+                return
+
+            turn += 1
+            next_at += interval
+            await asyncio.sleep(max(0, next_at - time.perf_counter()))
+
+    async def _run_chats(self, conversations, counter, options):
+        stats = PhaseStats('chat')
+        sockets = []
+        for conversation_id, user in conversations:
+            communicator = self._communicator(f'/ws/chat/{conversation_id}/', user)
+            await communicator.connect()
+            sockets.append(communicator)
+
+        interval = 1.0 / options['rate'] if options['rate'] > 0 else 0
+        counter.count = 0
+        started = time.perf_counter()
+        stop_at = started + options['duration']
+        await asyncio.gather(*[
+            self._chat(communicator, stats, stop_at, interval) for communicator in sockets
+        ])
+        stats.elapsed = time.perf_counter() - started
+        stats.queries = counter.count
+
+        for communicator in sockets:
+            await communicator.disconnect()
+        return stats
+
+    async def _chat(self, communicator, stats, stop_at, interval):
+        next_at = time.perf_counter()
+        while time.perf_counter() < stop_at:
+            try:
+                sent_at = time.perf_counter()
+                await communicator.send_json_to({'message': 'I feel a bit stressed about work today'})
+                await self._receive(communicator, stats, 'message')
+                stats.latencies.append(time.perf_counter() - sent_at)
+                stats.operations += 1
+            except asyncio.TimeoutError:
+                stats.errors += 1
+                return
+
+            next_at += interval
+            await asyncio.sleep(max(0, next_at - time.perf_counter()))
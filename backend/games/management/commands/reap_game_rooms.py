@@ -0,0 +1,56 @@
+"""
+Abandon idle multiplayer rooms and purge old closed ones.
+
+Run once from cron, or keep it running as a small scheduler process:
+
+    python manage.py reap_game_rooms --every 60
+
+Players in an abandoned room are only sent ``room_closed`` if the channel
+layer is shared with the ASGI workers; with the in-memory layer they find
+out on their next move.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from games import lifecycle
+
+
+class Command(BaseCommand):
+    help = 'Mark idle game rooms as abandoned and delete closed rooms past retention.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Repeat every N seconds instead of running once'
+        )
+        parser.add_argument(
+            '--retention-days', type=int, default=settings.GAME_ROOM_RETENTION_DAYS,
+            help='Delete finished/abandoned rooms older than this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-purge', action='store_true',
+            help='Only abandon idle rooms, keep closed rooms'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self._run_once(options)
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+            close_old_connections()
+
+    def _run_once(self, options):
+        abandoned = lifecycle.reap_idle_rooms(batch_size=options['batch_size'])
+        purged = 0
+        if not options['no_purge']:
+            purged = lifecycle.purge_closed_rooms(
+                older_than_days=options['retention_days'],
+                batch_size=options['batch_size'],
+            )
+        if abandoned or purged or options['verbosity'] > 1:
+            self.stdout.write(f"Abandoned {len(abandoned)} idle room(s), purged {purged} closed room(s).")
@@ -0,0 +1,133 @@
+"""
+Quick-play matchmaking for multiplayer games.
+
+Players queue per game type. As soon as a second player queues for the same
+game they are paired into a new MultiplayerGameSession and both are notified
+over their matchmaking WebSocket group. Queues are FIFO, so the player who has
+waited longest is always matched first, and every operation is O(1).
+Entries remember the socket that queued them, so a player with two tabs open
+only leaves the queue when that socket goes away.
+
+The queue lives in the worker's memory, matching the in-memory channel layer
+the app runs with; a multi-worker deployment needs sticky routing for
+/ws/matchmaking/ or a shared queue.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import transaction
+
+from .models import MultiplayerGameSession, Player, initial_game_state
+
+MATCHMAKING_GAME_TYPES = ('tic-tac-toe', 'connect-four', 'rock-paper-scissors', 'memory-match-mp')
+
+
+def matchmaking_group(user_id):
+    return f'matchmaking_{user_id}'
+
+
+class MatchQueue:
+    """FIFO waiting lists per game type.
+
+    Each game type maps to an OrderedDict of user id -> enqueue time, which
+    gives O(1) enqueue, O(1) cancel by user and O(1) pop of the oldest entry.
+    ``owner`` is whatever queued the player (the consumer's channel name).
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._waiting = {}
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, user_id, game_type, now=None, owner=None, pair=True):
+        """Queue a player, or pair them with whoever has waited longest.
+
+        Returns ``(opponent_id, seconds_waited)`` when a match is made,
+        otherwise None and the player stays queued. With ``pair=False`` the
+        player is only queued; pop_match() pairs them later.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._waiting.get(user_id) == game_type:
+                self._owners[user_id] = owner
+                return None
+            self._remove(user_id)
+
+            queue = self._queues.setdefault(game_type, OrderedDict())
+            if queue and pair:
+                opponent_id, enqueued_at = self._pop(queue)
+                return opponent_id, now - enqueued_at
+
+            queue[user_id] = now
+            self._waiting[user_id] = game_type
+            self._owners[user_id] = owner
+            return None
+
+    def pop_match(self, game_type, now=None):
+        """Pair the two longest-waiting players of a game type.
+
+        Returns ``(first_id, second_id, seconds_first_waited)``, or None when
+        fewer than two are queued.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            queue = self._queues.get(game_type)
+            if not queue or len(queue) < 2:
+                return None
+            first_id, enqueued_at = self._pop(queue)
+            second_id, _ = self._pop(queue)
+            return first_id, second_id, now - enqueued_at
+
+    def cancel(self, user_id, owner=None):
+        """Take a player out of whatever queue they are in.
+
+        With ``owner`` the entry is only removed if that owner queued it.
+        """
+        with self._lock:
+            if owner is not None and self._owners.get(user_id, owner) != owner:
+                return False
+            return self._remove(user_id)
+
+    def waiting_count(self, game_type):
+        return len(self._queues.get(game_type, ()))
+
+    def is_waiting(self, user_id):
+        return user_id in self._waiting
+
+    def _pop(self, queue):
+        user_id, enqueued_at = queue.popitem(last=False)
+        del self._waiting[user_id]
+        self._owners.pop(user_id, None)
+        return user_id, enqueued_at
+
+    def _remove(self, user_id):
+        game_type = self._waiting.pop(user_id, None)
+        if game_type is None:
+            return False
+        del self._queues[game_type][user_id]
+        self._owners.pop(user_id, None)
+        return True
+
+
+match_queue = MatchQueue()
+
+
+def create_match(first_user_id, second_user_id, game_type):
+    """Create an in-progress room for two matched players.
+
+    The player who waited longer goes first (X/red/player1).
+    """
+    with transaction.atomic():
+        game_session = MultiplayerGameSession.objects.create(
+            host_id=first_user_id,
+            game_type=game_type,
+            game_state=initial_game_state(game_type),
+            status='in-progress',
+        )
+        Player.objects.bulk_create([
+            Player(user_id=first_user_id, game_session=game_session, symbol='X'),
+            Player(user_id=second_user_id, game_session=game_session, symbol='O'),
+        ])
+    return game_session
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_multiplayergamesession_player_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='multiplayergamesession',
+            name='connected_players',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='multiplayergamesession',
+            index=models.Index(fields=['status', 'updated_at'], name='games_multi_status_bf441a_idx'),
+        ),
+    ]
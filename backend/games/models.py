@@ -1,4 +1,5 @@
 import uuid
+import random
 from django.db import models
 from django.conf import settings
 
@@ -7,6 +8,43 @@ def default_game_state():
     return {'board': list(' ' * 9), 'turn': 'X', 'winner': None}
 
 
+def initial_game_state(game_type):
+    """Starting state for a freshly created room of the given game type."""
+    if game_type == 'tic-tac-toe':
+        return {
+            'board': [' '] * 9,
+            'turn': 'X',
+            'winner': None
+        }
+    if game_type == 'connect-four':
+        return {
+            'board': [['empty'] * 7 for _ in range(6)],
+            'currentTurn': 'red',
+            'winner': None
+        }
+    if game_type == 'rock-paper-scissors':
+        return {
+            'round': 1,
+            'p1Choice': None,
+            'p2Choice': None,
+            'scores': {'player1': 0, 'player2': 0}
+        }
+    if game_type == 'memory-match-mp':
+        emojis = ['🎨', '🎭', '🎪', '🎬', '🎮', '🎯', '🎲', '🎸']
+        cards_list = emojis + emojis
+        random.shuffle(cards_list)
+        return {
+            'cards': [
+                {'id': i, 'emoji': emoji, 'isFlipped': False, 'isMatched': False}
+                for i, emoji in enumerate(cards_list)
+            ],
+            'currentTurn': 'player1',
+            'scores': {'player1': 0, 'player2': 0},
+            'winner': None
+        }
+    return {}
+
+
 class MultiplayerGameSession(models.Model):
     """Model for a real-time multiplayer game session (e.g., a game room)."""
     
@@ -37,12 +75,21 @@ class MultiplayerGameSession(models.Model):
     max_players = models.PositiveIntegerField(default=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
     
+    # Open WebSocket connections across all workers, kept by games.lifecycle
+    connected_players = models.PositiveIntegerField(default=0)
+    
     # Store game-specific state as JSON. E.g., for Tic Tac Toe: board, current turn, winner.
     game_state = models.JSONField(default=default_game_state)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Reaper scans: active rooms gone idle, closed rooms past retention
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.get_game_type_display()} Room - {self.room_code}"
 
@@ -1,6 +1,7 @@
 from django.urls import path
-from .consumers import GameConsumer
+from .consumers import GameConsumer, MatchmakingConsumer
 
 websocket_urlpatterns = [
     path('ws/game/<str:room_code>/', GameConsumer.as_asgi()),
+    path('ws/matchmaking/', MatchmakingConsumer.as_asgi()),
 ]
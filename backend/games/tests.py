@@ -0,0 +1,158 @@
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.routing import websocket_urlpatterns
+from dost.testing import QueryBudgetMixin
+from . import lifecycle
+from .matchmaking import MatchQueue
+from .models import MultiplayerGameSession, Player, TherapeuticGame
+
+User = get_user_model()
+
+
+class RoomLifecycleTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='x')
+        self.guest = User.objects.create_user(username='guest', email='guest@example.com', password='x')
+        self.now = timezone.now()
+
+    def room(self, status='in-progress', idle_minutes=0, connected=0):
+        room = MultiplayerGameSession.objects.create(host=self.host, status=status)
+        Player.objects.create(user=self.host, game_session=room, symbol='X')
+        Player.objects.create(user=self.guest, game_session=room, symbol='O')
+        MultiplayerGameSession.objects.filter(pk=room.pk).update(
+            connected_players=connected,
+            updated_at=self.now - timedelta(minutes=idle_minutes),
+        )
+        return room
+
+    @mock.patch.object(lifecycle, '_notify_closed')
+    def test_reaps_only_idle_rooms(self, notify_closed):
+        idle = self.room(idle_minutes=30)
+        waiting = self.room(status='waiting', idle_minutes=30)
+        recent = self.room(idle_minutes=5)
+        connected = self.room(idle_minutes=30, connected=2)
+        stale = self.room(idle_minutes=300, connected=1)
+
+        abandoned = lifecycle.reap_idle_rooms(now=self.now, batch_size=2)
+
+        self.assertCountEqual(abandoned, [idle.room_code, waiting.room_code, stale.room_code])
+        notify_closed.assert_called_once_with(abandoned)
+        statuses = dict(MultiplayerGameSession.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[recent.pk], 'in-progress')
+        self.assertEqual(statuses[connected.pk], 'in-progress')
+        self.assertEqual(statuses[idle.pk], 'abandoned')
+
+    @mock.patch.object(lifecycle, '_notify_closed')
+    def test_room_moved_during_the_reap_stays_open(self, notify_closed):
+        idle = self.room(idle_minutes=30)
+        busy = self.room(idle_minutes=30)
+
+        moved = []
+
+        def move_lands_first(execute, sql, params, many, context):
+            # A move in ``busy`` commits between the reaper's select and update
+            if sql.startswith('UPDATE') and not moved:
+                moved.append(busy.pk)
+                MultiplayerGameSession.objects.filter(pk=busy.pk).update(updated_at=timezone.now())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(move_lands_first):
+            abandoned = lifecycle.reap_idle_rooms(now=self.now)
+
+        self.assertEqual(moved, [busy.pk])
+        self.assertEqual(abandoned, [idle.room_code])
+        notify_closed.assert_called_once_with([idle.room_code])
+        busy.refresh_from_db()
+        self.assertEqual(busy.status, 'in-progress')
+
+    def test_connected_players_are_told_when_the_reaper_runs_in_process(self):
+        room = self.room()
+
+        async def play_then_reap():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/game/{room.room_code}/')
+            communicator.scope['user'] = self.host
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            self.assertEqual((await communicator.receive_json_from())['type'], 'game_state')
+
+            # Long after the stale timeout, so the open socket does not keep it alive
+            later = timezone.now() + lifecycle.stale_timeout() + timedelta(minutes=1)
+            abandoned = await database_sync_to_async(lifecycle.reap_idle_rooms)(now=later)
+            self.assertEqual(abandoned, [room.room_code])
+
+            self.assertEqual(await communicator.receive_json_from(), {'type': 'room_closed', 'status': 'abandoned'})
+            self.assertEqual((await communicator.receive_output())['type'], 'websocket.close')
+            await communicator.disconnect()
+
+        async_to_sync(play_then_reap)()
+        room.refresh_from_db()
+        self.assertEqual((room.status, room.connected_players), ('abandoned', 0))
+        self.assertEqual(lifecycle.presence.count(room.room_code), 0)
+
+    def test_purges_closed_rooms_past_retention(self):
+        old_finished = self.room(status='finished', idle_minutes=60 * 24 * 40)
+        old_abandoned = self.room(status='abandoned', idle_minutes=60 * 24 * 40)
+        recent_finished = self.room(status='finished', idle_minutes=60)
+        old_active = self.room(status='in-progress', idle_minutes=60 * 24 * 40, connected=2)
+
+        purged = lifecycle.purge_closed_rooms(older_than_days=30, now=self.now, batch_size=1)
+
+        self.assertEqual(purged, 2)
+        remaining = set(MultiplayerGameSession.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {recent_finished.pk, old_active.pk})
+        self.assertFalse(Player.objects.filter(game_session__in=[old_finished, old_abandoned]).exists())
+        self.assertEqual(Player.objects.filter(game_session=recent_finished).count(), 2)
+
+
+class MatchQueueTests(SimpleTestCase):
+    def test_pairs_longest_waiting_first(self):
+        queue = MatchQueue()
+        for user_id in (1, 2, 3, 4, 5):
+            queue.enqueue(user_id, 'tic-tac-toe', now=user_id, pair=False)
+        queue.cancel(2)
+        self.assertEqual(queue.waiting_count('tic-tac-toe'), 4)
+        self.assertEqual(queue.pop_match('tic-tac-toe', now=10), (1, 3, 9))
+        self.assertEqual(queue.enqueue(6, 'tic-tac-toe', now=10), (4, 6))
+        self.assertIsNone(queue.pop_match('tic-tac-toe'))
+
+    def test_cancel_is_ignored_for_entries_queued_by_another_socket(self):
+        queue = MatchQueue()
+        queue.enqueue(1, 'connect-four', owner='tab-a')
+        # The second tab queues for the same game and takes the entry over
+        queue.enqueue(1, 'connect-four', owner='tab-b')
+        self.assertFalse(queue.cancel(1, owner='tab-a'))
+        self.assertTrue(queue.is_waiting(1))
+        self.assertTrue(queue.cancel(1, owner='tab-b'))
+        self.assertFalse(queue.is_waiting(1))
+
+
+class GamesQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        # Counts come from the in-memory catalog
+        '/api/games/games/categories/': 1,
+    }
+
+    def setUp(self):
+        user = User.objects.create_user(username='player', email='player@example.com', password='x')
+        for category in ('anger', 'anger', 'joy'):
+            TherapeuticGame.objects.create(
+                name=f'{category} game', description='', emotion_category=category, game_type='action',
+                therapeutic_benefit='Helps',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_category_counts(self):
+        categories = {row['code']: row['count'] for row in self.client.get('/api/games/games/categories/').json()}
+        self.assertEqual((categories['anger'], categories['joy'], categories['fear']), (2, 1, 0))
@@ -4,12 +4,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django.utils import timezone
-from django.db.models import Count, Avg, F
+from django.db.models import Count, F
 from django.shortcuts import get_object_or_404
-from .models import TherapeuticGame, GameSession, EmotionGameRecommendation, MultiplayerGameSession, Player
+from .models import (
+    TherapeuticGame, GameSession, EmotionGameRecommendation, MultiplayerGameSession, Player,
+    initial_game_state
+)
+from .catalog import game_catalog
+from pet.interaction_service import record_interaction
 from .serializers import (
     TherapeuticGameSerializer, GameSessionSerializer, 
-    GameSessionEndSerializer, EmotionGameRecommendationSerializer,
+    GameSessionEndSerializer,
     EmotionInputSerializer, MultiplayerGameSessionSerializer
 )
 
@@ -66,31 +71,27 @@ class TherapeuticGameViewSet(viewsets.ReadOnlyModelViewSet):
         normalized_emotion = emotion.lower().strip()
         category = emotion_mapping.get(normalized_emotion, normalized_emotion)
         
-        # Get games matching the emotion category
-        games = TherapeuticGame.objects.filter(
-            is_active=True,
-            emotion_category=category,
-            intensity_level__lte=intensity + 1  # Allow slightly higher intensity
-        ).order_by('?')[:5]  # Random selection
+        # Pick from the cached catalog, favouring games closest to the intensity
+        games = game_catalog.sample(
+            5,
+            keys=[category],
+            predicate=lambda game: game.intensity_level <= intensity + 1,  # Allow slightly higher intensity
+            weight=lambda game: 1 / (1 + abs(game.intensity_level - intensity)),
+        )
         
         # If no exact match, suggest based on intensity
-        if not games.exists():
+        if not games:
             if intensity >= 4:
                 # High intensity - action games
-                games = TherapeuticGame.objects.filter(
-                    is_active=True,
-                    game_type__in=['action', 'sports']
-                ).order_by('?')[:5]
+                game_types = ['action', 'sports']
             else:
                 # Lower intensity - calming games
-                games = TherapeuticGame.objects.filter(
-                    is_active=True,
-                    game_type__in=['relaxing', 'puzzle']
-                ).order_by('?')[:5]
+                game_types = ['relaxing', 'puzzle']
+            games = game_catalog.sample(5, predicate=lambda game: game.game_type in game_types)
         
-        # Create recommendation records
-        for game in games[:3]:  # Top 3
-            EmotionGameRecommendation.objects.create(
+        # Log the top 3 as recommendation records in one insert
+        EmotionGameRecommendation.objects.bulk_create([
+            EmotionGameRecommendation(
                 user=request.user,
                 detected_emotion=category,
                 detected_intensity=intensity,
@@ -98,6 +99,8 @@ class TherapeuticGameViewSet(viewsets.ReadOnlyModelViewSet):
                 source='manual',
                 source_text=serializer.validated_data.get('context', '')
             )
+            for game in games[:3]
+        ])
         
         return Response({
             'emotion': category,
@@ -123,12 +126,10 @@ class TherapeuticGameViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def categories(self, request):
         """Get all emotion categories with game counts"""
+        counts = game_catalog.counts()
         categories = []
         for code, name in TherapeuticGame.EMOTION_CATEGORIES:
-            count = TherapeuticGame.objects.filter(
-                is_active=True, 
-                emotion_category=code
-            ).count()
+            count = counts.get(code, 0)
             categories.append({
                 'code': code,
                 'name': name,
@@ -182,11 +183,7 @@ class GameSessionViewSet(viewsets.ModelViewSet):
         
         # Award pet XP if helpful
         if session.was_helpful:
-            try:
-                pet = request.user.wellness_pet
-                pet.add_experience(15, 'game')  # 15 XP for helpful gaming session
-            except:
-                pass
+            record_interaction(request.user, 'game', f"Played {session.game.name}")
         
         return Response(GameSessionSerializer(session).data)
     
@@ -233,46 +230,10 @@ class CreateGameRoomView(APIView):
     def post(self, request):
         game_type = request.data.get('game_type', 'tic-tac-toe')
         
-        # Initialize game state based on game type
-        initial_state = {}
-        if game_type == 'tic-tac-toe':
-            initial_state = {
-                'board': [' '] * 9,
-                'turn': 'X',
-                'winner': None
-            }
-        elif game_type == 'connect-four':
-            initial_state = {
-                'board': [['empty'] * 7 for _ in range(6)],
-                'currentTurn': 'red',
-                'winner': None
-            }
-        elif game_type == 'rock-paper-scissors':
-            initial_state = {
-                'round': 1,
-                'p1Choice': None,
-                'p2Choice': None,
-                'scores': {'player1': 0, 'player2': 0}
-            }
-        elif game_type == 'memory-match-mp':
-            import random
-            emojis = ['🎨', '🎭', '🎪', '🎬', '🎮', '🎯', '🎲', '🎸']
-            cards_list = emojis + emojis
-            random.shuffle(cards_list)
-            initial_state = {
-                'cards': [
-                    {'id': i, 'emoji': emoji, 'isFlipped': False, 'isMatched': False}
-                    for i, emoji in enumerate(cards_list)
-                ],
-                'currentTurn': 'player1',
-                'scores': {'player1': 0, 'player2': 0},
-                'winner': None
-            }
-        
         game_session = MultiplayerGameSession.objects.create(
             host=request.user,
             game_type=game_type,
-            game_state=initial_state
+            game_state=initial_game_state(game_type)
         )
         
         # Automatically add the creator as the first player
@@ -295,6 +256,9 @@ class JoinGameRoomView(APIView):
         if game_session.status == 'finished':
             return Response({'error': 'This game has already finished.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if game_session.status == 'abandoned':
+            return Response({'error': 'This game room has expired.'}, status=status.HTTP_400_BAD_REQUEST)
+
         if game_session.is_full():
             return Response({'error': 'This game room is full.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -335,6 +299,9 @@ class MakeMoveView(APIView):
         if game_session.status == 'finished':
             return Response({'error': 'Game is already finished.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if game_session.status == 'abandoned':
+            return Response({'error': 'This game room has expired.'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             player = Player.objects.get(user=request.user, game_session=game_session)
         except Player.DoesNotExist:
@@ -0,0 +1,166 @@
+"""
+Proactive trigger alerts with a precomputed next-alert time.
+
+The Insights alert endpoint is hit on every app open, but an alert can only
+fire when one of the user's patterns matches the current time slot or
+weekday and has not been alerted on in the last ALERT_COOLDOWN. Each
+evaluation therefore also works out the earliest moment another alert could
+fire and stores it in AlertSchedule:
+
+* a call before that moment is answered from the schedule row alone,
+* otherwise one query loads the candidate patterns, each annotated with its
+  latest notification time through a correlated subquery,
+* the dispatcher (dispatcher.py) pushes alerts when the time comes instead
+  of waiting for the app to ask,
+* pattern writes and notification deletes drop the user's schedule, so the
+  next call evaluates again.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import AlertSchedule, InsightNotification, TriggerPattern
+
+ALERT_COOLDOWN = timedelta(hours=12)
+# Recheck users without alertable patterns at least this often
+ALERT_HORIZON = timedelta(days=1)
+MIN_ALERT_CONFIDENCE = 0.5
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def time_of_day(hour):
+    if 5 <= hour < 12:
+        return 'morning'
+    if 12 <= hour < 17:
+        return 'afternoon'
+    if 17 <= hour < 21:
+        return 'evening'
+    return 'night'
+
+
+def next_match(pattern, moment):
+    """Earliest time at or after ``moment`` when ``pattern`` matches, or None"""
+    candidates = []
+    if pattern.time_of_day:
+        hour = moment
+        for _ in range(25):
+            if time_of_day(hour.hour) == pattern.time_of_day:
+                candidates.append(hour)
+                break
+            hour = hour.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    if pattern.day_of_week in WEEKDAYS:
+        days = (WEEKDAYS.index(pattern.day_of_week) - moment.weekday()) % 7
+        if days == 0:
+            candidates.append(moment)
+        else:
+            midnight = datetime.combine(moment.date() + timedelta(days=days), time.min)
+            candidates.append(midnight.replace(tzinfo=moment.tzinfo))
+    return min(candidates, default=None)
+
+
+def candidate_patterns(**filters):
+    """Alertable patterns, each annotated with ``last_alert_at``"""
+    latest = InsightNotification.objects.filter(
+        trigger_pattern=OuterRef('pk')
+    ).order_by('-created_at').values('created_at')[:1]
+    return TriggerPattern.objects.filter(
+        is_active=True,
+        is_dismissed=False,
+        confidence_score__gte=MIN_ALERT_CONFIDENCE,
+        **filters
+    ).annotate(last_alert_at=Subquery(latest))
+
+
+def evaluate(patterns, now):
+    """Pick the pattern to alert on now, if any, and the next alert time.
+
+    ``patterns`` are one user's candidate_patterns() in priority order.
+    Returns ``(pattern or None, next_alert_at)``, with the picked pattern
+    counted as alerted at ``now``.
+    """
+    slot, weekday = time_of_day(now.hour), WEEKDAYS[now.weekday()]
+    alert = None
+    for pattern in patterns:
+        ready = pattern.last_alert_at is None or pattern.last_alert_at <= now - ALERT_COOLDOWN
+        if ready and (pattern.time_of_day == slot or pattern.day_of_week == weekday):
+            alert = pattern
+            pattern.last_alert_at = now
+            break
+
+    next_alert_at = now + ALERT_HORIZON
+    for pattern in patterns:
+        ready_at = now
+        if pattern.last_alert_at is not None:
+            ready_at = max(now, pattern.last_alert_at + ALERT_COOLDOWN)
+        moment = next_match(pattern, ready_at)
+        if moment is not None:
+            next_alert_at = min(next_alert_at, moment)
+    return alert, next_alert_at
+
+
+def save_schedules(next_alerts):
+    """Store ``{user_id: next_alert_at}`` in one upsert"""
+    AlertSchedule.objects.bulk_create(
+        [AlertSchedule(user_id=user_id, next_alert_at=moment) for user_id, moment in next_alerts.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['next_alert_at', 'updated_at'],
+    )
+
+
+def alert_for(pattern):
+    return {
+        'pattern': pattern,
+        'title': f"Heads up about {pattern.pattern_name}",
+        'message': pattern.description,
+        'advice': pattern.custom_advice,
+    }
+
+
+def notification_for(user_id, alert, now=None):
+    """Unsaved InsightNotification recording ``alert``"""
+    return InsightNotification(
+        user_id=user_id,
+        trigger_pattern=alert['pattern'],
+        notification_type='trigger_alert',
+        title=alert['title'],
+        message=alert['message'],
+        action_type='coping',
+        action_data={'advice': alert['advice']},
+        sent_at=now or timezone.now(),
+    )
+
+
+def proactive_alert(user, now=None):
+    """The alert to show ``user`` now, or None.
+
+    The caller is expected to record the returned alert with
+    notification_for(); the stored schedule already accounts for it.
+    """
+    now = now or timezone.now()
+    next_alert_at = (
+        AlertSchedule.objects.filter(user=user).values_list('next_alert_at', flat=True).first()
+    )
+    if next_alert_at is not None and next_alert_at > now:
+        return None
+
+    pattern, next_alert_at = evaluate(list(candidate_patterns(user=user)), now)
+    save_schedules({user.pk: next_alert_at})
+    return alert_for(pattern) if pattern else None
+
+
+def reset_schedules(user_ids):
+    """Make the next alert check for these users evaluate their patterns"""
+    AlertSchedule.objects.filter(user_id__in=list(user_ids)).delete()
+
+
+def _pattern_changed(sender, instance, **kwargs):
+    reset_schedules([instance.user_id])
+
+
+post_save.connect(_pattern_changed, sender=TriggerPattern, dispatch_uid='alerts-pattern-saved')
+post_delete.connect(_pattern_changed, sender=TriggerPattern, dispatch_uid='alerts-pattern-deleted')
+post_delete.connect(_pattern_changed, sender=InsightNotification, dispatch_uid='alerts-notification-deleted')
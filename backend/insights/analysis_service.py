@@ -4,22 +4,28 @@ Analyzes mood entries, journal entries, and chat messages to detect patterns.
 Enhanced with therapeutic insights and actionable recommendations.
 """
 import os
+import re
 import json
-from datetime import datetime, timedelta
+import hashlib
+import logging
+from datetime import timedelta
 from django.utils import timezone
-from django.db.models import Avg, Count
-from collections import defaultdict
-from django.db import models
+from django.db.models import Count, Max, Sum
+from collections import Counter, defaultdict, deque
+
+from mood.models import MoodEntry
+from .pattern_engine import MoodGrid
 
 
 # Try to import Google GenAI (new package)
 try:
     from google import genai
-    from google.genai import types
     GEMINI_AVAILABLE = True
 except ImportError:
     GEMINI_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
 
 # Enhanced advice templates with therapeutic grounding
 TIME_ADVICE_TEMPLATES = {
@@ -106,6 +112,103 @@ DAY_ADVICE_TEMPLATES = {
 }
 
 
+# TriggerPattern fields set from a detected pattern
+PATTERN_FIELDS = (
+    'trigger_type', 'emotion_type', 'description', 'time_of_day', 'day_of_week',
+    'keywords', 'confidence_score', 'occurrence_count', 'custom_advice',
+    'therapeutic_note', 'all_advice', 'is_active',
+)
+
+
+TOPIC_INSTRUCTIONS = """Your task:
+1. Identify up to 3 recurring topics or themes that seem connected to negative emotions
+2. For each pattern, provide supportive, non-judgmental insights
+3. Include practical, evidence-based coping suggestions
+
+For each trigger pattern, provide:
+1. "name": A gentle, non-clinical name (e.g., "Work Pressure", "Relationship Worries", "Self-Doubt Moments")
+2. "emotion": Primary emotion type (anxiety, sadness, stress, anger, overwhelm, loneliness, shame)
+3. "keywords": Key words/phrases associated with this trigger
+4. "description": A compassionate description that normalizes the experience (2-3 sentences)
+5. "insight": A therapeutic insight about why this might be happening
+6. "coping_tips": Array of 2-3 specific, actionable coping strategies
+
+Important guidelines:
+- Be warm and validating in all descriptions
+- Avoid clinical or diagnostic language
+- Focus on patterns, not problems
+- Offer hope and agency in coping tips"""
+
+TOPIC_ITEM_FORMAT = '{"name": "...", "emotion": "...", "keywords": ["..."], "description": "...", "insight": "...", "coping_tips": ["..."]}'
+
+# Batched topic analysis: people per request and excerpt characters per request
+TOPIC_BATCH_USERS = 8
+TOPIC_BATCH_CHARS = 60000
+# Sources the AI topic step reads
+TEXT_SOURCES = ('journal', 'chat')
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_PHONE = re.compile(r'\+?\d[\d ()-]{7,}\d')
+
+
+def _anonymize(text):
+    """Mask contact details before excerpts from several people share a prompt."""
+    return _PHONE.sub('[phone]', _EMAIL.sub('[email]', text))
+
+
+def _pack(items, max_users, max_chars):
+    """Greedily group ``[(key, text), ...]`` into batches within both limits."""
+    batches, batch, size = [], [], 0
+    for key, text in items:
+        if batch and (len(batch) >= max_users or size + len(text) > max_chars):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append((key, text[:max_chars]))
+        size += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _mark_aggregates(extra):
+    aggregates = {'count': Count('id'), 'newest': Max('id')}
+    aggregates.update({f'extra{i}': expression for i, expression in enumerate(extra)})
+    return aggregates
+
+
+def _format_mark(values):
+    return ':'.join(str(values[key]) for key in sorted(values))
+
+
+def _high_water_by_user(queryset, user_field, user_ids, *extra):
+    """Cheap per-user fingerprint of a queryset: row count, newest id and extras."""
+    aggregates = _mark_aggregates(extra)
+    rows = queryset.order_by().values(user_field).annotate(**aggregates)
+    marks = {row.pop(user_field): _format_mark(row) for row in rows}
+    empty = _format_mark({key: 0 if key == 'count' else None for key in aggregates})
+    return {user_id: marks.get(user_id, empty) for user_id in user_ids}
+
+
+def forget_text_marks(marks):
+    """Drop the journal and chat marks so a failed topic step is retried next run"""
+    for source in TEXT_SOURCES:
+        marks.pop(source, None)
+
+
+def weekly_mood_marks(user_ids, since):
+    """Fingerprint of each user's mood entries since ``since``.
+
+    Changes when an entry is added, edited (newest ``updated_at``) or deleted (count).
+    """
+    user_ids = list(user_ids)
+    entries = MoodEntry.objects.filter(user_id__in=user_ids, created_at__gte=since)
+    return _high_water_by_user(entries, 'user_id', user_ids, Max('updated_at'))
+
+
+def weekly_mood_mark(user_id, since):
+    return weekly_mood_marks([user_id], since)[user_id]
+
+
 class TriggerAnalysisService:
     """Analyzes user data to detect emotional triggers and patterns"""
     
@@ -122,82 +225,189 @@ class TriggerAnalysisService:
             self.client = None
             self.model_name = None
     
-    def analyze_patterns(self, user):
-        """Main analysis function - analyzes all user data for patterns"""
-        from mood.models import MoodEntry
-        from journal.models import JournalEntry
-        from chat.models import Message
-        from .models import TriggerPattern
+    def analyze_patterns(self, user, days=30, force=False):
+        """Main analysis function - analyzes all user data for patterns
+        
+        Incremental: each source's high-water mark (count, newest row, last
+        edit) is compared with the previous run, and only sources that moved
+        are re-read. The AI topic step is skipped when the text it would be
+        sent hashes the same as last time. Merging is idempotent, so calling
+        this repeatedly with no new data reads three aggregates and writes
+        nothing.
+        """
+        thirty_days_ago = timezone.now() - timedelta(days=days)
         
-        # Get data from last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+        marks = self.source_marks([user.pk], thirty_days_ago, days)[user.pk]
+        seen = self.seen_marks([user.pk])[user.pk]
+        changed = {source for source, mark in marks.items() if force or seen.get(source) != mark}
         
-        mood_entries = MoodEntry.objects.filter(
-            user=user,
-            created_at__gte=thirty_days_ago
-        ).order_by('created_at')
+        # 1-2. Time-of-day and day-of-week patterns
+        if 'mood' in changed:
+            grid = MoodGrid.from_db([user.pk], days=days)
+            self._merge_patterns(user, self.grid_patterns(grid, user.pk), replace_type='time')
+        
+        # 3. Topic/keyword patterns (using AI if available)
+        if changed.intersection(TEXT_SOURCES):
+            text = self.topic_text_for(user.pk, thirty_days_ago)
+            text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            if text and (force or seen.get('topics') != text_hash):
+                detected = self._detect_topics(text)
+                if detected is None:
+                    forget_text_marks(marks)
+                else:
+                    self._merge_patterns(user, detected)
+                    marks['topics'] = text_hash
+        
+        self.save_marks({user.pk: {
+            source: mark for source, mark in marks.items() if seen.get(source) != mark
+        }})
+        
+        return list(user.trigger_patterns.filter(is_active=True, is_dismissed=False))
+    
+    def _text_sources(self, user_ids, since):
+        from journal.models import JournalEntry
+        from chat.models import Message
         
         journal_entries = JournalEntry.objects.filter(
-            user=user,
-            created_at__gte=thirty_days_ago
+            user_id__in=user_ids,
+            created_at__gte=since
         )
-        
         messages = Message.objects.filter(
-            conversation__user=user,
+            conversation__user_id__in=user_ids,
             role='user',
-            created_at__gte=thirty_days_ago
+            created_at__gte=since
         )
+        return journal_entries, messages
+    
+    def source_marks(self, user_ids, since, days):
+        """High-water marks of each user's mood, journal and chat data since ``since``"""
+        user_ids = list(user_ids)
+        mood_entries = MoodEntry.objects.filter(user_id__in=user_ids, created_at__gte=since)
+        by_source = {
+            # Entries ageing out of the window change the count, so they count too
+            'mood': _high_water_by_user(mood_entries, 'user_id', user_ids, Sum('mood_score')),
+        }
+        if self.client:
+            # Without AI, text sources stay unmarked so they are analyzed once it is configured
+            journal_entries, messages = self._text_sources(user_ids, since)
+            by_source['journal'] = _high_water_by_user(
+                journal_entries, 'user_id', user_ids, Max('updated_at')
+            )
+            by_source['chat'] = _high_water_by_user(messages, 'conversation__user_id', user_ids)
+        return {
+            user_id: {source: f"{days}:{marks[user_id]}" for source, marks in by_source.items()}
+            for user_id in user_ids
+        }
+    
+    def seen_marks(self, user_ids):
+        """Marks stored by the previous analysis of each user"""
+        from .models import AnalysisWatermark
         
-        patterns = []
+        seen = {user_id: {} for user_id in user_ids}
+        for user_id, source, mark in AnalysisWatermark.objects.filter(
+            user_id__in=list(user_ids)
+        ).values_list('user_id', 'source', 'mark'):
+            seen[user_id][source] = mark
+        return seen
+    
+    def save_marks(self, marks_by_user):
+        """Store changed marks, given as {user_id: {source: mark}}, in one upsert"""
+        from .models import AnalysisWatermark
         
-        # 1. Time-based pattern analysis
-        time_patterns = self._analyze_time_patterns(mood_entries)
-        patterns.extend(time_patterns)
+        rows = [
+            AnalysisWatermark(user_id=user_id, source=source, mark=mark)
+            for user_id, marks in marks_by_user.items()
+            for source, mark in marks.items()
+        ]
+        if rows:
+            AnalysisWatermark.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'source'],
+                update_fields=['mark', 'updated_at'],
+            )
+    
+    def _merge_patterns(self, user, patterns, replace_type=None):
+        """Upsert one user's detected patterns; see merge_patterns"""
+        return self.merge_patterns({user.pk: patterns}, replace_type)
+    
+    def merge_patterns(self, patterns_by_user, replace_type=None):
+        """Upsert detected patterns by name without inflating them on re-runs.
         
-        # 2. Day of week patterns
-        day_patterns = self._analyze_day_patterns(mood_entries)
-        patterns.extend(day_patterns)
+        ``patterns_by_user`` maps user ids to pattern dicts. Rule-based
+        patterns carry their own counts and confidence, which are stored
+        as-is. AI topic patterns are reinforced once per distinct input set,
+        since callers only detect topics when the input changed. With
+        ``replace_type``, that type's patterns missing from this run are
+        deactivated for the users given.
+        """
+        from .models import TriggerPattern
         
-        # 3. Topic/keyword patterns (using AI if available)
-        if self.client and (journal_entries.exists() or messages.exists()):
-            topic_patterns = self._analyze_topic_patterns(user, journal_entries, messages)
-            patterns.extend(topic_patterns)
-        
-        # Save patterns to database
-        saved_patterns = []
-        for pattern_data in patterns:
-            # Extract data that should be saved to model
-            model_data = {
-                'trigger_type': pattern_data.get('trigger_type', 'custom'),
-                'emotion_type': pattern_data.get('emotion_type', 'stress'),
-                'description': pattern_data.get('description', ''),
-                'time_of_day': pattern_data.get('time_of_day'),
-                'day_of_week': pattern_data.get('day_of_week'),
-                'keywords': pattern_data.get('keywords', []),
-                'confidence_score': pattern_data.get('confidence_score', 0.5),
-                'occurrence_count': pattern_data.get('occurrence_count', 1),
-                'custom_advice': pattern_data.get('custom_advice', ''),
-                'therapeutic_note': pattern_data.get('therapeutic_note', ''),
-                'all_advice': pattern_data.get('all_advice', []),
-            }
-            
-            pattern, created = TriggerPattern.objects.update_or_create(
-                user=user,
-                pattern_name=pattern_data['pattern_name'],
-                defaults=model_data
+        existing = {
+            (pattern.user_id, pattern.pattern_name): pattern
+            for pattern in TriggerPattern.objects.filter(user_id__in=list(patterns_by_user))
+        }
+        to_create, to_update = [], []
+        found = set()
+        for user_id, patterns in patterns_by_user.items():
+            for pattern_data in patterns:
+                key = (user_id, pattern_data['pattern_name'])
+                found.add(key)
+                # Extract data that should be saved to model
+                model_data = {
+                    'trigger_type': pattern_data.get('trigger_type', 'custom'),
+                    'emotion_type': pattern_data.get('emotion_type', 'stress'),
+                    'description': pattern_data.get('description', ''),
+                    'time_of_day': pattern_data.get('time_of_day'),
+                    'day_of_week': pattern_data.get('day_of_week'),
+                    'keywords': pattern_data.get('keywords', []),
+                    'confidence_score': pattern_data.get('confidence_score', 0.5),
+                    'occurrence_count': pattern_data.get('occurrence_count', 1),
+                    'custom_advice': pattern_data.get('custom_advice', ''),
+                    'therapeutic_note': pattern_data.get('therapeutic_note', ''),
+                    'all_advice': pattern_data.get('all_advice', []),
+                    'is_active': True,
+                }
+                pattern = existing.get(key)
+                if pattern is None:
+                    to_create.append(TriggerPattern(user_id=user_id, pattern_name=key[1], **model_data))
+                    continue
+                if model_data['trigger_type'] == 'topic':
+                    model_data['occurrence_count'] = pattern.occurrence_count + 1
+                    model_data['confidence_score'] = min(0.95, pattern.confidence_score + 0.05)
+                if any(getattr(pattern, field) != value for field, value in model_data.items()):
+                    for field, value in model_data.items():
+                        setattr(pattern, field, value)
+                    to_update.append(pattern)
+        
+        if replace_type:
+            for key, pattern in existing.items():
+                if pattern.trigger_type == replace_type and key not in found and pattern.is_active:
+                    pattern.is_active = False
+                    to_update.append(pattern)
+        
+        if to_create:
+            TriggerPattern.objects.bulk_create(to_create, batch_size=500)
+        if to_update:
+            now = timezone.now()
+            for pattern in to_update:
+                pattern.updated_at = now
+            TriggerPattern.objects.bulk_update(
+                to_update, PATTERN_FIELDS + ('updated_at',), batch_size=500
             )
-            if not created:
-                pattern.occurrence_count += 1
-                pattern.confidence_score = min(0.95, pattern.confidence_score + 0.05)
-                # Update therapeutic info if provided
-                if pattern_data.get('therapeutic_note'):
-                    pattern.therapeutic_note = pattern_data['therapeutic_note']
-                if pattern_data.get('all_advice'):
-                    pattern.all_advice = pattern_data['all_advice']
-                pattern.save()
-            saved_patterns.append(pattern)
-        
-        return saved_patterns
+        if to_create or to_update:
+            # Bulk writes skip the signals that keep alert schedules fresh
+            from .alerts import reset_schedules
+            reset_schedules({pattern.user_id for pattern in to_create + to_update})
+        return to_create + to_update
+    
+    def grid_patterns(self, grid, user_id):
+        """Time-of-day and day-of-week patterns for one user of a MoodGrid"""
+        time_slots, weekdays = grid.findings(user_id)
+        return (
+            [self._time_pattern(slot, count, avg) for slot, count, avg in time_slots] +
+            [self._day_pattern(day, count, avg) for day, count, avg in weekdays]
+        )
     
     def _analyze_time_patterns(self, mood_entries):
         """Detect time-of-day mood patterns with enhanced therapeutic insights"""
@@ -223,22 +433,26 @@ class TriggerAnalysisService:
             if len(moods) >= 3:
                 avg_mood = sum(moods) / len(moods)
                 if avg_mood <= 2.5:
-                    template = TIME_ADVICE_TEMPLATES.get(time_of_day, {})
-                    patterns.append({
-                        'trigger_type': 'time',
-                        'emotion_type': 'low_energy' if time_of_day == 'morning' else 'stress',
-                        'pattern_name': template.get('title', f'{time_of_day.title()} Pattern'),
-                        'description': template.get('insight', f'You tend to feel lower in the {time_of_day}. Average mood: {avg_mood:.1f}/5'),
-                        'time_of_day': time_of_day,
-                        'confidence_score': min(0.9, len(moods) * 0.1),
-                        'occurrence_count': len(moods),
-                        'custom_advice': template.get('advice', [self._get_time_advice(time_of_day)])[0],
-                        'therapeutic_note': template.get('therapeutic_note', ''),
-                        'all_advice': template.get('advice', []),
-                    })
+                    patterns.append(self._time_pattern(time_of_day, len(moods), avg_mood))
         
         return patterns
     
+    def _time_pattern(self, time_of_day, count, avg_mood):
+        """Pattern data for a time of day with consistently low moods"""
+        template = TIME_ADVICE_TEMPLATES.get(time_of_day, {})
+        return {
+            'trigger_type': 'time',
+            'emotion_type': 'low_energy' if time_of_day == 'morning' else 'stress',
+            'pattern_name': template.get('title', f'{time_of_day.title()} Pattern'),
+            'description': template.get('insight', f'You tend to feel lower in the {time_of_day}. Average mood: {avg_mood:.1f}/5'),
+            'time_of_day': time_of_day,
+            'confidence_score': min(0.9, count * 0.1),
+            'occurrence_count': count,
+            'custom_advice': template.get('advice', [self._get_time_advice(time_of_day)])[0],
+            'therapeutic_note': template.get('therapeutic_note', ''),
+            'all_advice': template.get('advice', []),
+        }
+    
     def _analyze_day_patterns(self, mood_entries):
         """Detect day-of-week mood patterns with enhanced therapeutic insights"""
         patterns = []
@@ -254,102 +468,182 @@ class TriggerAnalysisService:
             if len(moods) >= 2:
                 avg_mood = sum(moods) / len(moods)
                 if avg_mood <= 2.5:
-                    emotion = 'anxiety' if day == 'sunday' else 'stress'
-                    template = DAY_ADVICE_TEMPLATES.get(day, {})
-                    patterns.append({
-                        'trigger_type': 'time',
-                        'emotion_type': emotion,
-                        'pattern_name': template.get('title', f'{day.title()} Pattern'),
-                        'description': template.get('insight', f'Your mood tends to dip on {day.title()}s. Average mood: {avg_mood:.1f}/5'),
-                        'day_of_week': day,
-                        'confidence_score': min(0.85, len(moods) * 0.15),
-                        'occurrence_count': len(moods),
-                        'custom_advice': template.get('advice', [self._get_day_advice(day)])[0] if template.get('advice') else self._get_day_advice(day),
-                        'therapeutic_note': template.get('therapeutic_note', ''),
-                        'all_advice': template.get('advice', []),
-                    })
+                    patterns.append(self._day_pattern(day, len(moods), avg_mood))
         
         return patterns
     
-    def _analyze_topic_patterns(self, user, journal_entries, messages):
-        """Use AI to detect topic-based triggers with therapeutic insights"""
-        patterns = []
-        
-        # Prepare text for analysis
+    def _day_pattern(self, day, count, avg_mood):
+        """Pattern data for a weekday with consistently low moods"""
+        emotion = 'anxiety' if day == 'sunday' else 'stress'
+        template = DAY_ADVICE_TEMPLATES.get(day, {})
+        return {
+            'trigger_type': 'time',
+            'emotion_type': emotion,
+            'pattern_name': template.get('title', f'{day.title()} Pattern'),
+            'description': template.get('insight', f'Your mood tends to dip on {day.title()}s. Average mood: {avg_mood:.1f}/5'),
+            'day_of_week': day,
+            'confidence_score': min(0.85, count * 0.15),
+            'occurrence_count': count,
+            'custom_advice': template.get('advice', [self._get_day_advice(day)])[0] if template.get('advice') else self._get_day_advice(day),
+            'therapeutic_note': template.get('therapeutic_note', ''),
+            'all_advice': template.get('advice', []),
+        }
+    
+    def topic_text_for(self, user_id, since):
+        """The AI topic step's input for one user's data since ``since``"""
+        return self._topic_text(*self._text_sources([user_id], since))
+    
+    def _topic_text(self, journal_entries, messages):
+        """The journal and chat excerpts sent to the AI topic step"""
         texts = []
-        for entry in journal_entries[:10]:
+        for entry in journal_entries.only('created_at', 'content')[:10]:
             texts.append(f"Journal ({entry.created_at.date()}): {entry.content[:500]}")
         
-        for msg in messages[:20]:
+        for msg in messages.only('content')[:20]:
             texts.append(f"Chat: {msg.content[:200]}")
         
-        if not texts:
+        return "\n\n".join(texts)
+    
+    def _detect_topics(self, combined_text):
+        """Ask the AI for up to 3 topic patterns in the given text (None on failure)"""
+        patterns = []
+        if not combined_text or not self.client:
             return patterns
         
-        combined_text = "\n\n".join(texts)
-        
         try:
             prompt = f"""You are a compassionate mental health insights analyzer. Analyze these journal entries and chat messages to identify emotional patterns and triggers.
 
 {combined_text}
 
-Your task:
-1. Identify up to 3 recurring topics or themes that seem connected to negative emotions
-2. For each pattern, provide supportive, non-judgmental insights
-3. Include practical, evidence-based coping suggestions
-
-For each trigger pattern, provide:
-1. "name": A gentle, non-clinical name (e.g., "Work Pressure", "Relationship Worries", "Self-Doubt Moments")
-2. "emotion": Primary emotion type (anxiety, sadness, stress, anger, overwhelm, loneliness, shame)
-3. "keywords": Key words/phrases associated with this trigger
-4. "description": A compassionate description that normalizes the experience (2-3 sentences)
-5. "insight": A therapeutic insight about why this might be happening
-6. "coping_tips": Array of 2-3 specific, actionable coping strategies
-
-Important guidelines:
-- Be warm and validating in all descriptions
-- Avoid clinical or diagnostic language
-- Focus on patterns, not problems
-- Offer hope and agency in coping tips
+{TOPIC_INSTRUCTIONS}
 
 Respond in JSON format:
-[{{"name": "...", "emotion": "...", "keywords": ["..."], "description": "...", "insight": "...", "coping_tips": ["..."]}}]
+[{TOPIC_ITEM_FORMAT}]
 
 Only include clear patterns with evidence. Return empty array [] if no clear patterns found."""
 
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
-            response_text = response.text.strip()
-            
-            # Parse JSON from response
-            if response_text.startswith('```'):
-                response_text = response_text.split('```')[1]
-                if response_text.startswith('json'):
-                    response_text = response_text[4:]
-            
-            detected = json.loads(response_text)
-            
-            for item in detected[:3]:
-                coping_tips = item.get('coping_tips', [])
-                patterns.append({
-                    'trigger_type': 'topic',
-                    'emotion_type': item.get('emotion', 'stress'),
-                    'pattern_name': item.get('name', 'Unknown Trigger'),
-                    'description': item.get('description', 'A detected pattern in your entries'),
-                    'keywords': item.get('keywords', []),
-                    'confidence_score': 0.7,
-                    'occurrence_count': 1,
-                    'custom_advice': coping_tips[0] if coping_tips else '',
-                    'therapeutic_note': item.get('insight', ''),
-                    'all_advice': coping_tips,
-                })
-        except Exception as e:
-            print(f"AI analysis error: {e}")
+            detected = self._generate_json(prompt)
+            patterns = [self._topic_pattern(item) for item in detected[:3]]
+        except Exception:
+            logger.exception('AI topic analysis failed')
+            return None
         
         return patterns
     
+    def detect_topics_batch(self, texts, max_users=TOPIC_BATCH_USERS,
+                            max_chars=TOPIC_BATCH_CHARS, before_call=None):
+        """Topic patterns for many people with few AI calls.
+        
+        ``texts`` maps any keys (e.g. user ids) to topic_text_for() output.
+        Excerpts are anonymized and packed under per-person labels, several
+        people per request, up to ``max_users`` and ``max_chars`` of excerpts.
+        People missing from a reply, or whose part of it is malformed, are
+        retried in smaller batches, down to one per request. A request that
+        fails outright (provider error, timeout, unreadable reply) fails
+        everyone not analyzed yet without further calls, as the provider is
+        most likely down. ``before_call`` runs before each request, e.g. a
+        rate limiter.
+        
+        Returns ``(results, calls)``: results maps each key to its patterns,
+        or None if analysis failed for it.
+        """
+        results = {key: [] for key, text in texts.items() if not text}
+        pending = [(key, _anonymize(text)) for key, text in texts.items() if text]
+        if not self.client:
+            results.update((key, None) for key, _ in pending)
+            return results, 0
+        
+        calls = 0
+        batches = _pack(pending, max_users, max_chars)
+        while batches:
+            batch = batches.pop()
+            if before_call:
+                before_call()
+            calls += 1
+            replies = self._detect_topics_for(batch)
+            if replies is None:
+                results.update((key, None) for part in (batch, *batches) for key, _ in part)
+                break
+            missing = [(key, text) for key, text in batch if key not in replies]
+            results.update(replies)
+            if len(batch) == 1:
+                results.update((key, None) for key, _ in missing)
+            elif missing:
+                half = (len(missing) + 1) // 2
+                batches.extend(part for part in (missing[:half], missing[half:]) if part)
+        return results, calls
+    
+    def _detect_topics_for(self, batch):
+        """One AI request for ``[(key, text), ...]``.
+        
+        Returns patterns for the keys it could parse, or None if the request failed.
+        """
+        labels = {f"P{index}": key for index, (key, _) in enumerate(batch, 1)}
+        sections = "\n\n".join(
+            f"<<<{label}>>>\n{text}\n<<<END {label}>>>"
+            for label, (_, text) in zip(labels, batch)
+        )
+        prompt = f"""You are a compassionate mental health insights analyzer. Below are journal entries and chat messages from {len(batch)} different people, each between <<<P#>>> and <<<END P#>>> markers. Analyze each person separately; never mix content between people.
+
+{sections}
+
+For each person:
+{TOPIC_INSTRUCTIONS}
+
+Respond with one JSON object with a key for every person label, each mapping to that person's patterns:
+{{"P1": [{TOPIC_ITEM_FORMAT}], "P2": []}}
+
+Only include clear patterns with evidence. Use an empty array [] for a person with no clear patterns."""
+        
+        try:
+            detected = self._generate_json(prompt)
+        except Exception:
+            logger.exception('AI batch topic analysis failed for %d people', len(batch))
+            return None
+        if not isinstance(detected, dict):
+            return {}
+        
+        replies = {}
+        for label, key in labels.items():
+            items = detected.get(label)
+            if not isinstance(items, list):
+                continue
+            try:
+                replies[key] = [self._topic_pattern(item) for item in items[:3]]
+            except (AttributeError, TypeError, IndexError):
+                continue
+        return replies
+    
+    def _generate_json(self, prompt):
+        response = self.client.models.generate_content(
+            model=self.model_name,
+            contents=prompt
+        )
+        response_text = response.text.strip()
+        
+        # Parse JSON from response
+        if response_text.startswith('```'):
+            response_text = response_text.split('```')[1]
+            if response_text.startswith('json'):
+                response_text = response_text[4:]
+        
+        return json.loads(response_text)
+    
+    def _topic_pattern(self, item):
+        coping_tips = item.get('coping_tips', [])
+        return {
+            'trigger_type': 'topic',
+            'emotion_type': item.get('emotion', 'stress'),
+            'pattern_name': item.get('name', 'Unknown Trigger'),
+            'description': item.get('description', 'A detected pattern in your entries'),
+            'keywords': item.get('keywords', []),
+            'confidence_score': 0.7,
+            'occurrence_count': 1,
+            'custom_advice': coping_tips[0] if coping_tips else '',
+            'therapeutic_note': item.get('insight', ''),
+            'all_advice': coping_tips,
+        }
+    
     def _get_time_advice(self, time_of_day):
         """Get coping advice for time-based patterns"""
         template = TIME_ADVICE_TEMPLATES.get(time_of_day, {})
@@ -382,50 +676,178 @@ Only include clear patterns with evidence. Return empty array [] if no clear pat
         return fallback.get(day, "Be gentle with yourself on difficult days.")
     
     def get_proactive_alert(self, user):
-        """Check if user should receive a proactive notification"""
-        from .models import TriggerPattern, InsightNotification
-        
-        now = timezone.now()
-        current_hour = now.hour
-        current_day = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'][now.weekday()]
-        
-        # Determine current time of day
-        if 5 <= current_hour < 12:
-            time_of_day = 'morning'
-        elif 12 <= current_hour < 17:
-            time_of_day = 'afternoon'
-        elif 17 <= current_hour < 21:
-            time_of_day = 'evening'
-        else:
-            time_of_day = 'night'
-        
-        # Find matching active patterns
-        matching_patterns = TriggerPattern.objects.filter(
-            user=user,
-            is_active=True,
-            is_dismissed=False
-        ).filter(
-            models.Q(time_of_day=time_of_day) | 
-            models.Q(day_of_week=current_day)
-        )
+        """Check if user should receive a proactive notification (see alerts.py)"""
+        from .alerts import proactive_alert
         
-        for pattern in matching_patterns:
-            # Check if we already sent a notification recently
-            recent_notification = InsightNotification.objects.filter(
-                user=user,
-                trigger_pattern=pattern,
-                created_at__gte=now - timedelta(hours=12)
-            ).exists()
-            
-            if not recent_notification and pattern.confidence_score >= 0.5:
-                return {
-                    'pattern': pattern,
-                    'title': f"Heads up about {pattern.pattern_name}",
-                    'message': pattern.description,
-                    'advice': pattern.custom_advice,
-                }
+        return proactive_alert(user)
+
+
+MIN_SUMMARY_ENTRIES = 3
+RECENT_ENTRIES = 3
+# Weight of the newest entry in the exponentially weighted mood average
+EWMA_ALPHA = 0.5
+
+
+def mood_stats(entries):
+    """Summary statistics from one pass over ``(date, mood_score, emotions)`` rows.
+    
+    Rows must be in the order they were logged; ``emotions`` may be omitted.
+    Variance is the population variance (Welford's method), ``slope`` the
+    least-squares change in mood per day and ``ewma`` the exponentially
+    weighted average that favours recent entries.
+    """
+    count = 0
+    mean = m2 = 0.0
+    ewma = None
+    sum_x = sum_y = sum_xx = sum_xy = 0.0
+    first_date = best = worst = None
+    recent = deque(maxlen=RECENT_ENTRIES)
+    emotions = Counter()
+    
+    for row in entries:
+        day, score = row[0], row[1]
+        count += 1
+        delta = score - mean
+        mean += delta / count
+        m2 += delta * (score - mean)
+        ewma = score if ewma is None else EWMA_ALPHA * score + (1 - EWMA_ALPHA) * ewma
+        
+        if first_date is None:
+            first_date = day
+        x = (day - first_date).days
+        sum_x += x
+        sum_y += score
+        sum_xx += x * x
+        sum_xy += x * score
         
+        if best is None or score > best[1]:
+            best = (day, score)
+        if worst is None or score < worst[1]:
+            worst = (day, score)
+        recent.append(score)
+        if len(row) > 2 and row[2]:
+            emotions.update(row[2])
+    
+    if not count:
         return None
+    spread = count * sum_xx - sum_x * sum_x
+    recent_avg = sum(recent) / len(recent)
+    earlier = count - len(recent)
+    return {
+        'count': count,
+        'mean': mean,
+        'variance': m2 / count,
+        'ewma': ewma,
+        'slope': (count * sum_xy - sum_x * sum_y) / spread if spread else 0.0,
+        'best': best,
+        'worst': worst,
+        'recent_avg': recent_avg,
+        'earlier_avg': (sum_y - sum(recent)) / earlier if earlier else recent_avg,
+        'dominant_emotion': emotions.most_common(1)[0][0] if emotions else '',
+    }
 
 
-# Import models for Q lookup
+def weekly_mood_summary(entries, start_date, end_date):
+    """MoodAnalysis field values for a week of ``(date, mood_score, emotions)`` rows.
+    
+    ``entries`` must be in the order they were logged and are read once.
+    Returns None when there are too few entries to say anything useful.
+    """
+    stats = mood_stats(entries)
+    if stats is None or stats['count'] < MIN_SUMMARY_ENTRIES:
+        return None
+    
+    # Focus on RECENT progress (last 3 entries vs earlier)
+    recent_avg = stats['recent_avg']
+    earlier_avg = stats['earlier_avg']
+    
+    # Determine trend based on recent days
+    if recent_avg >= 3.5:
+        # Recent days are good! Be positive
+        if recent_avg > earlier_avg + 0.2:
+            trend = 'improving'
+            trend_message = "🌟 Great progress! Your recent days are looking brighter."
+        elif recent_avg >= earlier_avg:
+            trend = 'stable'
+            trend_message = "✨ You're doing well! Keep up the positive momentum."
+        else:
+            trend = 'stable'
+            trend_message = "💪 Staying strong! Your recent moods are in a good place."
+    elif recent_avg > earlier_avg + 0.3:
+        trend = 'improving'
+        trend_message = "📈 Things are looking up! Your recent days show improvement."
+    elif recent_avg < earlier_avg - 0.5:
+        trend = 'declining'
+        trend_message = "💙 It's been a tough few days. Remember, it's okay to not be okay."
+    else:
+        trend = 'stable'
+        trend_message = "Your mood has been fairly consistent this week."
+    
+    # Calculate trend percentage based on recent vs earlier
+    if earlier_avg > 0:
+        trend_pct = ((recent_avg - earlier_avg) / earlier_avg * 100)
+    else:
+        trend_pct = 0
+    
+    # Generate encouraging summary
+    if recent_avg >= 4:
+        summary = f"🎉 You're doing amazing! Your recent average is {recent_avg:.1f}/5. {trend_message}"
+    elif recent_avg >= 3:
+        summary = f"Your recent average mood is {recent_avg:.1f}/5. {trend_message}"
+    else:
+        summary = f"Your recent average is {recent_avg:.1f}/5. {trend_message} Small steps count!"
+    
+    # Generate smart recommendations
+    recommendations = []
+    if trend == 'improving':
+        recommendations = [
+            "Keep doing what you're doing - it's working! 🌟",
+            "Consider journaling about what's been helping",
+            "Celebrate your progress, even small wins matter",
+        ]
+    elif recent_avg >= 3.5:
+        recommendations = [
+            "You're in a good place! Maintain your self-care routine",
+            "Try to identify what's contributing to your positive mood",
+            "Share your good vibes with someone you care about",
+        ]
+    else:
+        recommendations = [
+            "Try one small act of self-care today",
+            "Reach out to someone you trust",
+            "Remember: difficult days are temporary",
+        ]
+    
+    # Generate highlights
+    highlights = []
+    if trend == 'improving':
+        highlights.append(f"📈 Mood improved by {abs(trend_pct):.0f}% recently!")
+    
+    if recent_avg >= 4:
+        highlights.append("⭐ Your recent moods are excellent!")
+    elif recent_avg >= 3:
+        highlights.append("💚 You're doing okay - that's worth celebrating")
+    
+    highlights.append(f"📊 Logged {stats['count']} mood entries this week")
+    
+    # Best day
+    best_date, best_score = stats['best']
+    highlights.append(f"🌟 Best day: {best_date.strftime('%A')} ({best_score}/5)")
+    
+    return {
+        'period_type': 'weekly',
+        'start_date': start_date,
+        'end_date': end_date,
+        'average_mood': round(recent_avg, 2),  # Use recent average for display
+        'mood_variance': round(stats['variance'], 3),
+        'dominant_emotion': stats['dominant_emotion'],
+        'trend_direction': trend,
+        'trend_percentage': round(trend_pct, 1),
+        'trend_slope': round(stats['slope'], 3),
+        'ewma_mood': round(stats['ewma'], 2),
+        'best_day': best_date,
+        'worst_day': stats['worst'][0],
+        'summary': summary,
+        'highlights': highlights,
+        'recommendations': recommendations,
+    }
@@ -0,0 +1,113 @@
+"""
+Online mood anomaly detection.
+
+Every saved MoodEntry is folded into the user's MoodBaseline, an
+exponentially weighted mean and variance over their daily scores, with O(1)
+work and one locked row per save. Before folding, the new score is compared
+with the baseline: a score well below it creates a ``mood_dip``
+notification and one well above it a ``positive_trend`` notification, at
+most one per day, pushed to the user's insights socket on commit.
+
+Baselines only move forward. Editing an older day or deleting an entry does
+not rescan history; the weighting lets such drift fade out.
+"""
+import math
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from mood.models import MoodEntry
+from .dispatcher import push
+from .models import InsightNotification, MoodBaseline
+
+# Weight of the newest day in the running mean and variance
+BASELINE_ALPHA = 0.2
+# Days of history before anything is flagged
+MIN_BASELINE_DAYS = 5
+# A score must differ by this many standard deviations and mood points
+DEVIATION_Z = 2.0
+MIN_DEVIATION = 1.5
+MIN_STD = 0.5
+
+
+def fold(mean, variance, count, score):
+    """Baseline after adding one day's ``score``"""
+    if not count:
+        return float(score), 0.0, 1
+    diff = score - mean
+    increment = BASELINE_ALPHA * diff
+    return mean + increment, (1 - BASELINE_ALPHA) * (variance + diff * increment), count + 1
+
+
+def deviation(mean, variance, count, score):
+    """-1 for a dip, 1 for a spike and 0 for an ordinary score"""
+    if count < MIN_BASELINE_DAYS:
+        return 0
+    threshold = max(DEVIATION_Z * max(math.sqrt(variance), MIN_STD), MIN_DEVIATION)
+    if score <= mean - threshold:
+        return -1
+    if score >= mean + threshold:
+        return 1
+    return 0
+
+
+def observe(user_id, day, score):
+    """Fold a day's score into the user's baseline; returns a notification or None"""
+    with transaction.atomic():
+        baseline, _ = MoodBaseline.objects.select_for_update().get_or_create(user_id=user_id)
+        if baseline.last_date is not None and day < baseline.last_date:
+            return None
+        if day == baseline.last_date:
+            # Replace today's score rather than counting the day twice
+            baseline.mean, baseline.variance = baseline.prev_mean, baseline.prev_variance
+            baseline.count -= 1
+
+        direction = deviation(baseline.mean, baseline.variance, baseline.count, score)
+        baseline.prev_mean, baseline.prev_variance = baseline.mean, baseline.variance
+        baseline.mean, baseline.variance, baseline.count = fold(
+            baseline.mean, baseline.variance, baseline.count, score
+        )
+        baseline.last_date = day
+
+        notification = None
+        if direction and baseline.last_flagged != day:
+            baseline.last_flagged = day
+            notification = InsightNotification.objects.create(
+                user_id=user_id, sent_at=timezone.now(),
+                **_notification_fields(direction, score, baseline.prev_mean)
+            )
+        baseline.save()
+
+    if notification is not None:
+        transaction.on_commit(lambda: push([notification]))
+    return notification
+
+
+def _notification_fields(direction, score, usual):
+    data = {'mood_score': score, 'usual_mood': round(usual, 1)}
+    if direction < 0:
+        return {
+            'notification_type': 'mood_dip',
+            'title': "Checking in on you",
+            'message': (
+                "Today seems harder than usual for you. That's okay - "
+                "would a short breathing exercise or a chat help?"
+            ),
+            'action_type': 'coping',
+            'action_data': data,
+        }
+    return {
+        'notification_type': 'positive_trend',
+        'title': "What a bright day!",
+        'message': "Your mood is well above your usual today. What helped? Jotting it down can help on harder days.",
+        'action_type': 'journal',
+        'action_data': data,
+    }
+
+
+def _entry_saved(sender, instance, **kwargs):
+    observe(instance.user_id, instance.date, instance.mood_score)
+
+
+post_save.connect(_entry_saved, sender=MoodEntry, dispatch_uid='insights-mood-anomaly')
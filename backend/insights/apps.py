@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InsightsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'insights'
+
+    def ready(self):
+        # Connects the alert schedule and mood anomaly receivers
+        from . import alerts, anomaly  # noqa: F401
@@ -0,0 +1,263 @@
+"""
+Batch insights pipeline: precompute trigger patterns and weekly summaries
+for every user so the Insights page only reads stored results.
+
+Users are streamed in primary key chunks. For each chunk the main process
+reads high-water marks and the raw mood rows with a handful of queries, then
+hands plain lists to a worker process that buckets them with MoodGrid and
+builds the weekly MoodAnalysis summary. While workers compute, the main
+process prepares the next chunks and runs the AI topic step for users whose
+journal or chat text changed, packing several users into each rate-limited
+request. Each chunk's results are written with bulk_create/bulk_update in one
+transaction together with the run's checkpoint, so an interrupted run resumes
+after the last finished chunk.
+
+Weekly summaries carry the mood watermark they were built from, so a summary
+is rebuilt once an entry of the week is logged, edited or deleted, and the
+Insights page serves it as is otherwise. Users whose AI topic request failed
+keep their old journal and chat marks and are retried on the next run.
+"""
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.utils import timezone
+
+from mood.models import MoodEntry
+from .analysis_service import (
+    TEXT_SOURCES, TOPIC_BATCH_USERS, TriggerAnalysisService, forget_text_marks, weekly_mood_marks,
+    weekly_mood_summary,
+)
+from .models import InsightRun, MoodAnalysis
+from .pattern_engine import MoodGrid
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class RateLimiter:
+    """Space out calls to at most ``per_minute`` a minute (0 = unlimited)."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self.next_at = 0.0
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def _init_worker():
+    # Needed when workers are spawned rather than forked
+    django.setup()
+
+
+def compute_chunk(user_ids, mood_rows, week_rows, week):
+    """Worker: grid patterns and weekly summaries for one chunk.
+
+    ``user_ids`` are the users whose mood data changed and ``mood_rows`` is
+    their MoodGrid.load() output. ``week_rows`` maps the users that need a
+    summary to ``(date, mood_score, emotions)`` rows and ``week`` is the
+    summary's ``(start_date, end_date)``. Returns ``(patterns_by_user,
+    summaries_by_user)`` with summaries as MoodAnalysis field dicts.
+    """
+    service = TriggerAnalysisService()
+    grid = MoodGrid.from_arrays(user_ids, *mood_rows)
+    patterns = {user_id: service.grid_patterns(grid, user_id) for user_id in user_ids}
+    summaries = {}
+    for user_id, entries in week_rows.items():
+        summary = weekly_mood_summary(entries, *week)
+        if summary is not None:
+            summaries[user_id] = summary
+    return patterns, summaries
+
+
+class InsightsBatchService:
+    """Runs the nightly insights pipeline over all active users"""
+
+    def __init__(self, days=30, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                 ai=True, ai_per_minute=30, ai_batch_size=TOPIC_BATCH_USERS, force=False, log=None):
+        self.days = days
+        self.chunk_size = chunk_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.force = force
+        self.log = log or (lambda message: None)
+        self.analysis = TriggerAnalysisService()
+        if not ai:
+            self.analysis.client = None
+        self.limiter = RateLimiter(ai_per_minute)
+        self.ai_batch_size = ai_batch_size
+
+    def checkpoint(self, restart=False):
+        """Today's unfinished run to resume, or a new one"""
+        today = timezone.localdate()
+        run = None
+        if not restart:
+            run = InsightRun.objects.filter(run_date=today, status='running').first()
+        if run is None:
+            run = InsightRun.objects.create(run_date=today)
+        return run
+
+    def run(self, run):
+        """Process every active user after ``run.last_user_id``"""
+        self.now = timezone.now()
+        self.since = self.now - timedelta(days=self.days)
+        self.week_start = self.now - timedelta(days=7)
+        self.week = (self.week_start.date(), timezone.localdate(self.now))
+
+        if self.workers:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker) as pool:
+                self._pipeline(run, pool.submit, depth=self.workers * 2)
+        else:
+            self._pipeline(run, _Inline, depth=1)
+
+        run.status = 'finished'
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'finished_at', 'updated_at'])
+        return run
+
+    def _pipeline(self, run, submit, depth):
+        in_flight = deque()
+        for chunk in self._chunks(run.last_user_id):
+            prepared = self._prepare(chunk)
+            future = submit(
+                compute_chunk, prepared['mood_changed'], prepared['mood_rows'], prepared['week_rows'], self.week
+            )
+            in_flight.append((prepared, future))
+            if len(in_flight) >= depth:
+                self._finish(run, *in_flight.popleft())
+        while in_flight:
+            self._finish(run, *in_flight.popleft())
+
+    def _chunks(self, after):
+        users = get_user_model().objects.filter(is_active=True).order_by('pk')
+        while True:
+            chunk = list(users.filter(pk__gt=after).values_list('pk', flat=True)[:self.chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            after = chunk[-1]
+
+    def _prepare(self, user_ids):
+        marks = self.analysis.source_marks(user_ids, self.since, self.days)
+        seen = self.analysis.seen_marks(user_ids)
+        changed = {
+            user_id: {
+                source for source, mark in marks[user_id].items()
+                if self.force or seen[user_id].get(source) != mark
+            }
+            for user_id in user_ids
+        }
+        mood_changed = [user_id for user_id in user_ids if 'mood' in changed[user_id]]
+
+        week_marks = weekly_mood_marks(user_ids, self.week_start)
+        stored = {
+            user_id: (pk, mark) for user_id, pk, mark in MoodAnalysis.objects.filter(
+                user_id__in=user_ids, period_type='weekly', end_date=self.week[1]
+            ).values_list('user_id', 'pk', 'source_mark')
+        }
+        # Summaries built from an older watermark are rebuilt in place
+        stale = {user_id: pk for user_id, (pk, mark) in stored.items() if mark != week_marks[user_id]}
+        week_rows = {}
+        for user_id, day, score, emotions in MoodEntry.objects.filter(
+            user_id__in=[user_id for user_id in user_ids if user_id not in stored or user_id in stale],
+            created_at__gte=self.week_start,
+        ).order_by('user_id', 'created_at').values_list('user_id', 'date', 'mood_score', 'emotions'):
+            week_rows.setdefault(user_id, []).append((day, score, emotions))
+
+        return {
+            'user_ids': user_ids,
+            'marks': marks,
+            'seen': seen,
+            'text_changed': [
+                user_id for user_id in user_ids if changed[user_id].intersection(TEXT_SOURCES)
+            ],
+            'mood_changed': mood_changed,
+            'mood_rows': MoodGrid.load(mood_changed, self.days, self.now) if mood_changed else ([], [], []),
+            'week_rows': week_rows,
+            'week_marks': week_marks,
+            'stale_summaries': stale,
+        }
+
+    def _topics(self, prepared):
+        """Batched, rate-limited AI topic step for users whose text changed"""
+        texts, hashes = {}, {}
+        for user_id in prepared['text_changed']:
+            text = self.analysis.topic_text_for(user_id, self.since)
+            text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            if not text or (not self.force and prepared['seen'][user_id].get('topics') == text_hash):
+                continue
+            texts[user_id], hashes[user_id] = text, text_hash
+        if not texts:
+            return {}, 0
+
+        results, calls = self.analysis.detect_topics_batch(
+            texts, max_users=self.ai_batch_size, before_call=self.limiter.wait
+        )
+        topics = {}
+        for user_id in texts:
+            detected = results.get(user_id)
+            if detected is None:
+                forget_text_marks(prepared['marks'][user_id])
+            else:
+                topics[user_id] = detected
+                prepared['marks'][user_id]['topics'] = hashes[user_id]
+        return topics, calls
+
+    def _finish(self, run, prepared, future):
+        topics, calls = self._topics(prepared)
+        patterns, summaries = future.result()
+
+        with transaction.atomic():
+            written = len(self.analysis.merge_patterns(patterns, replace_type='time'))
+            written += len(self.analysis.merge_patterns(topics))
+            created, refreshed = [], []
+            for user_id, summary in summaries.items():
+                analysis = MoodAnalysis(user_id=user_id, source_mark=prepared['week_marks'][user_id], **summary)
+                if user_id in prepared['stale_summaries']:
+                    analysis.pk = prepared['stale_summaries'][user_id]
+                    analysis.created_at = self.now
+                    refreshed.append(analysis)
+                else:
+                    created.append(analysis)
+            MoodAnalysis.objects.bulk_create(created, batch_size=500)
+            if refreshed:
+                MoodAnalysis.objects.bulk_update(
+                    refreshed, [*summaries[refreshed[0].user_id], 'source_mark', 'created_at'], batch_size=500
+                )
+            self.analysis.save_marks({
+                user_id: {
+                    source: mark for source, mark in prepared['marks'][user_id].items()
+                    if prepared['seen'][user_id].get(source) != mark
+                }
+                for user_id in prepared['user_ids']
+            })
+
+            run.last_user_id = prepared['user_ids'][-1]
+            run.users_processed += len(prepared['user_ids'])
+            run.patterns_written += written
+            run.summaries_written += len(summaries)
+            run.ai_calls += calls
+            run.save()
+
+        self.log(run)
+
+
+class _Inline:
+    """Future-alike that computes in-process (workers=0)."""
+
+    def __init__(self, fn, *args):
+        self._result = fn(*args)
+
+    def result(self):
+        return self._result
@@ -0,0 +1,28 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from .dispatcher import notification_group
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """Delivers proactive insight notifications as the dispatcher sends them."""
+    
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+        
+        self.group_name = notification_group(self.user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+    
+    async def disconnect(self, close_code):
+        if not self.user or not self.user.is_authenticated:
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    
+    async def insight_notification(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'insight_notification',
+            'notification': event['notification'],
+        }))
@@ -0,0 +1,130 @@
+"""
+Scheduled delivery of proactive alerts over WebSocket.
+
+Instead of waiting for the app to poll ProactiveAlertView, the dispatcher
+keeps every user with alertable patterns in a heap ordered by the moment
+their next trigger window opens (see alerts.evaluate). Each tick pops the
+users that are due, re-reads their patterns in one query, creates the
+notifications with one bulk_create and pushes them to the user's
+``insights_<id>`` group, where NotificationConsumer forwards them to open
+sockets. Popping and re-queueing a user is O(log n).
+
+Pattern edits can move a window earlier, so the heap is rebuilt from the
+database every ``reload_every`` seconds by the dispatch_alerts command. Due
+users are always re-evaluated from fresh rows, so a queued time that is too
+early only costs a query, and alerts fired through ProactiveAlertView count
+towards the cooldown.
+
+Pushing to sockets held by the ASGI workers needs a channel layer shared
+between processes; with the in-memory layer notifications are still stored
+and show up in the notifications list.
+"""
+import heapq
+from itertools import groupby
+from operator import attrgetter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+from .alerts import alert_for, candidate_patterns, evaluate, notification_for, save_schedules
+from .models import InsightNotification
+from .serializers import InsightNotificationSerializer
+
+PRIORITY = ('user_id', '-confidence_score', '-occurrence_count')
+
+
+def notification_group(user_id):
+    return f'insights_{user_id}'
+
+
+def _by_user(patterns):
+    for user_id, group in groupby(patterns, key=attrgetter('user_id')):
+        yield user_id, list(group)
+
+
+class AlertDispatcher:
+    """Heap of ``(next_alert_at, user_id)`` with lazily dropped stale entries."""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self._heap = []
+        self._queued = {}
+
+    def __len__(self):
+        return len(self._queued)
+
+    def load(self, now=None):
+        """Rebuild the queue from every user's candidate patterns"""
+        now = now or timezone.now()
+        self._heap, self._queued = [], {}
+        patterns = candidate_patterns().order_by(*PRIORITY).iterator(chunk_size=self.batch_size)
+        for user_id, user_patterns in _by_user(patterns):
+            alert, next_alert_at = evaluate(user_patterns, now)
+            self._queued[user_id] = now if alert else next_alert_at
+        self._heap = [(moment, user_id) for user_id, moment in self._queued.items()]
+        heapq.heapify(self._heap)
+
+    def schedule(self, user_id, moment):
+        self._queued[user_id] = moment
+        heapq.heappush(self._heap, (moment, user_id))
+
+    def next_due(self):
+        """When the earliest queued window opens, or None if nothing is queued"""
+        while self._heap and self._queued.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now, limit=None):
+        """Take up to ``limit`` users whose window has opened off the queue"""
+        user_ids = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(user_ids) < limit):
+            moment, user_id = heapq.heappop(self._heap)
+            if self._queued.get(user_id) == moment:
+                del self._queued[user_id]
+                user_ids.append(user_id)
+        return user_ids
+
+    def dispatch(self, now=None):
+        """Create and push the alerts that are due; returns the notifications"""
+        now = now or timezone.now()
+        sent, requeue = [], {}
+        while True:
+            user_ids = self.pop_due(now, self.batch_size)
+            if not user_ids:
+                break
+            sent.extend(self._dispatch_users(user_ids, now, requeue))
+        # Re-queued only now, so nobody gets two alerts in one tick
+        for user_id, moment in requeue.items():
+            self.schedule(user_id, moment)
+        return sent
+
+    def _dispatch_users(self, user_ids, now, requeue):
+        patterns = candidate_patterns(user_id__in=user_ids).order_by(*PRIORITY)
+        found = dict(_by_user(patterns))
+        notifications, next_alerts = [], {}
+        for user_id in user_ids:
+            pattern, next_alerts[user_id] = evaluate(found.get(user_id, []), now)
+            if pattern is not None:
+                notifications.append(notification_for(user_id, alert_for(pattern), now))
+
+        with transaction.atomic():
+            notifications = InsightNotification.objects.bulk_create(notifications)
+            save_schedules(next_alerts)
+        requeue.update((user_id, next_alerts[user_id]) for user_id in found)
+        push(notifications)
+        return notifications
+
+
+def push(notifications):
+    """Send notifications to their users' open sockets"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not notifications:
+        return
+    send = async_to_sync(channel_layer.group_send)
+    for notification in notifications:
+        send(notification_group(notification.user_id), {
+            'type': 'insight_notification',
+            'notification': dict(InsightNotificationSerializer(notification).data),
+        })
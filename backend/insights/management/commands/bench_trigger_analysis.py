@@ -0,0 +1,122 @@
+"""
+Benchmark the NumPy pattern engine against per-entry trigger analysis.
+
+Seeds synthetic mood histories in a throwaway test database, then times the
+original path (iterate MoodEntry instances per user, bucket with if-chains)
+against MoodGrid (one values_list query, vectorized bucketing) for each
+window, and checks both find the same patterns.
+
+    python manage.py bench_trigger_analysis --users 500 --windows 30 90 365
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from games.management.commands.loadtest_ws import QueryCounter
+from insights.analysis_service import TriggerAnalysisService
+from insights.pattern_engine import MoodGrid
+from mood.models import MoodEntry
+
+User = get_user_model()
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk_create keep the created_at/date values we generate."""
+    fields = [MoodEntry._meta.get_field(name) for name in ('created_at', 'date')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Compare vectorized trigger-pattern analysis with the per-entry implementation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300)
+        parser.add_argument('--fill', type=float, default=0.7, help='Share of days with a mood entry')
+        parser.add_argument('--windows', type=int, nargs='+', default=[30, 90, 365])
+        parser.add_argument('--seed', type=int, default=11)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user_ids = self._seed(random.Random(options['seed']), options)
+            for days in options['windows']:
+                self._compare(user_ids, days)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _seed(self, rng, options):
+        User.objects.bulk_create(
+            [User(username=f'ta-{i}', email=f'ta-{i}@bench.local', password='!') for i in range(options['users'])],
+            batch_size=1000,
+        )
+        users = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        now = timezone.now()
+        entries = []
+        for user_id in users:
+            # Each user gets a bad time of day and a bad weekday to find
+            bad_hour, bad_day = rng.choice([7, 14, 19, 23]), rng.randrange(7)
+            for offset in range(max(options['windows'])):
+                if rng.random() > options['fill']:
+                    continue
+                moment = now - timedelta(days=offset, hours=rng.randrange(24))
+                low = moment.hour == bad_hour or moment.weekday() == bad_day
+                entries.append(MoodEntry(
+                    user_id=user_id,
+                    mood_score=rng.choice([1, 2, 2, 3]) if low else rng.choice([3, 4, 4, 5]),
+                    created_at=moment,
+                    date=moment.date(),
+                ))
+        with explicit_timestamps():
+            MoodEntry.objects.bulk_create(entries, batch_size=5000, ignore_conflicts=True)
+        self.stdout.write(f'Seeded {len(users)} users, {MoodEntry.objects.count()} mood entries')
+        return users
+
+    def _compare(self, user_ids, days):
+        service = TriggerAnalysisService()
+        since = timezone.now() - timedelta(days=days)
+
+        legacy = {}
+        legacy_queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(legacy_queries):
+            for user_id in user_ids:
+                entries = MoodEntry.objects.filter(user_id=user_id, created_at__gte=since).order_by('created_at')
+                legacy[user_id] = (
+                    service._analyze_time_patterns(entries) + service._analyze_day_patterns(entries)
+                )
+        legacy_seconds = time.perf_counter() - started
+
+        engine_queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(engine_queries):
+            grid = MoodGrid.from_db(user_ids, days=days)
+            vectorized = {user_id: service.grid_patterns(grid, user_id) for user_id in user_ids}
+        engine_seconds = time.perf_counter() - started
+
+        mismatches = sum(
+            1 for user_id in user_ids
+            if _signature(legacy[user_id]) != _signature(vectorized[user_id])
+        )
+        found = sum(len(patterns) for patterns in vectorized.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{days}-day window'))
+        self.stdout.write(f'  per-entry:   {legacy_seconds * 1000:8.1f}ms  {legacy_queries.count} queries')
+        self.stdout.write(f'  vectorized:  {engine_seconds * 1000:8.1f}ms  {engine_queries.count} queries  '
+                          f'({legacy_seconds / max(engine_seconds, 1e-9):.1f}x)')
+        self.stdout.write(f'  patterns:    {found}  mismatched users: {mismatches}')
+
+
+def _signature(patterns):
+    return sorted((p['pattern_name'], p['occurrence_count'], p['description']) for p in patterns)
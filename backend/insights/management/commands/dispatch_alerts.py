@@ -0,0 +1,55 @@
+"""
+Push proactive trigger alerts to users as their trigger windows open.
+
+Run once from cron, or keep it running as a small scheduler process:
+
+    python manage.py dispatch_alerts --every 30
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from insights.dispatcher import AlertDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Create and push proactive alerts whose trigger window has opened.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Keep running, checking at least every N seconds, instead of running once'
+        )
+        parser.add_argument(
+            '--reload-every', type=int, default=900,
+            help='Rebuild the queue from the database every N seconds to pick up pattern changes'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        dispatcher = AlertDispatcher(batch_size=options['batch_size'])
+        loaded_at = None
+        while True:
+            if loaded_at is None or time.monotonic() - loaded_at >= options['reload_every']:
+                dispatcher.load()
+                loaded_at = time.monotonic()
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Queued {len(dispatcher)} user(s).')
+
+            sent = dispatcher.dispatch()
+            if sent or options['verbosity'] > 1:
+                self.stdout.write(f'Sent {len(sent)} alert(s).')
+            if not options['every']:
+                break
+            time.sleep(self._pause(dispatcher, options['every']))
+            close_old_connections()
+
+    def _pause(self, dispatcher, every):
+        """Sleep until the next window opens, checking at least every ``every`` seconds"""
+        next_due = dispatcher.next_due()
+        if next_due is None:
+            return every
+        wait = (next_due - timezone.now()).total_seconds()
+        return min(every, max(wait, 1))
@@ -0,0 +1,58 @@
+"""
+Precompute trigger patterns and weekly mood summaries for all users.
+
+Meant to run nightly from cron. Re-running on the same day resumes the
+unfinished run from its last checkpoint; users whose data did not change
+since the previous run are skipped.
+
+    python manage.py run_insights                   # resume or start today's run
+    python manage.py run_insights --restart --workers 8
+    python manage.py run_insights --no-ai --workers 0
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from insights.analysis_service import TOPIC_BATCH_USERS
+from insights.batch_service import DEFAULT_CHUNK_SIZE, InsightsBatchService
+
+
+class Command(BaseCommand):
+    help = 'Batch-compute insights for every user with a process pool and checkpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Trigger analysis window')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count, 0 = in-process)')
+        parser.add_argument('--no-ai', action='store_true', help='Skip the AI topic step')
+        parser.add_argument('--ai-per-minute', type=int, default=30, help='AI request budget (0 = unlimited)')
+        parser.add_argument('--ai-batch-size', type=int, default=TOPIC_BATCH_USERS,
+                            help='Users per AI request (1 = one request per user)')
+        parser.add_argument('--force', action='store_true', help='Recompute users whose data did not change')
+        parser.add_argument('--restart', action='store_true', help="Start over instead of resuming today's run")
+
+    def handle(self, *args, **options):
+        service = InsightsBatchService(
+            days=options['days'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            ai=not options['no_ai'],
+            ai_per_minute=options['ai_per_minute'],
+            ai_batch_size=options['ai_batch_size'],
+            force=options['force'],
+            log=self._progress if options['verbosity'] > 1 else None,
+        )
+        run = service.checkpoint(restart=options['restart'])
+        if run.last_user_id:
+            self.stdout.write(f'Resuming run {run.pk} after user {run.last_user_id}')
+
+        started = time.perf_counter()
+        run = service.run(run)
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {run.users_processed} user(s) in {time.perf_counter() - started:.1f}s: '
+            f'{run.patterns_written} pattern(s) written, {run.summaries_written} summary(ies), '
+            f'{run.ai_calls} AI call(s).'
+        ))
+
+    def _progress(self, run):
+        self.stdout.write(f'  up to user {run.last_user_id}: {run.users_processed} processed')
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('insights', '0002_add_therapeutic_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('mood', 'Mood entries'), ('journal', 'Journal entries'), ('chat', 'Chat messages'), ('topics', 'AI topic input hash')], max_length=10)),
+                ('mark', models.CharField(max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_watermarks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'source')},
+            },
+        ),
+    ]
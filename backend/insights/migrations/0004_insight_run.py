@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insights', '0003_analysis_watermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField()),
+                ('status', models.CharField(choices=[('running', 'Running'), ('finished', 'Finished')], default='running', max_length=10)),
+                ('last_user_id', models.IntegerField(default=0)),
+                ('users_processed', models.IntegerField(default=0)),
+                ('patterns_written', models.IntegerField(default=0)),
+                ('summaries_written', models.IntegerField(default=0)),
+                ('ai_calls', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('insights', '0004_insight_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_alert_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='alert_schedule', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insights', '0005_alert_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moodanalysis',
+            name='best_day',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='moodanalysis',
+            name='ewma_mood',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='moodanalysis',
+            name='trend_slope',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moodanalysis',
+            name='worst_day',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('insights', '0006_mood_analysis_trend_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='insightnotification',
+            name='notification_type',
+            field=models.CharField(choices=[('trigger_alert', 'Trigger Alert'), ('pattern_detected', 'New Pattern'), ('positive_trend', 'Positive Trend'), ('streak_reminder', 'Streak Reminder'), ('coping_suggestion', 'Coping Tip'), ('mood_dip', 'Mood Dip')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='MoodBaseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('variance', models.FloatField(default=0)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('prev_mean', models.FloatField(default=0)),
+                ('prev_variance', models.FloatField(default=0)),
+                ('last_flagged', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mood_baseline', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
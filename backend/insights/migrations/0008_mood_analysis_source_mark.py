@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insights', '0007_mood_baseline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moodanalysis',
+            name='source_mark',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
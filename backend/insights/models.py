@@ -76,6 +76,7 @@ class InsightNotification(models.Model):
         ('positive_trend', 'Positive Trend'),    # "Your mood has improved!"
         ('streak_reminder', 'Streak Reminder'),  # "Don't break your streak!"
         ('coping_suggestion', 'Coping Tip'),     # "Try breathing exercise"
+        ('mood_dip', 'Mood Dip'),                # "Today looks harder than usual"
     ]
     
     user = models.ForeignKey(
@@ -141,6 +142,10 @@ class MoodAnalysis(models.Model):
     # Trends
     trend_direction = models.CharField(max_length=20)  # improving, stable, declining
     trend_percentage = models.FloatField(default=0)
+    trend_slope = models.FloatField(default=0)  # Mood points per day (least squares)
+    ewma_mood = models.FloatField(null=True, blank=True)  # Recency-weighted average
+    best_day = models.DateField(null=True, blank=True)
+    worst_day = models.DateField(null=True, blank=True)
     
     # AI-generated insights
     summary = models.TextField()
@@ -150,6 +155,9 @@ class MoodAnalysis(models.Model):
     # Triggers detected in this period
     detected_triggers = models.JSONField(default=list)
     
+    # Mood entry watermark the analysis was built from (see weekly_mood_marks)
+    source_mark = models.CharField(max_length=100, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -158,3 +166,95 @@ class MoodAnalysis(models.Model):
     class Meta:
         ordering = ['-start_date']
         verbose_name_plural = 'Mood Analyses'
+
+
+class AnalysisWatermark(models.Model):
+    """What trigger analysis last saw of each data source, per user"""
+    SOURCES = [
+        ('mood', 'Mood entries'),
+        ('journal', 'Journal entries'),
+        ('chat', 'Chat messages'),
+        ('topics', 'AI topic input hash'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='analysis_watermarks'
+    )
+    source = models.CharField(max_length=10, choices=SOURCES)
+    mark = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} {self.source}: {self.mark}"
+    
+    class Meta:
+        unique_together = ['user', 'source']
+
+
+class InsightRun(models.Model):
+    """Checkpoint of a batch insights run (see the run_insights command)"""
+    STATUSES = [
+        ('running', 'Running'),
+        ('finished', 'Finished'),
+    ]
+    
+    run_date = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUSES, default='running')
+    
+    # Users are processed in primary key order; everything up to here is done
+    last_user_id = models.IntegerField(default=0)
+    users_processed = models.IntegerField(default=0)
+    patterns_written = models.IntegerField(default=0)
+    summaries_written = models.IntegerField(default=0)
+    ai_calls = models.IntegerField(default=0)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Insights run {self.run_date} ({self.status}, up to user {self.last_user_id})"
+    
+    class Meta:
+        ordering = ['-started_at']
+
+
+class AlertSchedule(models.Model):
+    """Earliest time a user could next get a proactive alert (see alerts.py)"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='alert_schedule'
+    )
+    next_alert_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} next alert at {self.next_alert_at}"
+
+
+class MoodBaseline(models.Model):
+    """Running mood statistics per user for anomaly detection (see anomaly.py)"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='mood_baseline'
+    )
+    # Exponentially weighted mean and variance over daily entries
+    count = models.IntegerField(default=0)
+    mean = models.FloatField(default=0)
+    variance = models.FloatField(default=0)
+    
+    # The latest day folded in, and the state before it, so a same-day
+    # update replaces that day's score instead of counting it twice
+    last_date = models.DateField(null=True, blank=True)
+    prev_mean = models.FloatField(default=0)
+    prev_variance = models.FloatField(default=0)
+    last_flagged = models.DateField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} mood baseline {self.mean:.2f} ({self.count} days)"
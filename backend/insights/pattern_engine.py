@@ -0,0 +1,141 @@
+"""
+Vectorized time-of-day x weekday mood statistics.
+
+Pulls only (user_id, created_at, mood_score) for a window, buckets every
+entry into a user x time-of-day x weekday grid with NumPy and derives counts,
+means and variances per time of day and per weekday without touching model
+instances. One grid can hold any number of users, so batch runs over all
+users cost one query and a handful of array operations.
+
+Buckets use the UTC hour and weekday of created_at, matching
+TriggerAnalysisService's per-entry analysis.
+"""
+from datetime import timedelta
+from functools import cached_property
+
+import numpy as np
+from django.utils import timezone
+
+TIME_SLOTS = ('morning', 'afternoon', 'evening', 'night')
+DAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# Hour of day -> index into TIME_SLOTS
+HOUR_TO_SLOT = np.array([3] * 5 + [0] * 7 + [1] * 5 + [2] * 4 + [3] * 3, dtype=np.intp)
+
+LOW_MOOD = 2.5
+MIN_SLOT_ENTRIES = 3
+MIN_DAY_ENTRIES = 2
+
+# 1970-01-01 was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+class MoodGrid:
+    """Per-user mood count, sum and sum of squares by time slot and weekday."""
+
+    def __init__(self, user_ids, counts, sums, squares):
+        self.user_ids = np.asarray(user_ids)
+        self.counts = counts
+        self.sums = sums
+        self.squares = squares
+        self._rows = {int(user_id): row for row, user_id in enumerate(self.user_ids)}
+
+    @classmethod
+    def from_db(cls, user_ids=None, days=30, now=None):
+        """Load the last ``days`` of mood entries for ``user_ids`` (or everyone)."""
+        owners, timestamps, scores = cls.load(user_ids, days, now)
+        return cls.from_arrays([] if user_ids is None and not owners else user_ids, owners, timestamps, scores)
+
+    @staticmethod
+    def load(user_ids=None, days=30, now=None):
+        """(owners, epoch seconds, scores) of the window, ready for from_arrays.
+
+        Plain lists, so they can be shipped to worker processes cheaply.
+        """
+        from mood.models import MoodEntry
+
+        since = (now or timezone.now()) - timedelta(days=days)
+        entries = MoodEntry.objects.filter(created_at__gte=since)
+        if user_ids is not None:
+            entries = entries.filter(user_id__in=list(user_ids))
+        rows = entries.order_by().values_list('user_id', 'created_at', 'mood_score')
+        owners, timestamps, scores = [], [], []
+        for owner, created, score in rows:
+            owners.append(owner)
+            timestamps.append(created.timestamp())
+            scores.append(score)
+        return owners, timestamps, scores
+
+    @classmethod
+    def from_arrays(cls, user_ids, entry_user_ids, timestamps, scores):
+        """Bucket entries given as parallel sequences of owner, epoch seconds and score."""
+        entry_user_ids = np.asarray(entry_user_ids, dtype=np.int64)
+        if user_ids is None:
+            user_ids, rows = np.unique(entry_user_ids, return_inverse=True)
+        else:
+            user_ids = np.asarray(sorted(set(user_ids)), dtype=np.int64)
+            rows = np.searchsorted(user_ids, entry_user_ids)
+
+        shape = (len(user_ids), len(TIME_SLOTS), len(DAY_NAMES))
+        counts = np.zeros(shape, dtype=np.int64)
+        sums = np.zeros(shape, dtype=np.float64)
+        squares = np.zeros(shape, dtype=np.float64)
+        if len(entry_user_ids):
+            seconds = np.asarray(timestamps, dtype=np.float64).astype(np.int64)
+            days_since_epoch = np.floor_divide(seconds, 86400)
+            slots = HOUR_TO_SLOT[np.floor_divide(seconds % 86400, 3600)]
+            weekdays = (days_since_epoch + _EPOCH_WEEKDAY) % 7
+            values = np.asarray(scores, dtype=np.float64)
+            index = (rows, slots, weekdays)
+            np.add.at(counts, index, 1)
+            np.add.at(sums, index, values)
+            np.add.at(squares, index, values * values)
+        return cls(user_ids, counts, sums, squares)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @cached_property
+    def by_time_of_day(self):
+        """(counts, means, variances), each shaped users x TIME_SLOTS."""
+        return _stats(self.counts.sum(axis=2), self.sums.sum(axis=2), self.squares.sum(axis=2))
+
+    @cached_property
+    def by_weekday(self):
+        """(counts, means, variances), each shaped users x DAY_NAMES."""
+        return _stats(self.counts.sum(axis=1), self.sums.sum(axis=1), self.squares.sum(axis=1))
+
+    @cached_property
+    def low_slots(self):
+        """Boolean masks of (time slots, weekdays) with consistently low moods."""
+        slot_counts, slot_means, _ = self.by_time_of_day
+        day_counts, day_means, _ = self.by_weekday
+        return (
+            (slot_counts >= MIN_SLOT_ENTRIES) & (slot_means <= LOW_MOOD),
+            (day_counts >= MIN_DAY_ENTRIES) & (day_means <= LOW_MOOD),
+        )
+
+    def findings(self, user_id):
+        """Low-mood time slots and weekdays for one user.
+
+        Returns ``(time_slots, weekdays)`` as lists of ``(name, count, mean)``.
+        """
+        row = self._rows.get(int(user_id))
+        if row is None:
+            return [], []
+        slot_counts, slot_means, _ = self.by_time_of_day
+        day_counts, day_means, _ = self.by_weekday
+        low_slots, low_days = self.low_slots
+        return (
+            [(TIME_SLOTS[i], int(slot_counts[row, i]), float(slot_means[row, i]))
+             for i in np.flatnonzero(low_slots[row])],
+            [(DAY_NAMES[i], int(day_counts[row, i]), float(day_means[row, i]))
+             for i in np.flatnonzero(low_days[row])],
+        )
+
+
+def _stats(counts, sums, squares):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+        variances = np.where(counts > 0, squares / counts - means * means, np.nan)
+    return counts, means, np.maximum(variances, 0, where=counts > 0, out=variances)
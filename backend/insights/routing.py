@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import NotificationConsumer
+
+websocket_urlpatterns = [
+    path('ws/insights/', NotificationConsumer.as_asgi()),
+]
@@ -43,7 +43,7 @@ class MoodAnalysisSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'period_type', 'start_date', 'end_date',
             'average_mood', 'mood_variance', 'dominant_emotion',
-            'trend_direction', 'trend_percentage',
-            'summary', 'highlights', 'recommendations',
+            'trend_direction', 'trend_percentage', 'trend_slope', 'ewma_mood',
+            'best_day', 'worst_day', 'summary', 'highlights', 'recommendations',
             'detected_triggers', 'created_at'
         ]
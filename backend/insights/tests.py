@@ -1,3 +1,561 @@
-from django.test import TestCase
+import json
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from rest_framework.test import APIClient
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dost.querystats import fingerprint, record
+from dost.testing import QueryBudgetMixin
+from journal.models import JournalEntry
+from mood.models import MoodEntry
+
+from .alerts import proactive_alert
+from .anomaly import observe
+from .dispatcher import AlertDispatcher, notification_group
+from .analysis_service import TriggerAnalysisService, mood_stats, weekly_mood_summary
+from .batch_service import InsightsBatchService
+from .models import (
+    AlertSchedule, AnalysisWatermark, InsightNotification, InsightRun, MoodAnalysis, MoodBaseline,
+    TriggerPattern,
+)
+from .pattern_engine import MoodGrid
+
+
+class MoodGridTests(SimpleTestCase):
+    def setUp(self):
+        # Two users; user 1 has low Monday mornings, user 2 is fine
+        monday_8am = datetime(2024, 1, 1, 8, tzinfo=dt_timezone.utc)
+        self.entries = [
+            (1, monday_8am + timedelta(weeks=week), score)
+            for week, score in enumerate([1, 2, 2, 3])
+        ] + [
+            (2, monday_8am + timedelta(days=day, hours=6), 4)
+            for day in range(10)
+        ]
+
+    def grid(self):
+        owners, moments, scores = zip(*self.entries)
+        return MoodGrid.from_arrays(None, owners, [m.timestamp() for m in moments], scores)
+
+    def test_buckets_by_time_of_day_and_weekday(self):
+        grid = self.grid()
+        counts, means, variances = grid.by_time_of_day
+        self.assertEqual(counts[0].tolist(), [4, 0, 0, 0])
+        self.assertAlmostEqual(means[0, 0], 2.0)
+        self.assertAlmostEqual(variances[0, 0], 0.5)
+        self.assertEqual(grid.findings(1), ([('morning', 4, 2.0)], [('monday', 4, 2.0)]))
+        self.assertEqual(grid.findings(2), ([], []))
+
+    def test_matches_per_entry_analysis(self):
+        service = TriggerAnalysisService()
+        grid = self.grid()
+        for user_id in (1, 2):
+            entries = [
+                SimpleNamespace(created_at=moment, mood_score=score)
+                for owner, moment, score in self.entries if owner == user_id
+            ]
+            legacy = service._analyze_time_patterns(entries) + service._analyze_day_patterns(entries)
+            self.assertEqual(service.grid_patterns(grid, user_id), legacy)
+
+
+def log_low_moods(user, weeks=4):
+    """Low moods logged at the same hour and weekday, one per week"""
+    moment = timezone.now() - timedelta(hours=1)
+    for week in range(weeks):
+        entry = MoodEntry.objects.create(user=user, mood_score=1)
+        MoodEntry.objects.filter(pk=entry.pk).update(
+            created_at=moment - timedelta(weeks=week),
+            date=moment.date() - timedelta(days=week + 1),
+        )
+
+
+class IncrementalAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('ia', 'ia@example.com', 'pw')
+        log_low_moods(self.user)
+        JournalEntry.objects.create(user=self.user, title='Work', content='Deadlines again')
+
+        self.service = TriggerAnalysisService()
+        self.service.client = object()
+        self.topics = [{
+            'trigger_type': 'topic', 'pattern_name': 'Work Pressure',
+            'emotion_type': 'stress', 'confidence_score': 0.7, 'occurrence_count': 1,
+        }]
+
+    def analyze(self, **kwargs):
+        with mock.patch.object(self.service, '_detect_topics', return_value=self.topics) as detect:
+            patterns = self.service.analyze_patterns(self.user, **kwargs)
+        return patterns, detect.call_count
+
+    def test_rerun_without_new_data_reads_marks_only(self):
+        patterns, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        snapshot = list(TriggerPattern.objects.values_list('pattern_name', 'occurrence_count', 'confidence_score'))
+
+        with CaptureQueriesContext(connection) as queries:
+            again, calls = self.analyze()
+        self.assertEqual(calls, 0)
+        self.assertEqual({p.pk for p in again}, {p.pk for p in patterns})
+        self.assertFalse([q for q in queries.captured_queries if not q['sql'].startswith('SELECT')])
+        self.assertEqual(
+            list(TriggerPattern.objects.values_list('pattern_name', 'occurrence_count', 'confidence_score')),
+            snapshot,
+        )
+
+    def test_unchanged_topic_text_skips_ai(self):
+        self.analyze()
+        # A new chat-free, journal-free change: only the edit timestamp moves
+        JournalEntry.objects.filter(user=self.user).update(updated_at=timezone.now() + timedelta(minutes=1))
+        _, calls = self.analyze()
+        self.assertEqual(calls, 0)
+
+        JournalEntry.objects.create(user=self.user, title='Work', content='Still deadlines')
+        _, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        topic = TriggerPattern.objects.get(pattern_name='Work Pressure')
+        self.assertEqual(topic.occurrence_count, 2)
+
+    def test_failed_topic_step_is_retried(self):
+        with mock.patch.object(self.service, '_detect_topics', return_value=None) as detect:
+            self.service.analyze_patterns(self.user)
+        self.assertEqual(detect.call_count, 1)
+        self.assertFalse(TriggerPattern.objects.filter(trigger_type='topic').exists())
+
+        # No new text, but the provider is back
+        _, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        self.assertTrue(TriggerPattern.objects.filter(pattern_name='Work Pressure').exists())
+        _, calls = self.analyze()
+        self.assertEqual(calls, 0)
+
+    def test_time_patterns_are_not_inflated(self):
+        self.analyze()
+        self.analyze(force=True)
+        counts = set(
+            TriggerPattern.objects.filter(trigger_type='time').values_list('occurrence_count', flat=True)
+        )
+        self.assertEqual(counts, {4})
+
+
+class BatchInsightsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(f'bi{i}', f'bi{i}@example.com', 'pw') for i in range(3)]
+        for user in self.users[:2]:
+            log_low_moods(user)
+        # Three entries this week for a summary
+        for day in range(3):
+            entry = MoodEntry.objects.create(user=self.users[2], mood_score=4)
+            MoodEntry.objects.filter(pk=entry.pk).update(date=timezone.now().date() - timedelta(days=day + 1))
+
+    def run_batch(self, **kwargs):
+        service = InsightsBatchService(workers=0, ai=False, chunk_size=2, **kwargs)
+        return service.run(service.checkpoint(restart=kwargs.get('force', False)))
+
+    def test_precomputes_patterns_and_summaries(self):
+        run = self.run_batch()
+        self.assertEqual(run.status, 'finished')
+        self.assertEqual(run.users_processed, 3)
+        self.assertEqual(run.last_user_id, self.users[-1].pk)
+        expected = TriggerAnalysisService().analyze_patterns(self.users[0], force=True)
+        self.assertEqual(
+            set(TriggerPattern.objects.filter(user=self.users[1]).values_list('pattern_name', 'occurrence_count')),
+            {(p.pattern_name, p.occurrence_count) for p in expected},
+        )
+        self.assertEqual(MoodAnalysis.objects.filter(user=self.users[2]).count(), 1)
+
+        again = self.run_batch(force=True)
+        self.assertEqual((again.patterns_written, again.summaries_written), (0, 0))
+
+    def test_resumes_after_checkpoint(self):
+        InsightRun.objects.create(run_date=timezone.localdate(), last_user_id=self.users[0].pk)
+        run = self.run_batch()
+        self.assertEqual(run.users_processed, 2)
+        self.assertFalse(TriggerPattern.objects.filter(user=self.users[0]).exists())
+
+    def test_summaries_are_served_until_an_entry_changes(self):
+        self.run_batch()
+        summary = MoodAnalysis.objects.get(user=self.users[2])
+        client = APIClient()
+        client.force_authenticate(self.users[2])
+        with self.assertNumQueries(2):
+            served = client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual((served['id'], served['average_mood']), (summary.pk, 4.0))
+
+        entry = MoodEntry.objects.filter(user=self.users[2]).first()
+        entry.mood_score = 1
+        entry.save()
+        run = self.run_batch()
+        self.assertEqual(run.summaries_written, 1)
+        refreshed = MoodAnalysis.objects.get(user=self.users[2])
+        self.assertEqual((refreshed.pk, refreshed.average_mood), (summary.pk, 3.0))
+
+    def test_failed_topic_requests_are_retried_next_run(self):
+        JournalEntry.objects.create(user=self.users[0], title='Work', content='Deadlines again')
+
+        def run_with(reply):
+            service = InsightsBatchService(workers=0, chunk_size=2, ai_per_minute=0)
+            service.analysis.client, service.analysis.model_name = FakeGemini(reply), 'test'
+            return service.run(service.checkpoint())
+
+        def provider_down(labels, prompt):
+            raise RuntimeError('provider down')
+
+        with self.assertLogs('insights.analysis_service', 'ERROR'):
+            self.assertEqual(run_with(provider_down).ai_calls, 1)
+        self.assertFalse(AnalysisWatermark.objects.filter(user=self.users[0], source='journal').exists())
+        self.assertTrue(AnalysisWatermark.objects.filter(user=self.users[1], source='journal').exists())
+
+        run = run_with(lambda labels, prompt: {label: [{'name': 'Work Pressure'}] for label in labels})
+        self.assertEqual(run.ai_calls, 1)
+        self.assertTrue(TriggerPattern.objects.filter(user=self.users[0], pattern_name='Work Pressure').exists())
+        self.assertTrue(AnalysisWatermark.objects.filter(user=self.users[0], source='journal').exists())
+
+
+class FakeGemini:
+    """Stands in for the genai client; answers batched prompts from a script."""
+
+    def __init__(self, reply):
+        self.models = self
+        self.reply = reply
+        self.prompts = []
+
+    def generate_content(self, model, contents):
+        self.prompts.append(contents)
+        labels = re.findall(r'<<<(P\d+)>>>', contents)
+        return SimpleNamespace(text=json.dumps(self.reply(labels, contents)))
+
+
+class BatchedTopicTests(SimpleTestCase):
+    def service(self, reply):
+        service = TriggerAnalysisService()
+        service.client, service.model_name = FakeGemini(reply), 'test'
+        return service
+
+    def test_packs_people_and_maps_replies_back(self):
+        def reply(labels, prompt):
+            return {
+                label: [{'name': prompt.split(f'<<<{label}>>>\n')[1].split('\n')[0]}]
+                for label in labels
+            }
+        service = self.service(reply)
+        texts = {user_id: f'text of {user_id}' for user_id in range(5)}
+        texts[5] = ''
+        results, calls = service.detect_topics_batch(texts, max_users=2)
+        self.assertEqual(calls, 3)
+        self.assertEqual(results[5], [])
+        for user_id in range(5):
+            self.assertEqual(results[user_id][0]['pattern_name'], f'text of {user_id}')
+
+    def test_context_budget_splits_batches(self):
+        service = self.service(lambda labels, prompt: {label: [] for label in labels})
+        _, calls = service.detect_topics_batch({1: 'a' * 60, 2: 'b' * 60, 3: 'c' * 60}, max_chars=100)
+        self.assertEqual(calls, 3)
+
+    def test_retries_people_missing_from_reply(self):
+        # The first reply drops P2; it gets a request of its own
+        service = self.service(lambda labels, prompt: {labels[0]: []})
+        results, calls = service.detect_topics_batch({1: 'one', 2: 'two'})
+        self.assertEqual(results, {1: [], 2: []})
+        self.assertEqual(calls, 2)
+
+    def test_failed_requests_mark_people_failed(self):
+        def reply(labels, prompt):
+            raise RuntimeError('provider down')
+        with self.assertLogs('insights.analysis_service', 'ERROR'):
+            results, calls = self.service(reply).detect_topics_batch(
+                {1: 'one', 2: 'two', 3: 'three', 4: 'four'}, max_users=2
+            )
+        self.assertEqual(results, {1: None, 2: None, 3: None, 4: None})
+        self.assertEqual(calls, 1)
+
+    def test_malformed_entries_are_retried_alone(self):
+        # P1's patterns are not a list; only P1 is asked again
+        def reply(labels, prompt):
+            return {label: 'oops' if label == 'P1' and len(labels) > 1 else [] for label in labels}
+        results, calls = self.service(reply).detect_topics_batch({1: 'one', 2: 'two'})
+        self.assertEqual(results, {1: [], 2: []})
+        self.assertEqual(calls, 2)
+
+    def test_excerpts_are_anonymized(self):
+        service = self.service(lambda labels, prompt: {label: [] for label in labels})
+        service.detect_topics_batch({1: 'mail me at sam@example.com or +1 (555) 123-4567'})
+        prompt = service.client.prompts[0]
+        self.assertNotIn('sam@example.com', prompt)
+        self.assertNotIn('555', prompt)
+
+
+class ProactiveAlertTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('pa', 'pa@example.com', 'pw')
+        # Monday 8am: a morning pattern and a Sunday pattern
+        self.now = datetime(2024, 1, 1, 8, tzinfo=dt_timezone.utc)
+        self.morning = TriggerPattern.objects.create(
+            user=self.user, trigger_type='time', emotion_type='stress', pattern_name='Morning Blues',
+            description='Mornings are hard', time_of_day='morning', confidence_score=0.8,
+        )
+        TriggerPattern.objects.create(
+            user=self.user, trigger_type='time', emotion_type='anxiety', pattern_name='Sunday Scaries',
+            description='Sundays are hard', day_of_week='sunday', confidence_score=0.6,
+        )
+
+    def alert(self, now):
+        alert = proactive_alert(self.user, now=now)
+        if alert:
+            notification = InsightNotification.objects.create(
+                user=self.user, trigger_pattern=alert['pattern'], notification_type='trigger_alert',
+                title=alert['title'], message=alert['message'],
+            )
+            InsightNotification.objects.filter(pk=notification.pk).update(created_at=now)
+        return alert
+
+    def test_alerts_once_then_waits_for_next_match(self):
+        self.assertEqual(self.alert(self.now)['pattern'], self.morning)
+        # Next chance: tomorrow morning, once the cooldown is over
+        self.assertEqual(
+            AlertSchedule.objects.get(user=self.user).next_alert_at,
+            datetime(2024, 1, 2, 5, tzinfo=dt_timezone.utc),
+        )
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.alert(self.now + timedelta(hours=3)))
+        # Tuesday morning, past the cooldown
+        tuesday = datetime(2024, 1, 2, 6, tzinfo=dt_timezone.utc)
+        self.assertEqual(self.alert(tuesday)['pattern'], self.morning)
+
+    def test_matching_pattern_query_is_constant(self):
+        for index in range(5):
+            TriggerPattern.objects.create(
+                user=self.user, trigger_type='topic', emotion_type='stress', pattern_name=f'Topic {index}',
+                description='', confidence_score=0.7,
+            )
+        with self.assertNumQueries(3):
+            self.alert(self.now - timedelta(hours=4))
+
+    def test_pattern_changes_reset_schedule(self):
+        self.alert(self.now)
+        self.morning.is_dismissed = True
+        self.morning.save()
+        self.assertFalse(AlertSchedule.objects.filter(user=self.user).exists())
+
+        self.assertIsNone(self.alert(self.now))
+        TriggerAnalysisService().merge_patterns({self.user.pk: [{
+            'trigger_type': 'time', 'pattern_name': 'Evening Worries', 'time_of_day': 'evening',
+            'confidence_score': 0.7,
+        }]})
+        self.assertFalse(AlertSchedule.objects.filter(user=self.user).exists())
+        self.alert(self.now)
+        evening = datetime(2024, 1, 1, 17, tzinfo=dt_timezone.utc)
+        self.assertEqual(AlertSchedule.objects.get(user=self.user).next_alert_at, evening)
+        self.assertEqual(self.alert(evening)['pattern'].pattern_name, 'Evening Worries')
+
+
+class AlertDispatcherTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.morning_user = User.objects.create_user('ad1', 'ad1@example.com', 'pw')
+        self.sunday_user = User.objects.create_user('ad2', 'ad2@example.com', 'pw')
+        self.now = datetime(2024, 1, 1, 8, tzinfo=dt_timezone.utc)
+        TriggerPattern.objects.create(
+            user=self.morning_user, trigger_type='time', emotion_type='stress', pattern_name='Morning Blues',
+            description='Mornings are hard', time_of_day='morning', confidence_score=0.8,
+        )
+        TriggerPattern.objects.create(
+            user=self.sunday_user, trigger_type='time', emotion_type='anxiety', pattern_name='Sunday Scaries',
+            description='Sundays are hard', day_of_week='sunday', confidence_score=0.6,
+        )
+        self.dispatcher = AlertDispatcher()
+        self.dispatcher.load(self.now)
+
+    def test_pushes_due_alerts_and_requeues(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(notification_group(self.morning_user.pk), channel)
+
+        sent = self.dispatcher.dispatch(self.now)
+        self.assertEqual([n.user_id for n in sent], [self.morning_user.pk])
+        message = async_to_sync(layer.receive)(channel)
+        self.assertEqual(message['type'], 'insight_notification')
+        self.assertEqual(message['notification']['title'], 'Heads up about Morning Blues')
+
+        self.assertEqual(self.dispatcher.dispatch(self.now + timedelta(hours=1)), [])
+        self.assertEqual(self.dispatcher.next_due(), datetime(2024, 1, 2, 5, tzinfo=dt_timezone.utc))
+        # The endpoint sees the alert as already delivered
+        self.assertIsNone(proactive_alert(self.morning_user, now=self.now + timedelta(hours=1)))
+
+    def test_dispatches_each_window_once(self):
+        sunday_morning = datetime(2024, 1, 7, 6, tzinfo=dt_timezone.utc)
+        sent = self.dispatcher.dispatch(sunday_morning)
+        self.assertEqual({n.user_id for n in sent}, {self.morning_user.pk, self.sunday_user.pk})
+        self.assertEqual(self.dispatcher.dispatch(sunday_morning), [])
+        self.assertEqual(InsightNotification.objects.count(), 2)
+
+
+class MoodSummaryTests(SimpleTestCase):
+    def setUp(self):
+        start = datetime(2024, 1, 1).date()
+        self.rows = [
+            (start + timedelta(days=day), score, emotions)
+            for day, score, emotions in [
+                (0, 2, ['sad']), (1, 3, ['tired', 'sad']), (2, 3, []), (4, 4, ['calm']), (5, 5, ['sad']),
+            ]
+        ]
+
+    def test_single_pass_statistics(self):
+        stats = mood_stats(iter(self.rows))
+        self.assertAlmostEqual(stats['mean'], 3.4)
+        self.assertAlmostEqual(stats['variance'], 1.04)
+        self.assertAlmostEqual(stats['ewma'], 4.1875)
+        # Least squares over day offsets 0, 1, 2, 4, 5
+        self.assertAlmostEqual(stats['slope'], 46 / 86)
+        self.assertEqual(stats['best'], (self.rows[4][0], 5))
+        self.assertEqual(stats['worst'], (self.rows[0][0], 2))
+        self.assertEqual(stats['dominant_emotion'], 'sad')
+        self.assertAlmostEqual(stats['earlier_avg'], 2.5)
+
+    def test_summary_fills_variance_and_trend_fields(self):
+        summary = weekly_mood_summary(iter(self.rows), self.rows[0][0], self.rows[-1][0])
+        self.assertEqual(summary['average_mood'], 4.0)
+        self.assertEqual(summary['trend_direction'], 'improving')
+        self.assertEqual(summary['mood_variance'], 1.04)
+        self.assertEqual(summary['dominant_emotion'], 'sad')
+        self.assertEqual(summary['best_day'], self.rows[4][0])
+        self.assertIsNone(weekly_mood_summary(self.rows[:2], None, None))
+
+
+class GenerateMoodAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('gm', 'gm@example.com', 'pw')
+        for day in range(3):
+            self.log_mood(day + 1, 3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def log_mood(self, days_ago, score):
+        entry = MoodEntry.objects.create(user=self.user, mood_score=score, emotions=['calm'])
+        MoodEntry.objects.filter(pk=entry.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago, hours=1),
+            date=timezone.now().date() - timedelta(days=days_ago),
+        )
+
+    def test_repeat_calls_return_stored_analysis(self):
+        first = self.client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual(first['dominant_emotion'], 'calm')
+        # Mood watermark and the stored analysis
+        with self.assertNumQueries(2):
+            again = self.client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual(again['id'], first['id'])
+
+        MoodEntry.objects.create(user=self.user, mood_score=5)
+        updated = self.client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual(updated['id'], first['id'])
+        self.assertEqual(MoodAnalysis.objects.filter(user=self.user).count(), 1)
+        self.assertIn('4 mood entries', ' '.join(updated['highlights']))
+
+    def test_editing_or_deleting_today_refreshes_the_analysis(self):
+        entry = self.client.post('/api/mood/entries/', {'mood_score': 1}, format='json').json()
+        first = self.client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual(first['average_mood'], 2.33)
+
+        # Logging again today updates the same row in place
+        self.client.post('/api/mood/entries/', {'mood_score': 5}, format='json')
+        self.assertEqual(MoodEntry.objects.filter(user=self.user).count(), 4)
+        edited = self.client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual(edited['average_mood'], 3.67)
+
+        self.client.delete(f"/api/mood/entries/{entry['id']}/")
+        deleted = self.client.post('/api/insights/analysis/generate/').json()
+        self.assertEqual(deleted['average_mood'], 3.0)
+        self.assertEqual(deleted['id'], first['id'])
+
+
+class MoodAnomalyTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('ma', 'ma@example.com', 'pw')
+        self.start = datetime(2024, 1, 1).date()
+        for day, score in enumerate([4, 4, 3, 4, 4, 4]):
+            self.assertIsNone(observe(self.user.pk, self.start + timedelta(days=day), score))
+        self.next_day = self.start + timedelta(days=6)
+
+    def test_flags_a_dip_once_per_day(self):
+        # Savepoint, locked read, notification insert, baseline update, release
+        with self.assertNumQueries(5):
+            notification = observe(self.user.pk, self.next_day, 1)
+        self.assertEqual(notification.notification_type, 'mood_dip')
+        self.assertEqual(notification.action_data['usual_mood'], 3.9)
+        self.assertIsNone(observe(self.user.pk, self.next_day, 1))
+        self.assertEqual(InsightNotification.objects.filter(user=self.user).count(), 1)
+
+    def test_same_day_update_replaces_the_score(self):
+        observe(self.user.pk, self.next_day, 2)
+        before = MoodBaseline.objects.values_list('mean', 'variance', 'count').get(user=self.user)
+        observe(self.user.pk, self.next_day, 5)
+        observe(self.user.pk, self.next_day, 2)
+        after = MoodBaseline.objects.values_list('mean', 'variance', 'count').get(user=self.user)
+        self.assertEqual(before, after)
+        self.assertEqual(after[2], 7)
+
+    def test_ordinary_days_and_old_edits_are_ignored(self):
+        self.assertIsNone(observe(self.user.pk, self.next_day, 3))
+        self.assertIsNone(observe(self.user.pk, self.start, 1))
+        self.assertEqual(MoodBaseline.objects.get(user=self.user).last_date, self.next_day)
+
+    def test_mood_entry_saves_update_the_baseline(self):
+        other = get_user_model().objects.create_user('mb', 'mb@example.com', 'pw')
+        MoodEntry.objects.create(user=other, mood_score=3)
+        baseline = MoodBaseline.objects.get(user=other)
+        self.assertEqual((baseline.count, baseline.mean), (1, 3.0))
+
+
+class QueryStatsTests(TestCase):
+    def test_fingerprint_collapses_literals_and_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = \'it\'\'s\'  LIMIT 21'),
+            'SELECT * FROM "t" WHERE "id" IN (...) AND "name" = ? LIMIT ?',
+        )
+        self.assertEqual(fingerprint('SELECT 1 WHERE x IN (%s)'), fingerprint('SELECT 2 WHERE x IN (%s, %s)'))
+
+    def test_repeated_queries_are_grouped(self):
+        user = get_user_model().objects.create_user('qs', 'qs@example.com', 'pw')
+        with record() as stats:
+            for index in range(3):
+                TriggerPattern.objects.filter(user=user, pattern_name=f'Pattern {index}').exists()
+            InsightNotification.objects.filter(user=user).count()
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.repeated, 2)
+        self.assertEqual(stats.duplicates()[0][1], 3)
+        self.assertIn('desc="4 queries"', stats.server_timing())
+
+
+class InsightsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        # Page count and one joined select, however many notifications
+        '/api/insights/notifications/': 2,
+        '/api/insights/patterns/': 2,
+        # Schedule lookup only while the next window is in the future
+        '/api/insights/proactive-alert/': 1,
+    }
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('qb', 'qb@example.com', 'pw')
+        for index in range(5):
+            pattern = TriggerPattern.objects.create(
+                user=self.user, trigger_type='topic', emotion_type='stress', pattern_name=f'Topic {index}',
+                description='', confidence_score=0.7,
+            )
+            InsightNotification.objects.create(
+                user=self.user, trigger_pattern=pattern, notification_type='trigger_alert',
+                title=f'Heads up {index}', message='',
+            )
+        AlertSchedule.objects.create(user=self.user, next_alert_at=timezone.now() + timedelta(hours=6))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
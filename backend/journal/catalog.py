@@ -0,0 +1,6 @@
+"""Cached catalog of active journal prompts, grouped by category."""
+from dost.catalog import ModelCatalog
+
+from .models import JournalPrompt
+
+prompt_catalog = ModelCatalog(JournalPrompt, group_by='category', filters={'is_active': True})
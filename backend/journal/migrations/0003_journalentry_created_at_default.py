@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='journalentry',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
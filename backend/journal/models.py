@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class JournalEntry(models.Model):
@@ -36,7 +37,7 @@ class JournalEntry(models.Model):
     # Privacy
     is_private = models.BooleanField(default=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)  # Not auto_now_add, so imports keep it
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
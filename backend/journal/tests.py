@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dost.testing import QueryBudgetMixin
+from .models import JournalEntry
+
+User = get_user_model()
+
+
+class JournalQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = {
+        # One narrow read, however long the streak
+        '/api/journal/stats/': 1,
+        '/api/journal/entries/': 2,
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', email='writer@example.com', password='x')
+        now = timezone.now()
+        for days_ago in (0, 1, 2, 3, 5):
+            JournalEntry.objects.create(
+                user=self.user, content='Wrote things', tags=['work'] if days_ago else ['work', 'sleep'],
+                created_at=now - timedelta(days=days_ago),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_stats(self):
+        stats = self.client.get('/api/journal/stats/').json()
+        self.assertEqual(stats['total_entries'], 5)
+        self.assertEqual(stats['tag_frequency'], {'work': 5, 'sleep': 1})
+        self.assertEqual(stats['writing_streak'], 4)
@@ -1,9 +1,11 @@
-from rest_framework import generics, status
+from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Q
 import random
-from .models import JournalEntry, JournalPrompt
+from dost import events
+from .models import JournalEntry
+from .catalog import prompt_catalog
 from .serializers import JournalEntrySerializer, JournalEntryListSerializer, JournalPromptSerializer
 from chat.ai_service import detect_emotion
 
@@ -33,8 +35,15 @@ class JournalEntryListCreateView(generics.ListCreateAPIView):
         
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['pet'] = self.activity_event.results.get('pet')
+        return response
+    
     def perform_create(self, serializer):
-        entry = serializer.save(user=self.request.user)
+        with events.batch():
+            entry = serializer.save(user=self.request.user)
+            self.activity_event = events.emit(self.request.user, 'journal', 'Wrote journal entry')
         
         # Generate AI reflection if enabled
         if entry.ai_reflection_enabled:
@@ -83,12 +92,8 @@ class JournalPromptView(APIView):
     def get(self, request):
         category = request.query_params.get('category')
         
-        prompts = JournalPrompt.objects.filter(is_active=True)
-        if category:
-            prompts = prompts.filter(category=category)
-        
-        if prompts.exists():
-            prompt = random.choice(list(prompts))
+        prompt = prompt_catalog.choice(keys=[category] if category else None)
+        if prompt:
             return Response(JournalPromptSerializer(prompt).data)
         
         # Fallback prompts if none in database
@@ -109,27 +114,28 @@ class JournalStatsView(APIView):
     """Get journal statistics."""
     
     def get(self, request):
-        entries = JournalEntry.objects.filter(user=request.user)
-        
-        total_entries = entries.count()
-        
-        # Tag frequency
-        all_tags = []
-        for entry in entries:
-            all_tags.extend(entry.tags)
-        
         from collections import Counter
-        tag_frequency = dict(Counter(all_tags).most_common(10))
-        
-        # Writing streak
         from django.utils import timezone
         from datetime import timedelta
         
+        # One pass over two narrow columns for the count, tags and writing days
+        rows = JournalEntry.objects.filter(user=request.user).order_by().values_list('tags', 'created_at')
+        total_entries = 0
+        tags = Counter()
+        days = set()
+        for entry_tags, created_at in rows.iterator():
+            total_entries += 1
+            tags.update(entry_tags or [])
+            days.add(timezone.localdate(created_at))
+        
+        tag_frequency = dict(tags.most_common(10))
+        
+        # Writing streak
         today = timezone.now().date()
         streak = 0
         current_date = today
         
-        while entries.filter(created_at__date=current_date).exists():
+        while current_date in days:
             streak += 1
             current_date -= timedelta(days=1)
         
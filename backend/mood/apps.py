@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MoodConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mood'
+
+    def ready(self):
+        # Connects the heatmap cache invalidation signals
+        from . import heatmap  # noqa: F401
@@ -0,0 +1,102 @@
+"""
+Year-in-pixels heatmaps for mood, journaling and coping activity.
+
+Each metric of a year is 366 bytes, one per day from January 1st (the last
+byte stays 0 outside leap years): the mood score 1-5 for mood, and the
+number of entries or completed exercises, capped at 255, for journal and
+coping. Responses carry them base64-encoded, so a year costs about 1.5 KB
+for all three metrics instead of a list of JSON objects.
+
+Missing years are built with one date-range query per metric and cached per
+user and year. Saving or deleting a mood entry, journal entry or coping
+usage drops that user's cached year (bulk writers call invalidate()). The
+signal only clears the cache of the process that handled the write, so, as
+with the catalogs, a short TTL bounds staleness in other workers.
+"""
+import base64
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from coping.models import CopingToolUsage
+from journal.models import JournalEntry
+from .models import MoodEntry
+
+DAYS = 366
+METRICS = ('mood', 'journal', 'coping')
+CACHE_TTL = 300
+
+
+def cache_key(user_id, year):
+    return f'heatmap:{user_id}:{year}'
+
+
+def _daily_counts(queryset, first, last):
+    return (
+        queryset.filter(created_at__date__gte=first, created_at__date__lte=last)
+        .annotate(day=TruncDate('created_at'))
+        .order_by()
+        .values('day')
+        .annotate(count=Count('id'))
+        .values_list('day', 'count')
+    )
+
+
+def _metric_rows(user_id, first, last):
+    """``{metric: [(date, value), ...]}`` for a date range, one query each"""
+    return {
+        'mood': MoodEntry.objects.filter(
+            user_id=user_id, date__gte=first, date__lte=last
+        ).values_list('date', 'mood_score'),
+        'journal': _daily_counts(JournalEntry.objects.filter(user_id=user_id), first, last),
+        'coping': _daily_counts(CopingToolUsage.objects.filter(user_id=user_id, completed=True), first, last),
+    }
+
+
+def build_years(user_id, years):
+    """Packed ``{year: {metric: bytes}}`` for the given years"""
+    packed = {year: {metric: bytearray(DAYS) for metric in METRICS} for year in years}
+    rows = _metric_rows(user_id, date(min(years), 1, 1), date(max(years), 12, 31))
+    for metric, values in rows.items():
+        for day, value in values:
+            if day.year in packed:
+                packed[day.year][metric][(day - date(day.year, 1, 1)).days] = min(value, 255)
+    return {year: {metric: bytes(data) for metric, data in metrics.items()} for year, metrics in packed.items()}
+
+
+def heatmaps(user_id, years):
+    """Packed heatmaps for ``years``, served from the cache where possible"""
+    keys = {year: cache_key(user_id, year) for year in years}
+    cached = cache.get_many(keys.values())
+    result = {year: cached[key] for year, key in keys.items() if key in cached}
+    missing = [year for year in years if year not in result]
+    if missing:
+        built = build_years(user_id, missing)
+        cache.set_many({keys[year]: built[year] for year in missing}, CACHE_TTL)
+        result.update(built)
+    return result
+
+
+def encode(packed):
+    return {metric: base64.b64encode(data).decode('ascii') for metric, data in packed.items()}
+
+
+def invalidate(user_id, year):
+    cache.delete(cache_key(user_id, year))
+
+
+def _invalidate(sender, instance, **kwargs):
+    if sender is MoodEntry:
+        day = instance.date
+    else:
+        day = timezone.localdate(instance.created_at) if instance.created_at else timezone.localdate()
+    invalidate(instance.user_id, day.year)
+
+
+for _model in (MoodEntry, JournalEntry, CopingToolUsage):
+    post_save.connect(_invalidate, sender=_model, dispatch_uid=f'heatmap-{_model.__name__}-saved')
+    post_delete.connect(_invalidate, sender=_model, dispatch_uid=f'heatmap-{_model.__name__}-deleted')
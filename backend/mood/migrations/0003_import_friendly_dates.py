@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:40
+
+import datetime
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mood', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='moodentry',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='moodentry',
+            name='date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+    ]
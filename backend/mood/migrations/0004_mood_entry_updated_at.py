@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mood', '0003_import_friendly_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moodentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,8 @@
+import datetime
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class MoodEntry(models.Model):
@@ -39,8 +42,10 @@ class MoodEntry(models.Model):
     activities = models.JSONField(default=list)  # What user was doing
     sleep_quality = models.IntegerField(null=True, blank=True)  # 1-5
     energy_level = models.IntegerField(null=True, blank=True)  # 1-5
-    created_at = models.DateTimeField(auto_now_add=True)
-    date = models.DateField(auto_now_add=True)
+    # Defaults rather than auto_now_add so imports can keep original dates
+    created_at = models.DateTimeField(default=timezone.now)
+    date = models.DateField(default=datetime.date.today)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
@@ -0,0 +1,125 @@
+import base64
+from datetime import date, datetime, time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from coping.models import CopingTool, CopingToolUsage
+from journal.models import JournalEntry
+from . import heatmap
+from .models import MoodEntry
+from .timeseries import downsample, lttb, mood_series
+
+User = get_user_model()
+
+
+def noon(day):
+    return timezone.make_aware(datetime.combine(day, time(12)))
+
+
+class HeatmapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='pixels', email='pixels@example.com', password='x')
+
+    def test_packs_one_byte_per_day(self):
+        MoodEntry.objects.create(user=self.user, mood_score=4, date=date(2024, 1, 1), created_at=noon(date(2024, 1, 1)))
+        MoodEntry.objects.create(user=self.user, mood_score=2, date=date(2024, 12, 31), created_at=noon(date(2024, 12, 31)))
+        for _ in range(2):
+            JournalEntry.objects.create(user=self.user, content='x', created_at=noon(date(2024, 3, 1)))
+        tool = CopingTool.objects.create(title='Box breathing', description='', category='breathing')
+        CopingToolUsage.objects.create(user=self.user, tool=tool, completed=True, created_at=noon(date(2023, 1, 2)))
+        CopingToolUsage.objects.create(user=self.user, tool=tool, completed=False, created_at=noon(date(2024, 1, 2)))
+
+        packed = heatmap.build_years(self.user.pk, [2023, 2024])
+        year = packed[2024]
+        self.assertEqual({metric: len(data) for metric, data in year.items()}, {'mood': 366, 'journal': 366, 'coping': 366})
+        self.assertEqual((year['mood'][0], year['mood'][365]), (4, 2))
+        self.assertEqual(year['journal'][31 + 29], 2)
+        self.assertEqual(sum(year['coping']), 0)
+        self.assertEqual(packed[2023]['coping'][1], 1)
+
+    def test_view_is_served_from_the_cache_until_a_write(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        today = timezone.localdate()
+        day = (today - date(today.year, 1, 1)).days
+
+        client.get('/api/mood/heatmap/')
+        with self.assertNumQueries(0):
+            heatmap.heatmaps(self.user.pk, [today.year])
+
+        MoodEntry.objects.create(user=self.user, mood_score=5)
+        pixels = base64.b64decode(client.get('/api/mood/heatmap/').json()['years'][str(today.year)]['mood'])
+        self.assertEqual(pixels[day], 5)
+
+        MoodEntry.objects.filter(user=self.user).get().delete()
+        pixels = base64.b64decode(client.get('/api/mood/heatmap/').json()['years'][str(today.year)]['mood'])
+        self.assertEqual(pixels[day], 0)
+
+
+class MoodSeriesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='series', email='series@example.com', password='x')
+        # Monday 2024-01-01 to Wednesday 2024-01-10, skipping the weekend
+        for day, score, emotions in [
+            (1, 1, ['sad']), (2, 3, ['calm']), (3, 5, ['happy', 'calm']),
+            (8, 2, ['tired']), (10, 4, ['calm']),
+        ]:
+            entry = MoodEntry.objects.create(user=self.user, mood_score=score, emotions=emotions)
+            MoodEntry.objects.filter(pk=entry.pk).update(date=date(2024, 1, day))
+
+    def test_buckets(self):
+        days = mood_series(self.user, date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual([point['date'] for point in days], [
+            '2024-01-01', '2024-01-02', '2024-01-03', '2024-01-08', '2024-01-10',
+        ])
+
+        weeks = mood_series(self.user, date(2024, 1, 1), date(2024, 1, 31), 'week')
+        self.assertEqual(weeks[0], {
+            'date': '2024-01-01', 'mean': 3.0, 'min': 1, 'max': 5, 'count': 3,
+            'emotions': {'calm': 2, 'sad': 1, 'happy': 1},
+        })
+        self.assertEqual((weeks[1]['date'], weeks[1]['mean'], weeks[1]['count']), ('2024-01-08', 3.0, 2))
+
+        months = mood_series(self.user, date(2024, 1, 2), date(2024, 1, 8), 'month')
+        self.assertEqual(len(months), 1)
+        self.assertEqual((months[0]['date'], months[0]['mean'], months[0]['count']), ('2024-01-01', 3.33, 3))
+
+    def test_downsample_keeps_the_ends(self):
+        series = mood_series(self.user, date(2024, 1, 1), date(2024, 1, 31))
+        thinned = downsample(series, 3)
+        self.assertEqual(len(thinned), 3)
+        self.assertEqual((thinned[0], thinned[-1]), (series[0], series[-1]))
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/mood/timeseries/', {
+            'start': '2024-01-01', 'end': '2024-01-31', 'bucket': 'day', 'points': 3,
+        }).json()
+        self.assertEqual((response['total_points'], len(response['series'])), (5, 3))
+        self.assertEqual(client.get('/api/mood/timeseries/', {'bucket': 'year'}).status_code, 400)
+        self.assertEqual(client.get('/api/mood/timeseries/', {'points': 2}).status_code, 400)
+        self.assertEqual(
+            client.get('/api/mood/timeseries/', {'start': '2024-02-01', 'end': '2024-01-01'}).status_code, 400
+        )
+
+
+class LttbTests(SimpleTestCase):
+    def test_short_series_are_returned_whole(self):
+        self.assertEqual(lttb([1, 2, 3], 5), [1, 2, 3])
+        self.assertEqual(lttb([1, 2, 3, 4], 2), [1, 2, 3, 4])
+
+    def test_keeps_peaks_and_dips(self):
+        points = [0, 0, 0, 9, 0, 0, 0, -9, 0, 0, 0, 0]
+        sampled = lttb(points, 4)
+        self.assertEqual(sampled, [0, 9, -9, 0])
+
+    def test_uses_the_given_axes(self):
+        points = [{'x': x, 'y': 10 if x == 40 else 1} for x in range(0, 100, 10)]
+        sampled = lttb(points, 3, x=lambda point: point['x'], y=lambda point: point['y'])
+        self.assertEqual([point['x'] for point in sampled], [0, 40, 90])
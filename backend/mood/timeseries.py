@@ -0,0 +1,102 @@
+"""
+Bucketed mood time series for charts.
+
+A MoodEntry is already a daily rollup (one row per user per day), so any
+range is served from one narrow query over (date, mood_score, emotions) and
+folded into day, week or month buckets with mean/min/max/count and the mix
+of emotions logged. Long ranges can be thinned to a fixed number of points
+with Largest-Triangle-Three-Buckets, which keeps the peaks and dips a line
+chart needs, so the payload size does not grow with history.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from .models import MoodEntry
+
+BUCKETS = ('day', 'week', 'month')
+MAX_RANGE_DAYS = 366 * 10
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def mood_series(user, start, end, bucket='day'):
+    """Aggregates per non-empty bucket between ``start`` and ``end`` (inclusive)"""
+    buckets = {}
+    rows = MoodEntry.objects.filter(
+        user=user, date__gte=start, date__lte=end
+    ).order_by('date').values_list('date', 'mood_score', 'emotions')
+    for day, score, emotions in rows.iterator():
+        key = bucket_start(day, bucket)
+        point = buckets.get(key)
+        if point is None:
+            point = buckets[key] = {'sum': 0, 'min': score, 'max': score, 'count': 0, 'emotions': Counter()}
+        point['sum'] += score
+        point['min'] = min(point['min'], score)
+        point['max'] = max(point['max'], score)
+        point['count'] += 1
+        point['emotions'].update(emotions or [])
+
+    return [
+        {
+            'date': key.isoformat(),
+            'mean': round(point['sum'] / point['count'], 2),
+            'min': point['min'],
+            'max': point['max'],
+            'count': point['count'],
+            'emotions': dict(point['emotions'].most_common()),
+        }
+        for key, point in buckets.items()
+    ]
+
+
+def lttb(points, threshold, x=None, y=None):
+    """Downsample ``points`` to ``threshold`` with Largest-Triangle-Three-Buckets.
+
+    ``x`` and ``y`` map a point to numbers (default: index and the point).
+    The first and last points are always kept.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+    xs = [x(point) for point in points] if x else list(range(count))
+    ys = [y(point) for point in points] if y else list(points)
+
+    sampled = [points[0]]
+    every = (count - 2) / (threshold - 2)
+    chosen = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, count)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[chosen] - avg_x) * (ys[j] - ys[chosen]) -
+                (xs[chosen] - xs[j]) * (avg_y - ys[chosen])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        chosen = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample(series, points):
+    """Thin a mood_series() result to at most ``points`` entries"""
+    return lttb(
+        series, points,
+        x=lambda point: date.fromisoformat(point['date']).toordinal(),
+        y=lambda point: point['mean'],
+    )
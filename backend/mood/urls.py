@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     MoodEntryListCreateView, MoodEntryDetailView, 
-    TodayMoodView, MoodStatsView, MoodInsightListView
+    TodayMoodView, MoodStatsView, MoodTimeSeriesView, HeatmapView, MoodInsightListView
 )
 
 urlpatterns = [
@@ -9,5 +9,7 @@ urlpatterns = [
     path('entries/<int:pk>/', MoodEntryDetailView.as_view(), name='mood_entry_detail'),
     path('today/', TodayMoodView.as_view(), name='today_mood'),
     path('stats/', MoodStatsView.as_view(), name='mood_stats'),
+    path('timeseries/', MoodTimeSeriesView.as_view(), name='mood_timeseries'),
+    path('heatmap/', HeatmapView.as_view(), name='mood_heatmap'),
     path('insights/', MoodInsightListView.as_view(), name='mood_insights'),
 ]
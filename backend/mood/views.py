@@ -3,10 +3,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Avg, Count
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from collections import Counter
+from dost import events
 from .models import MoodEntry, MoodInsight
-from .serializers import MoodEntrySerializer, MoodInsightSerializer, MoodStatsSerializer
+from .heatmap import DAYS, METRICS, encode, heatmaps
+from .timeseries import BUCKETS, MAX_RANGE_DAYS, downsample, mood_series
+from .serializers import MoodEntrySerializer, MoodInsightSerializer
 
 
 class MoodEntryListCreateView(generics.ListCreateAPIView):
@@ -35,15 +38,20 @@ class MoodEntryListCreateView(generics.ListCreateAPIView):
         if existing:
             # Update existing entry
             serializer = self.get_serializer(existing, data=request.data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        # Create new entry
-        serializer = self.get_serializer(data=request.data)
+            response_status = status.HTTP_200_OK
+        else:
+            # Create new entry
+            serializer = self.get_serializer(data=request.data)
+            response_status = status.HTTP_201_CREATED
         serializer.is_valid(raise_exception=True)
-        serializer.save(user=request.user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        
+        with events.batch():
+            serializer.save(user=request.user)
+            event = events.emit(request.user, 'mood_log', 'Logged mood')
+        
+        data = dict(serializer.data)
+        data['pet'] = event.results.get('pet')
+        return Response(data, status=response_status)
 
 
 class MoodEntryDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -144,6 +152,78 @@ class MoodStatsView(APIView):
         })
 
 
+class MoodTimeSeriesView(APIView):
+    """Mood aggregated into day/week/month buckets over any date range.
+    
+    Query params: ``start``/``end`` (ISO dates, default the last 365 days),
+    ``bucket`` (day, week or month) and optionally ``points`` to thin the
+    series to that many points with LTTB.
+    """
+    
+    def get(self, request):
+        params = request.query_params
+        bucket = params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return Response({'error': f"bucket must be one of {', '.join(BUCKETS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = date.fromisoformat(params['end']) if params.get('end') else timezone.now().date()
+            start = date.fromisoformat(params['start']) if params.get('start') else end - timedelta(days=364)
+            points = int(params['points']) if params.get('points') else None
+        except ValueError:
+            return Response({'error': 'start/end must be YYYY-MM-DD and points a number.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days > MAX_RANGE_DAYS:
+            return Response({'error': f'The range must run forwards and span at most {MAX_RANGE_DAYS} days.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if points is not None and points < 3:
+            return Response({'error': 'points must be at least 3.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        series = mood_series(request.user, start, end, bucket)
+        total = len(series)
+        if points is not None:
+            series = downsample(series, points)
+        
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'bucket': bucket,
+            'total_points': total,
+            'series': series,
+        })
+
+
+class HeatmapView(APIView):
+    """Year-in-pixels data for mood, journal and coping activity.
+    
+    ``?year=2025`` or ``?from_year=2023&to_year=2025`` (default: this year).
+    Each metric is a base64 string of 366 bytes, one per day from January 1st.
+    """
+    MAX_YEARS = 10
+    
+    def get(self, request):
+        params = request.query_params
+        year = params.get('year') or timezone.localdate().year
+        try:
+            # from_year alone runs up to the current year
+            first = int(params.get('from_year') or year)
+            last = int(params.get('to_year') or (timezone.localdate().year if params.get('from_year') else year))
+        except ValueError:
+            return Response({'error': 'Years must be numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= first <= last <= 9999 or last - first >= self.MAX_YEARS:
+            return Response({'error': f'Ask for 1 to {self.MAX_YEARS} years, oldest first.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        years = list(range(first, last + 1))
+        packed = heatmaps(request.user.pk, years)
+        return Response({
+            'encoding': 'base64',
+            'days': DAYS,
+            'metrics': METRICS,
+            'years': {str(year): encode(packed[year]) for year in years},
+        })
+
+
 class MoodInsightListView(generics.ListAPIView):
     """Get mood insights for the user."""
     serializer_class = MoodInsightSerializer
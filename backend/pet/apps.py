@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pet'
+
+    def ready(self):
+        # Connects the activity-event and friendship receivers
+        from . import interaction_service, leaderboard  # noqa: F401
@@ -0,0 +1,162 @@
+"""
+Pet interaction service.
+
+This is the only write path for pet XP. An interaction updates streak, XP,
+level, happiness and energy with a single F-expression UPDATE, appends one
+PetActivity to the ledger, bumps its rollup and refreshes the owner's
+friends-leaderboard rows, all in one transaction. Two
+tabs interacting at once can no longer overwrite each other's XP.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Least
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from datetime import timedelta
+
+from dost import events
+
+from . import leaderboard
+from .ledger import bump_rollup
+from .models import (
+    WellnessPet, PetActivity, XP_REWARDS, HAPPINESS_BOOSTS,
+    LEVEL_UNLOCKS, MIN_DECAYED_STAT,
+)
+
+ENERGY_BOOST = 5
+LEVEL_UP_BOOST = 10
+MAX_STREAK_BONUS = 20
+MAX_ATTEMPTS = 5
+
+
+def _load_pet(user):
+    pet, created = WellnessPet.objects.get_or_create(user=user, defaults={'name': 'Buddy'})
+    return pet
+
+
+def record_interaction(user, activity_type, description='', today=None):
+    """Award an interaction to the user's pet.
+
+    Returns a dict with the updated ``pet``, the logged ``activity``,
+    ``xp_earned``, ``streak_bonus`` and ``leveled_up``.
+    """
+    today = today or timezone.now().date()
+    for attempt in range(MAX_ATTEMPTS):
+        snapshot = _load_pet(user)
+        result = _apply(snapshot, activity_type, description, today)
+        if result is not None:
+            return result
+    raise RuntimeError(f'Could not record pet interaction for pet {snapshot.pk}')
+
+
+def _apply(snapshot, activity_type, description, today):
+    """Run the update against ``snapshot``'s dates, or return None if stale.
+
+    Decay depends on last_interaction and stats_as_of, which only change on
+    the first interaction of a day. The UPDATE is guarded on both, so if
+    another request moved them in between it matches nothing and the caller
+    reloads and retries. Same-day interactions never conflict.
+    """
+    xp = XP_REWARDS.get(activity_type, 10)
+    happiness_boost = HAPPINESS_BOOSTS.get(activity_type, 5)
+    decay = snapshot.decay_since(today)
+
+    streak = Case(
+        When(last_interaction=today, then=F('current_streak')),
+        When(last_interaction=today - timedelta(days=1), then=F('current_streak') + 1),
+        default=Value(1),
+    )
+    xp_earned = Value(xp) + Least(streak * 2, Value(MAX_STREAK_BONUS))
+    new_experience = F('experience') + xp_earned
+    threshold = Value(100) + F('level') * 50
+    leveled = GreaterThanOrEqual(new_experience, threshold)
+    level_boost = Case(When(leveled, then=Value(LEVEL_UP_BOOST)), default=Value(0))
+
+    happiness, energy = F('happiness'), F('energy')
+    if decay:
+        happiness = Greatest(happiness - decay, Value(MIN_DECAYED_STAT))
+        energy = Greatest(energy - decay, Value(MIN_DECAYED_STAT))
+
+    with transaction.atomic():
+        updated = WellnessPet.objects.filter(
+            pk=snapshot.pk,
+            last_interaction=snapshot.last_interaction,
+            stats_as_of=snapshot.stats_as_of,
+        ).update(
+            current_streak=streak,
+            longest_streak=Greatest(F('longest_streak'), streak),
+            last_interaction=today,
+            stats_as_of=today,
+            total_xp=F('total_xp') + xp_earned,
+            experience=Case(When(leveled, then=new_experience - threshold), default=new_experience),
+            level=Case(When(leveled, then=F('level') + 1), default=F('level')),
+            happiness=Least(happiness + happiness_boost + level_boost, Value(100)),
+            energy=Least(energy + ENERGY_BOOST + level_boost, Value(100)),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            return None
+
+        # The row is locked by our UPDATE, so this reads exactly what it wrote
+        pet = WellnessPet.objects.select_related('pet_type').get(pk=snapshot.pk)
+        streak_bonus = min(pet.current_streak * 2, MAX_STREAK_BONUS)
+        earned = xp + streak_bonus
+        # Experience only drops below the award if a level-up reset it
+        leveled_up = pet.experience < earned
+
+        if leveled_up:
+            unlocked = [
+                accessory for lvl, accessory in LEVEL_UNLOCKS.items()
+                if pet.level >= lvl and accessory not in pet.unlocked_accessories
+            ]
+            if unlocked:
+                pet.unlocked_accessories = pet.unlocked_accessories + unlocked
+                WellnessPet.objects.filter(pk=pet.pk).update(
+                    unlocked_accessories=pet.unlocked_accessories
+                )
+
+        activity = PetActivity.objects.create(
+            pet=pet,
+            activity_type=activity_type,
+            xp_earned=earned,
+            happiness_change=happiness_boost,
+            energy_change=ENERGY_BOOST,
+            description=description or f"Completed {activity_type}"
+        )
+        bump_rollup(pet.pk, activity_type, earned)
+        leaderboard.record_xp(pet, earned, today)
+
+    return {
+        'pet': pet,
+        'activity': activity,
+        'xp_earned': earned,
+        'streak_bonus': streak_bonus,
+        'leveled_up': leveled_up,
+    }
+
+
+def summarize(result):
+    """Compact pet update for embedding in other apps' responses."""
+    pet = result['pet']
+    return {
+        'xp_earned': result['xp_earned'],
+        'streak_bonus': result['streak_bonus'],
+        'leveled_up': result['leveled_up'],
+        'level': pet.level,
+        'total_xp': pet.total_xp,
+        'current_streak': pet.current_streak,
+        'happiness': pet.current_happiness,
+        'energy': pet.current_energy,
+    }
+
+
+def on_activities_completed(sender, events, **kwargs):
+    """Award pet XP for activities completed in other apps."""
+    for event in events:
+        if event.activity_type not in XP_REWARDS:
+            continue
+        result = record_interaction(event.user, event.activity_type, event.description)
+        event.results['pet'] = summarize(result)
+
+
+events.activities_completed.connect(on_activities_completed, dispatch_uid='pet-activity-xp')
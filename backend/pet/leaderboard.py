@@ -0,0 +1,180 @@
+"""
+Friends leaderboards served from precomputed rank entries.
+
+Every user's board is a set of FriendRankEntry rows (one for themselves and
+one per friend) copying each subject's total XP, level, longest streak and
+XP earned this week. Rather than sorting friends' pets on every request:
+
+* an XP award updates the awarded user's rows on all boards in one UPDATE,
+* adding or removing a friend inserts or deletes the pair's rows,
+* a read walks the (owner, metric) index and stops at ``limit``.
+
+Boards are built lazily the first time a user asks for theirs.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from .models import FriendRankEntry, PetActivity, WellnessPet
+
+User = get_user_model()
+
+METRICS = {
+    'xp': 'total_xp',
+    'streak': 'longest_streak',
+    'weekly': 'weekly_xp',
+}
+
+
+def week_start(today=None):
+    today = today or timezone.now().date()
+    return today - timedelta(days=today.weekday())
+
+
+def record_xp(pet, earned, today=None):
+    """Copy a pet's new totals onto every board its owner appears on."""
+    week = week_start(today)
+    FriendRankEntry.objects.filter(subject_id=pet.user_id).update(
+        total_xp=pet.total_xp,
+        level=pet.level,
+        longest_streak=pet.longest_streak,
+        weekly_xp=Case(
+            When(week_start=week, then=F('weekly_xp') + earned),
+            default=Value(earned),
+        ),
+        week_start=week,
+    )
+
+
+def add_entries(pairs, today=None):
+    """Create board rows for ``(owner_id, subject_id)`` pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    week = week_start(today)
+    subject_ids = {subject_id for _, subject_id in pairs}
+    pets = {
+        row['user_id']: row
+        for row in WellnessPet.objects.filter(user_id__in=subject_ids)
+        .values('user_id', 'total_xp', 'level', 'longest_streak')
+    }
+    weekly = dict(
+        PetActivity.objects.filter(
+            pet__user_id__in=subject_ids,
+            created_at__gte=datetime.combine(week, time.min, tzinfo=dt_timezone.utc),
+        )
+        .order_by()
+        .values('pet__user_id')
+        .annotate(xp=Sum('xp_earned'))
+        .values_list('pet__user_id', 'xp')
+    )
+    FriendRankEntry.objects.bulk_create([
+        FriendRankEntry(
+            owner_id=owner_id,
+            subject_id=subject_id,
+            total_xp=pets.get(subject_id, {}).get('total_xp', 0),
+            level=pets.get(subject_id, {}).get('level', 1),
+            longest_streak=pets.get(subject_id, {}).get('longest_streak', 0),
+            weekly_xp=weekly.get(subject_id, 0),
+            week_start=week,
+        )
+        for owner_id, subject_id in pairs
+    ], ignore_conflicts=True, batch_size=1000)
+
+
+def ensure_board(user, today=None):
+    """Build the user's board from their friends list if it doesn't exist yet."""
+    if FriendRankEntry.objects.filter(owner=user, subject=user).exists():
+        return False
+    friend_ids = list(user.friends.values_list('pk', flat=True))
+    add_entries([(user.pk, user.pk)] + [(user.pk, friend_id) for friend_id in friend_ids], today)
+    return True
+
+
+def board(user, metric='xp', limit=50, today=None):
+    """Top ``limit`` rows of the user's board plus the user's own rank."""
+    field = METRICS[metric]
+    entries = FriendRankEntry.objects.filter(owner=user).select_related('subject')
+    if metric == 'weekly':
+        # Rows not touched this week count as zero and sort after the rest
+        week = week_start(today)
+        current = entries.filter(week_start=week).order_by('-weekly_xp', 'subject_id')
+        rows = list(current[:limit])
+        if len(rows) < limit:
+            stale = entries.exclude(week_start=week).order_by('subject_id')[:limit - len(rows)]
+            for entry in stale:
+                entry.weekly_xp = 0
+                rows.append(entry)
+    else:
+        rows = list(entries.order_by(f'-{field}', 'subject_id')[:limit])
+
+    ranked = []
+    my_rank = None
+    for position, entry in enumerate(rows, start=1):
+        if entry.subject_id == user.pk:
+            my_rank = position
+        ranked.append({
+            'rank': position,
+            'user_id': entry.subject_id,
+            'username': entry.subject.username,
+            'is_me': entry.subject_id == user.pk,
+            'level': entry.level,
+            'total_xp': entry.total_xp,
+            'longest_streak': entry.longest_streak,
+            'weekly_xp': entry.weekly_xp,
+        })
+    if my_rank is None:
+        my_rank = _rank_of(user, metric, today)
+    return {'metric': metric, 'week_start': week_start(today), 'my_rank': my_rank, 'entries': ranked}
+
+
+def _rank_of(user, metric, today=None):
+    """Rank of the user's own row, matching the ordering used by board()."""
+    entries = FriendRankEntry.objects.filter(owner=user)
+    me = entries.filter(subject=user).first()
+    if me is None:
+        return None
+    field = METRICS[metric]
+    if metric == 'weekly':
+        week = week_start(today)
+        current = entries.filter(week_start=week)
+        if me.week_start != week:
+            stale_ahead = entries.exclude(week_start=week).filter(subject_id__lt=user.pk).count()
+            return current.count() + stale_ahead + 1
+        entries = current
+    value = getattr(me, field)
+    ahead = entries.filter(**{f'{field}__gt': value}).count()
+    ahead += entries.filter(**{field: value, 'subject_id__lt': user.pk}).count()
+    return ahead + 1
+
+
+def sync_friendship(sender, instance, action, pk_set, **kwargs):
+    """Keep boards in step with User.friends (which is symmetrical)."""
+    if action == 'post_add' and pk_set:
+        built = set(
+            FriendRankEntry.objects.filter(owner_id__in=set(pk_set) | {instance.pk}, subject_id=F('owner_id'))
+            .values_list('owner_id', flat=True)
+        )
+        pairs = []
+        for friend_id in pk_set:
+            # Boards that don't exist yet pick the friend up when built
+            if instance.pk in built:
+                pairs.append((instance.pk, friend_id))
+            if friend_id in built:
+                pairs.append((friend_id, instance.pk))
+        add_entries(pairs)
+    elif action == 'post_remove' and pk_set:
+        FriendRankEntry.objects.filter(owner_id=instance.pk, subject_id__in=pk_set).delete()
+        FriendRankEntry.objects.filter(owner_id__in=pk_set, subject_id=instance.pk).delete()
+    elif action == 'post_clear':
+        FriendRankEntry.objects.filter(owner_id=instance.pk).exclude(subject_id=instance.pk).delete()
+        FriendRankEntry.objects.filter(subject_id=instance.pk).exclude(owner_id=instance.pk).delete()
+
+
+m2m_changed.connect(
+    sync_friendship, sender=User.friends.through, weak=False,
+    dispatch_uid='pet-leaderboard-friends'
+)
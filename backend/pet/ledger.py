@@ -0,0 +1,152 @@
+"""
+XP ledger for wellness pets.
+
+PetActivity rows are the source of truth: every XP grant is appended there by
+interaction_service, and never edited. Two materializations keep reads O(1):
+
+* WellnessPet holds the current totals, level and streak.
+* PetActivityRollup holds per-type counts and XP for stats breakdowns.
+
+PetSnapshot rows checkpoint the folded progress periodically, so rebuilding a
+pet only replays the activities appended since its latest snapshot. Pets
+that earned XP before the ledger existed start from an opening-balance
+snapshot holding that progress, even when replaying from scratch.
+Happiness and energy are moods rather than progress and are not replayed.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import (
+    WellnessPet, PetActivity, PetActivityRollup, PetSnapshot,
+    LEVEL_UNLOCKS, xp_for_next_level,
+)
+
+PROGRESS_FIELDS = (
+    'total_xp', 'level', 'experience',
+    'current_streak', 'longest_streak', 'last_interaction',
+)
+
+
+def bump_rollup(pet_id, activity_type, xp):
+    """Count one appended activity in the pet's rollup."""
+    updated = PetActivityRollup.objects.filter(pet_id=pet_id, activity_type=activity_type).update(
+        count=F('count') + 1,
+        total_xp=F('total_xp') + xp,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            PetActivityRollup.objects.create(
+                pet_id=pet_id, activity_type=activity_type, count=1, total_xp=xp
+            )
+    except IntegrityError:
+        # Another request created the row first
+        bump_rollup(pet_id, activity_type, xp)
+
+
+def breakdown(pet):
+    """Activity count and XP per type, read from the rollup."""
+    return list(
+        pet.activity_rollups.filter(count__gt=0)
+        .order_by('activity_type')
+        .values('activity_type', 'count', 'total_xp')
+    )
+
+
+def initial_state():
+    return {
+        'total_xp': 0,
+        'level': 1,
+        'experience': 0,
+        'current_streak': 0,
+        'longest_streak': 0,
+        'last_interaction': None,
+        'last_activity_id': 0,
+    }
+
+
+def fold(state, activity):
+    """Apply one ledger entry to a progress state, in place."""
+    day = activity.created_at.date()
+    last = state['last_interaction']
+    if last is None or last < day - timedelta(days=1):
+        state['current_streak'] = 1
+    elif last == day - timedelta(days=1):
+        state['current_streak'] += 1
+    state['last_interaction'] = max(day, last) if last else day
+    state['longest_streak'] = max(state['longest_streak'], state['current_streak'])
+
+    state['total_xp'] += activity.xp_earned
+    state['experience'] += activity.xp_earned
+    while state['experience'] >= xp_for_next_level(state['level']):
+        state['experience'] -= xp_for_next_level(state['level'])
+        state['level'] += 1
+    state['last_activity_id'] = activity.pk
+    return state
+
+
+def replay(pet, from_scratch=False):
+    """Fold the ledger into a progress state, starting at the latest snapshot."""
+    snapshots = pet.snapshots.filter(is_opening_balance=True) if from_scratch else pet.snapshots
+    snapshot = snapshots.first()
+    if snapshot is None:
+        state = initial_state()
+    else:
+        state = {field: getattr(snapshot, field) for field in PROGRESS_FIELDS}
+        state['last_activity_id'] = snapshot.last_activity_id
+
+    activities = (
+        PetActivity.objects.filter(pet=pet, pk__gt=state['last_activity_id'])
+        .order_by('pk')
+        .only('pk', 'xp_earned', 'created_at')
+    )
+    for activity in activities.iterator(chunk_size=2000):
+        fold(state, activity)
+    return state
+
+
+def rebuild(pet, state=None, from_scratch=False):
+    """Rewrite the pet's materialized progress and rollups from the ledger."""
+    if state is None:
+        state = replay(pet, from_scratch=from_scratch)
+    unlocked = list(pet.unlocked_accessories)
+    unlocked += [
+        accessory for lvl, accessory in LEVEL_UNLOCKS.items()
+        if state['level'] >= lvl and accessory not in unlocked
+    ]
+
+    with transaction.atomic():
+        WellnessPet.objects.filter(pk=pet.pk).update(
+            unlocked_accessories=unlocked,
+            updated_at=timezone.now(),
+            **{field: state[field] for field in PROGRESS_FIELDS}
+        )
+        totals = (
+            PetActivity.objects.filter(pet=pet).order_by()
+            .values('activity_type')
+            .annotate(count=Count('id'), total_xp=Sum('xp_earned'))
+        )
+        PetActivityRollup.objects.filter(pet=pet).delete()
+        PetActivityRollup.objects.bulk_create([
+            PetActivityRollup(pet=pet, **row) for row in totals
+        ])
+    return state
+
+
+def take_snapshot(pet, keep=2):
+    """Checkpoint the pet's folded progress and prune older snapshots."""
+    state = replay(pet)
+    if not state['last_activity_id']:
+        return None
+    latest = pet.snapshots.first()
+    if latest is not None and latest.last_activity_id == state['last_activity_id']:
+        return latest
+    snapshot = PetSnapshot.objects.create(pet=pet, **state)
+    # The opening balance is kept, it is where replays from scratch start
+    stale = pet.snapshots.filter(is_opening_balance=False).values_list('pk', flat=True)[keep:]
+    PetSnapshot.objects.filter(pk__in=list(stale)).delete()
+    return snapshot
@@ -0,0 +1,146 @@
+"""
+Benchmark for friends leaderboards over a synthetic social graph.
+
+Builds users, pets, friendships and this week's activities in a throwaway
+test database, with a few "hub" users who have hundreds of friends, then
+compares reading precomputed boards against sorting friends' pets per
+request, and measures what an XP award costs with the fanout.
+
+    python manage.py bench_leaderboard --users 3000 --avg-friends 40 --hub-friends 800
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+
+from games.management.commands.loadtest_ws import QueryCounter, percentile
+from pet import leaderboard
+from pet.interaction_service import record_interaction
+from pet.models import PetActivity, WellnessPet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark precomputed friends leaderboards against per-request sorting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--avg-friends', type=int, default=30)
+        parser.add_argument('--hubs', type=int, default=10, help='Users with --hub-friends friends each')
+        parser.add_argument('--hub-friends', type=int, default=500)
+        parser.add_argument('--reads', type=int, default=300)
+        parser.add_argument('--awards', type=int, default=300)
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            users = self._build_graph(rng, options)
+            hubs = users[:options['hubs']]
+            readers = hubs + rng.sample(users, min(len(users), options['reads']))
+
+            self._phase('Board build (first read)', readers,
+                        lambda user: leaderboard.ensure_board(user))
+            self._phase('Precomputed read', readers,
+                        lambda user: leaderboard.board(user, 'xp', options['limit']))
+            self._phase('Precomputed read (weekly)', readers,
+                        lambda user: leaderboard.board(user, 'weekly', options['limit']))
+            self._phase('Per-request sort (baseline)', readers,
+                        lambda user: self._naive_board(user, options['limit']))
+            self._phase('Per-request sort, hubs only', hubs,
+                        lambda user: self._naive_board(user, options['limit']))
+            self._phase('Precomputed read, hubs only', hubs,
+                        lambda user: leaderboard.board(user, 'weekly', options['limit']))
+            awarded = rng.sample(hubs + users, min(len(users), options['awards']))
+            self._phase('XP award with fanout', awarded,
+                        lambda user: record_interaction(user, 'journal'))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _build_graph(self, rng, options):
+        count = options['users']
+        started = time.perf_counter()
+        User.objects.bulk_create(
+            [User(username=f'lb-{i}', email=f'lb-{i}@bench.local', password='!') for i in range(count)],
+            batch_size=1000,
+        )
+        users = list(User.objects.order_by('pk'))
+        WellnessPet.objects.bulk_create([
+            WellnessPet(
+                user=user,
+                total_xp=rng.randint(0, 5000),
+                level=rng.randint(1, 20),
+                longest_streak=rng.randint(0, 60),
+            )
+            for user in users
+        ], batch_size=1000)
+
+        pairs = set()
+        for hub in users[:options['hubs']]:
+            for friend in rng.sample(users, min(count, options['hub_friends'])):
+                if friend.pk != hub.pk:
+                    pairs.add((min(hub.pk, friend.pk), max(hub.pk, friend.pk)))
+        for _ in range(count * options['avg_friends'] // 2):
+            a, b = rng.sample(users, 2)
+            pairs.add((min(a.pk, b.pk), max(a.pk, b.pk)))
+        Through = User.friends.through
+        Through.objects.bulk_create(
+            [Through(from_user_id=a, to_user_id=b) for a, b in pairs]
+            + [Through(from_user_id=b, to_user_id=a) for a, b in pairs],
+            batch_size=5000,
+        )
+
+        pets = dict(WellnessPet.objects.values_list('user_id', 'pk'))
+        PetActivity.objects.bulk_create([
+            PetActivity(pet_id=pets[user.pk], activity_type='journal', xp_earned=rng.randint(10, 45))
+            for user in users for _ in range(rng.randint(0, 4))
+        ], batch_size=5000)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Graph'))
+        self.stdout.write(f'  users:        {count}')
+        self.stdout.write(f'  friendships:  {len(pairs)}  (hubs: {options["hubs"]} x ~{options["hub_friends"]})')
+        self.stdout.write(f'  built in:     {time.perf_counter() - started:.1f}s')
+        return users
+
+    def _naive_board(self, user, limit):
+        """What the endpoint would cost without precomputed entries."""
+        members = list(user.friends.values_list('pk', flat=True)) + [user.pk]
+        pets = list(
+            WellnessPet.objects.filter(user_id__in=members)
+            .select_related('user')
+            .order_by('-total_xp', 'user_id')
+        )
+        weekly = dict(
+            PetActivity.objects.filter(
+                pet__user_id__in=members,
+                created_at__date__gte=leaderboard.week_start(),
+            )
+            .order_by()
+            .values('pet__user_id')
+            .annotate(xp=Sum('xp_earned'))
+            .values_list('pet__user_id', 'xp')
+        )
+        pets.sort(key=lambda pet: -weekly.get(pet.user_id, 0))
+        return pets[:limit]
+
+    def _phase(self, name, users, operation):
+        latencies = []
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            for user in users:
+                started = time.perf_counter()
+                operation(user)
+                latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f'  {len(users)} ops   p50 {percentile(latencies, 50):.2f}ms   '
+            f'p95 {percentile(latencies, 95):.2f}ms   max {latencies[-1] if latencies else 0:.2f}ms   '
+            f'queries/op {counter.count / max(len(users), 1):.1f}'
+        )
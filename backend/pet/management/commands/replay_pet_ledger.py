@@ -0,0 +1,55 @@
+"""
+Rebuild pet progress from the PetActivity ledger.
+
+    python manage.py replay_pet_ledger --dry-run      # report drift only
+    python manage.py replay_pet_ledger --snapshot     # checkpoint every pet
+    python manage.py replay_pet_ledger --user 42 --from-scratch
+"""
+from django.core.management.base import BaseCommand
+
+from pet import ledger
+from pet.models import WellnessPet
+
+
+class Command(BaseCommand):
+    help = 'Replay the pet XP ledger to rebuild totals, levels, streaks and rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only replay this user id')
+        parser.add_argument('--from-scratch', action='store_true', help='Ignore snapshots and fold every activity')
+        parser.add_argument('--dry-run', action='store_true', help='Report pets whose stored progress differs')
+        parser.add_argument('--snapshot', action='store_true', help='Write a new snapshot per pet instead of rebuilding')
+        parser.add_argument('--keep', type=int, default=2, help='Snapshots to keep per pet')
+
+    def handle(self, *args, **options):
+        pets = WellnessPet.objects.order_by('pk')
+        if options['user']:
+            pets = pets.filter(user_id=options['user'])
+
+        processed = drifted = 0
+        for pet in pets.iterator(chunk_size=500):
+            processed += 1
+            if options['snapshot']:
+                ledger.take_snapshot(pet, keep=options['keep'])
+                continue
+
+            state = ledger.replay(pet, from_scratch=options['from_scratch'])
+            diff = {
+                field: (getattr(pet, field), state[field])
+                for field in ledger.PROGRESS_FIELDS
+                if getattr(pet, field) != state[field]
+            }
+            if diff:
+                drifted += 1
+                if options['verbosity'] > 1 or options['dry_run']:
+                    self.stdout.write(f'pet {pet.pk}: ' + ', '.join(
+                        f'{field} {stored} -> {replayed}' for field, (stored, replayed) in diff.items()
+                    ))
+            if not options['dry_run']:
+                ledger.rebuild(pet, state=state)
+
+        if options['snapshot']:
+            self.stdout.write(self.style.SUCCESS(f'Snapshotted {processed} pet(s).'))
+        else:
+            verb = 'would change' if options['dry_run'] else 'corrected'
+            self.stdout.write(self.style.SUCCESS(f'Replayed {processed} pet(s); {drifted} {verb}.'))
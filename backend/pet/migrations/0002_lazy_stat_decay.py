@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:07
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_stats_as_of(apps, schema_editor):
+    # Rows saved by the old decay_stats() already hold decayed values as of
+    # their last save, so anchor them there to avoid decaying them twice
+    WellnessPet = apps.get_model('pet', 'WellnessPet')
+    WellnessPet.objects.filter(last_interaction__isnull=False).update(
+        stats_as_of=TruncDate('updated_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wellnesspet',
+            name='stats_as_of',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_stats_as_of, migrations.RunPython.noop),
+    ]
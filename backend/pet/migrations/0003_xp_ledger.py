@@ -0,0 +1,83 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:10
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    PetActivity = apps.get_model('pet', 'PetActivity')
+    PetActivityRollup = apps.get_model('pet', 'PetActivityRollup')
+    totals = (
+        PetActivity.objects.order_by()
+        .values('pet_id', 'activity_type')
+        .annotate(count=Count('id'), total_xp=Sum('xp_earned'))
+    )
+    PetActivityRollup.objects.bulk_create(
+        [PetActivityRollup(**row) for row in totals.iterator()],
+        batch_size=1000,
+    )
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0002_lazy_stat_decay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('mood_log', 'Mood Check-in'), ('journal', 'Journal Entry'), ('chat', 'Chat Session'), ('breathing', 'Breathing Exercise'), ('coping', 'Coping Exercise'), ('login', 'Daily Login'), ('streak_bonus', 'Streak Bonus'), ('game', 'Therapeutic Game')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('total_xp', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PetSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity_id', models.BigIntegerField()),
+                ('total_xp', models.IntegerField()),
+                ('level', models.IntegerField()),
+                ('experience', models.IntegerField()),
+                ('current_streak', models.IntegerField()),
+                ('longest_streak', models.IntegerField()),
+                ('last_interaction', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-last_activity_id'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='petactivity',
+            name='activity_type',
+            field=models.CharField(choices=[('mood_log', 'Mood Check-in'), ('journal', 'Journal Entry'), ('chat', 'Chat Session'), ('breathing', 'Breathing Exercise'), ('coping', 'Coping Exercise'), ('login', 'Daily Login'), ('streak_bonus', 'Streak Bonus'), ('game', 'Therapeutic Game')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='petactivity',
+            index=models.Index(fields=['pet', 'id'], name='pet_petacti_pet_id_8aa556_idx'),
+        ),
+        migrations.AddField(
+            model_name='petsnapshot',
+            name='pet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='pet.wellnesspet'),
+        ),
+        migrations.AddField(
+            model_name='petactivityrollup',
+            name='pet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='pet.wellnesspet'),
+        ),
+        migrations.AddIndex(
+            model_name='petsnapshot',
+            index=models.Index(fields=['pet', '-last_activity_id'], name='pet_petsnap_pet_id_e78b10_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='petactivityrollup',
+            unique_together={('pet', 'activity_type')},
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
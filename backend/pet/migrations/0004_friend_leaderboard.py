@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pet', '0003_xp_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FriendRankEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_xp', models.IntegerField(default=0)),
+                ('level', models.IntegerField(default=1)),
+                ('longest_streak', models.IntegerField(default=0)),
+                ('weekly_xp', models.IntegerField(default=0)),
+                ('week_start', models.DateField(blank=True, null=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_rank_entries', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-total_xp', 'subject'], name='pet_friendr_owner_i_011b67_idx'), models.Index(fields=['owner', '-longest_streak', 'subject'], name='pet_friendr_owner_i_fa6517_idx'), models.Index(fields=['owner', 'week_start', '-weekly_xp', 'subject'], name='pet_friendr_owner_i_5d527d_idx'), models.Index(fields=['subject'], name='pet_friendr_subject_c0bd69_idx')],
+                'unique_together': {('owner', 'subject')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:40
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def seed_opening_balances(apps, schema_editor):
+    """Snapshot every pet's current progress so replays keep pre-ledger XP"""
+    WellnessPet = apps.get_model('pet', 'WellnessPet')
+    PetActivity = apps.get_model('pet', 'PetActivity')
+    PetSnapshot = apps.get_model('pet', 'PetSnapshot')
+    last_activity = (
+        PetActivity.objects.filter(pet=OuterRef('pk')).order_by()
+        .values('pet').annotate(last=Max('id')).values('last')
+    )
+    pets = WellnessPet.objects.filter(snapshots__is_opening_balance=True)
+    pets = WellnessPet.objects.exclude(pk__in=pets).annotate(last_activity_id=Subquery(last_activity))
+    batch = []
+    for pet in pets.iterator(chunk_size=1000):
+        batch.append(PetSnapshot(
+            pet_id=pet.pk,
+            last_activity_id=pet.last_activity_id or 0,
+            total_xp=pet.total_xp,
+            level=pet.level,
+            experience=pet.experience,
+            current_streak=pet.current_streak,
+            longest_streak=pet.longest_streak,
+            last_interaction=pet.last_interaction,
+            is_opening_balance=True,
+        ))
+        if len(batch) >= 1000:
+            PetSnapshot.objects.bulk_create(batch)
+            batch = []
+    PetSnapshot.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0004_friend_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petsnapshot',
+            name='is_opening_balance',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,25 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
+
+# Daily stat decay while the user is away
+DECAY_PER_DAY = 5
+MAX_DECAY = 30
+MIN_DECAYED_STAT = 10
+
+def xp_for_next_level(level):
+    return 100 + (level * 50)
+
+
+# Accessories unlocked at each level
+LEVEL_UNLOCKS = {
+    2: 'bow',
+    3: 'hat',
+    5: 'glasses',
+    7: 'scarf',
+    10: 'crown',
+    15: 'wings',
+}
 
 
 class PetType(models.Model):
@@ -52,6 +70,9 @@ class WellnessPet(models.Model):
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
     last_interaction = models.DateField(null=True, blank=True)
+    # Day the stored happiness/energy were last brought up to date; decay
+    # since then is computed on read rather than written back
+    stats_as_of = models.DateField(null=True, blank=True)
     
     # Customization unlocks (JSON list of unlocked items)
     unlocked_accessories = models.JSONField(default=list)
@@ -63,10 +84,18 @@ class WellnessPet(models.Model):
     def __str__(self):
         return f"{self.name} (Level {self.level}) - {self.user.username}"
     
+    @property
+    def current_happiness(self):
+        return self._decayed(self.happiness)
+    
+    @property
+    def current_energy(self):
+        return self._decayed(self.energy)
+    
     @property
     def mood(self):
         """Calculate pet's current mood based on stats"""
-        avg = (self.happiness + self.energy + self.health) / 3
+        avg = (self.current_happiness + self.current_energy + self.health) / 3
         if avg >= 80:
             return 'ecstatic'
         elif avg >= 60:
@@ -81,88 +110,56 @@ class WellnessPet(models.Model):
     @property
     def xp_for_next_level(self):
         """XP needed for next level (increases each level)"""
-        return 100 + (self.level * 50)
+        return xp_for_next_level(self.level)
     
     @property
     def level_progress(self):
         """Progress to next level as percentage"""
         return min(100, int((self.experience / self.xp_for_next_level) * 100))
     
-    def add_experience(self, amount, activity_type='general'):
-        """Add XP and handle level ups"""
-        self.experience += amount
-        self.total_xp += amount
-        
-        leveled_up = False
-        while self.experience >= self.xp_for_next_level:
-            self.experience -= self.xp_for_next_level
-            self.level += 1
-            leveled_up = True
-            
-            # Boost stats on level up
-            self.happiness = min(100, self.happiness + 10)
-            self.energy = min(100, self.energy + 10)
-            
-            # Unlock accessories at certain levels
-            self._check_accessory_unlocks()
-        
-        self.save()
-        return leveled_up
-    
-    def _check_accessory_unlocks(self):
-        """Unlock accessories based on level"""
-        level_unlocks = {
-            2: 'bow',
-            3: 'hat',
-            5: 'glasses',
-            7: 'scarf',
-            10: 'crown',
-            15: 'wings',
-        }
-        for lvl, accessory in level_unlocks.items():
-            if self.level >= lvl and accessory not in self.unlocked_accessories:
-                self.unlocked_accessories.append(accessory)
-    
-    def update_streak(self):
-        """Update interaction streak"""
-        today = timezone.now().date()
+    def decay_since(self, today=None):
+        """Stat points lost to inactivity since stats_as_of.
         
+        Decay grows by DECAY_PER_DAY for each day since the last interaction,
+        up to MAX_DECAY, so it only depends on the stored dates and today.
+        """
         if self.last_interaction is None:
-            self.current_streak = 1
-        elif self.last_interaction == today:
-            pass  # Already interacted today
-        elif self.last_interaction == today - timedelta(days=1):
-            self.current_streak += 1
-        else:
-            # Streak broken
-            self.current_streak = 1
+            return 0
+        today = today or timezone.now().date()
+        
+        def total(day):
+            days_inactive = max(0, (day - self.last_interaction).days)
+            return min(MAX_DECAY, days_inactive * DECAY_PER_DAY)
         
-        self.last_interaction = today
-        self.longest_streak = max(self.longest_streak, self.current_streak)
-        self.save()
-    
-    def decay_stats(self):
-        """Called daily to decrease stats if no interaction"""
-        today = timezone.now().date()
-        if self.last_interaction and self.last_interaction < today:
-            days_inactive = (today - self.last_interaction).days
-            decay = min(30, days_inactive * 5)
-            
-            self.happiness = max(10, self.happiness - decay)
-            self.energy = max(10, self.energy - decay)
-            self.save()
+        anchor = max(self.stats_as_of or self.last_interaction, self.last_interaction)
+        return max(0, total(today) - total(anchor))
+    
+    def apply_decay(self, today=None):
+        """Write the decayed stats into the fields (caller saves)."""
+        today = today or timezone.now().date()
+        self.happiness = self._decayed(self.happiness, today)
+        self.energy = self._decayed(self.energy, today)
+        self.stats_as_of = today
+    
+    def _decayed(self, value, today=None):
+        decay = self.decay_since(today)
+        if not decay:
+            return value
+        return max(MIN_DECAYED_STAT, value - decay)
     
     def feed(self, boost_type='happiness'):
         """Boost a stat"""
+        self.apply_decay()
         if boost_type == 'happiness':
             self.happiness = min(100, self.happiness + 15)
         elif boost_type == 'energy':
             self.energy = min(100, self.energy + 15)
-        self.save()
+        # Leave XP and streak alone so a concurrent interaction isn't undone
+        self.save(update_fields=['happiness', 'energy', 'stats_as_of', 'updated_at'])
 
 
 class PetActivity(models.Model):
-    """Log of activities that affect the pet"""
+    """Append-only XP ledger; WellnessPet totals are materialized from it"""
     ACTIVITY_TYPES = [
         ('mood_log', 'Mood Check-in'),
         ('journal', 'Journal Entry'),
@@ -171,6 +168,7 @@ class PetActivity(models.Model):
         ('coping', 'Coping Exercise'),
         ('login', 'Daily Login'),
         ('streak_bonus', 'Streak Bonus'),
+        ('game', 'Therapeutic Game'),
     ]
     
     pet = models.ForeignKey(
@@ -192,6 +190,95 @@ class PetActivity(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Pet Activities'
+        indexes = [
+            models.Index(fields=['pet', 'id']),
+        ]
+
+
+class PetActivityRollup(models.Model):
+    """Per-type activity count and XP, kept in step with the ledger"""
+    pet = models.ForeignKey(
+        WellnessPet,
+        on_delete=models.CASCADE,
+        related_name='activity_rollups'
+    )
+    activity_type = models.CharField(max_length=20, choices=PetActivity.ACTIVITY_TYPES)
+    count = models.IntegerField(default=0)
+    total_xp = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.pet_id} {self.activity_type}: {self.count}"
+    
+    class Meta:
+        unique_together = ['pet', 'activity_type']
+
+
+class PetSnapshot(models.Model):
+    """Pet progress folded from the ledger up to last_activity_id.
+    
+    The opening balance holds the progress a pet had before the ledger
+    existed; replays never start earlier than it.
+    """
+    pet = models.ForeignKey(
+        WellnessPet,
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    last_activity_id = models.BigIntegerField()
+    total_xp = models.IntegerField()
+    level = models.IntegerField()
+    experience = models.IntegerField()
+    current_streak = models.IntegerField()
+    longest_streak = models.IntegerField()
+    last_interaction = models.DateField(null=True, blank=True)
+    is_opening_balance = models.BooleanField(default=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Snapshot of pet {self.pet_id} at activity {self.last_activity_id}"
+    
+    class Meta:
+        ordering = ['-last_activity_id']
+        indexes = [
+            models.Index(fields=['pet', '-last_activity_id']),
+        ]
+
+
+class FriendRankEntry(models.Model):
+    """One row of a user's precomputed friends leaderboard.
+    
+    Each owner has a row for themselves and every friend, holding a copy of
+    that subject's ranking stats. XP awards update the subject's rows in
+    place, so a leaderboard read is an index range scan on (owner, metric).
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='friend_rank_entries'
+    )
+    subject = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    total_xp = models.IntegerField(default=0)
+    level = models.IntegerField(default=1)
+    longest_streak = models.IntegerField(default=0)
+    weekly_xp = models.IntegerField(default=0)
+    week_start = models.DateField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.subject_id} on {self.owner_id}'s leaderboard"
+    
+    class Meta:
+        unique_together = ['owner', 'subject']
+        indexes = [
+            models.Index(fields=['owner', '-total_xp', 'subject']),
+            models.Index(fields=['owner', '-longest_streak', 'subject']),
+            models.Index(fields=['owner', 'week_start', '-weekly_xp', 'subject']),
+            models.Index(fields=['subject']),
+        ]
 
 
 # XP rewards for different activities
@@ -203,6 +290,7 @@ XP_REWARDS = {
     'coping': 20,
     'login': 5,
     'streak_bonus': 10,  # Per day of streak
+    'game': 15,
 }
 
 # Happiness boosts for activities
@@ -213,4 +301,5 @@ HAPPINESS_BOOSTS = {
     'breathing': 10,
     'coping': 10,
     'login': 3,
+    'game': 5,
 }
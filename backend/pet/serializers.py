@@ -27,6 +27,9 @@ class WellnessPetSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+    # Stored stats are as of stats_as_of; expose them with decay applied
+    happiness = serializers.IntegerField(source='current_happiness', read_only=True)
+    energy = serializers.IntegerField(source='current_energy', read_only=True)
     mood = serializers.CharField(read_only=True)
     xp_for_next_level = serializers.IntegerField(read_only=True)
     level_progress = serializers.IntegerField(read_only=True)
@@ -54,6 +57,12 @@ class WellnessPetSerializer(serializers.ModelSerializer):
         return PetActivitySerializer(activities, many=True).data
 
 
+class WellnessPetStateSerializer(WellnessPetSerializer):
+    """Pet fields without the recent activity list (no extra query)"""
+    class Meta(WellnessPetSerializer.Meta):
+        fields = [f for f in WellnessPetSerializer.Meta.fields if f != 'recent_activities']
+
+
 class PetInteractionSerializer(serializers.Serializer):
     """For logging pet interactions"""
     activity_type = serializers.ChoiceField(choices=PetActivity.ACTIVITY_TYPES)
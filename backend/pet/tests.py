@@ -1,3 +1,327 @@
-from django.test import TestCase
+import importlib
+import threading
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dost import events
+from . import interaction_service, leaderboard, ledger
+from .interaction_service import record_interaction
+from .models import WellnessPet, PetActivity, PetActivityRollup, FriendRankEntry
+
+User = get_user_model()
+
+
+class RecordInteractionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pet-owner', email='owner@example.com', password='x')
+        self.today = timezone.now().date()
+
+    def test_first_interaction_starts_streak(self):
+        result = record_interaction(self.user, 'journal', today=self.today)
+
+        pet = WellnessPet.objects.get(user=self.user)
+        self.assertEqual(pet.current_streak, 1)
+        self.assertEqual(pet.last_interaction, self.today)
+        self.assertEqual(result['streak_bonus'], 2)
+        self.assertEqual(result['xp_earned'], 27)
+        self.assertEqual(pet.total_xp, 27)
+        self.assertEqual(pet.happiness, 78)
+        self.assertEqual(pet.energy, 75)
+        self.assertEqual(PetActivity.objects.filter(pet=pet).count(), 1)
+
+    def test_streak_continues_from_yesterday_and_applies_decay(self):
+        yesterday = self.today - timedelta(days=1)
+        WellnessPet.objects.create(
+            user=self.user, current_streak=4, longest_streak=4,
+            last_interaction=yesterday, stats_as_of=yesterday,
+        )
+
+        record_interaction(self.user, 'chat', today=self.today)
+
+        pet = WellnessPet.objects.get(user=self.user)
+        self.assertEqual(pet.current_streak, 5)
+        self.assertEqual(pet.longest_streak, 5)
+        # 70 - 5 decay + 7 boost
+        self.assertEqual(pet.happiness, 72)
+
+    def test_level_up_unlocks_accessory(self):
+        WellnessPet.objects.create(user=self.user, experience=140)
+
+        result = record_interaction(self.user, 'journal', today=self.today)
+
+        pet = WellnessPet.objects.get(user=self.user)
+        self.assertTrue(result['leveled_up'])
+        self.assertEqual(pet.level, 2)
+        self.assertEqual(pet.experience, 17)
+        self.assertEqual(pet.unlocked_accessories, ['bow'])
+
+    def test_stale_snapshot_is_retried_without_losing_xp(self):
+        yesterday = self.today - timedelta(days=1)
+        WellnessPet.objects.create(
+            user=self.user, current_streak=1, last_interaction=yesterday, stats_as_of=yesterday,
+        )
+        stale = WellnessPet.objects.get(user=self.user)
+
+        # Another tab records the first interaction of the day after we read
+        record_interaction(self.user, 'chat', today=self.today)
+
+        real_load = interaction_service._load_pet
+        loads = iter([stale])
+        with mock.patch.object(
+            interaction_service, '_load_pet',
+            side_effect=lambda user: next(loads, None) or real_load(user)
+        ):
+            record_interaction(self.user, 'journal', today=self.today)
+
+        pet = WellnessPet.objects.get(user=self.user)
+        self.assertEqual(pet.current_streak, 2)
+        self.assertEqual(pet.total_xp, (10 + 4) + (25 + 4))
+        # Decay from yesterday is only applied once
+        self.assertEqual(pet.happiness, 70 - 5 + 7 + 8)
+
+
+class PetReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='x')
+        self.today = timezone.now().date()
+        three_days_ago = self.today - timedelta(days=3)
+        self.pet = WellnessPet.objects.create(
+            user=self.user, happiness=70, energy=12, last_interaction=three_days_ago, stats_as_of=three_days_ago,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def read(self, url='/api/pet/', days_later=0, **headers):
+        moment = timezone.now() + timedelta(days=days_later)
+        with mock.patch('django.utils.timezone.now', return_value=moment):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, **headers)
+        self.assertEqual([q['sql'] for q in queries if not q['sql'].startswith('SELECT')], [])
+        return response
+
+    def test_stats_decay_with_time_without_a_save(self):
+        updated_at = self.pet.updated_at
+        # Three idle days cost 15 points; energy stops at the floor
+        pet = self.read().json()
+        self.assertEqual((pet['happiness'], pet['energy']), (55, 10))
+        self.assertEqual(self.read(days_later=2).json()['happiness'], 45)
+        # Decay is capped however long the pet is left alone
+        self.assertEqual(self.read(days_later=30).json()['happiness'], 40)
+
+        self.pet.refresh_from_db()
+        self.assertEqual((self.pet.happiness, self.pet.energy, self.pet.updated_at), (70, 12, updated_at))
+
+    def test_repeated_reads_are_stable(self):
+        first, second = self.read(), self.read()
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('private', first['Cache-Control'])
+
+    def test_matching_etag_is_not_modified(self):
+        for url in ('/api/pet/', '/api/pet/stats/', '/api/pet/activities/'):
+            with self.subTest(url=url):
+                etag = self.read(url)['ETag']
+                not_modified = self.read(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified.content, b'')
+                # The next day's decay or an interaction changes the ETag
+                self.assertEqual(self.read(url, days_later=1, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.read()['ETag']
+        record_interaction(self.user, 'journal')
+        self.assertEqual(self.read(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger', email='ledger@example.com', password='x')
+        self.today = timezone.now().date()
+
+    def test_rollups_follow_interactions(self):
+        record_interaction(self.user, 'journal', today=self.today)
+        record_interaction(self.user, 'journal', today=self.today)
+        record_interaction(self.user, 'game', today=self.today)
+
+        pet = WellnessPet.objects.get(user=self.user)
+        self.assertEqual(ledger.breakdown(pet), [
+            {'activity_type': 'game', 'count': 1, 'total_xp': 17},
+            {'activity_type': 'journal', 'count': 2, 'total_xp': 54},
+        ])
+
+    def test_replay_from_snapshot_matches_materialized_pet(self):
+        for _ in range(4):
+            record_interaction(self.user, 'journal', today=self.today)
+        pet = WellnessPet.objects.get(user=self.user)
+        ledger.take_snapshot(pet)
+        for _ in range(4):
+            record_interaction(self.user, 'coping', today=self.today)
+        pet.refresh_from_db()
+
+        from_snapshot = ledger.replay(pet)
+        from_scratch = ledger.replay(pet, from_scratch=True)
+        self.assertEqual(from_snapshot, from_scratch)
+        for field in ledger.PROGRESS_FIELDS:
+            self.assertEqual(getattr(pet, field), from_scratch[field])
+
+    def test_rebuild_repairs_drift(self):
+        record_interaction(self.user, 'chat', today=self.today)
+        WellnessPet.objects.filter(user=self.user).update(total_xp=999, level=7)
+        PetActivityRollup.objects.all().delete()
+
+        pet = WellnessPet.objects.get(user=self.user)
+        ledger.rebuild(pet)
+
+        pet.refresh_from_db()
+        self.assertEqual((pet.total_xp, pet.level), (12, 1))
+        self.assertEqual(ledger.breakdown(pet), [{'activity_type': 'chat', 'count': 1, 'total_xp': 12}])
+
+    def test_replay_keeps_xp_earned_before_the_ledger(self):
+        # XP granted by the old add_experience path left no ledger rows
+        WellnessPet.objects.create(
+            user=self.user, total_xp=200, level=2, experience=50,
+            current_streak=3, longest_streak=5, last_interaction=self.today - timedelta(days=1),
+        )
+        opening_balance = importlib.import_module('pet.migrations.0005_opening_balance')
+        opening_balance.seed_opening_balances(django_apps, None)
+        record_interaction(self.user, 'journal', today=self.today)
+        pet = WellnessPet.objects.get(user=self.user)
+        ledger.take_snapshot(pet, keep=1)
+        ledger.take_snapshot(pet, keep=1)
+
+        for from_scratch in (False, True):
+            state = ledger.replay(pet, from_scratch=from_scratch)
+            for field in ledger.PROGRESS_FIELDS:
+                self.assertEqual(getattr(pet, field), state[field], field)
+        ledger.rebuild(pet, from_scratch=True)
+        pet.refresh_from_db()
+        self.assertGreater(pet.total_xp, 200)
+        self.assertEqual(pet.current_streak, 4)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.me, self.ana, self.raj = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('me', 'ana', 'raj')
+        ]
+        self.me.friends.add(self.ana, self.raj)
+
+    def usernames(self, user, metric='xp'):
+        return [row['username'] for row in leaderboard.board(user, metric, today=self.today)['entries']]
+
+    def test_board_is_built_lazily_and_updated_by_xp(self):
+        record_interaction(self.ana, 'journal', today=self.today)
+        self.assertTrue(leaderboard.ensure_board(self.me, today=self.today))
+        self.assertEqual(self.usernames(self.me), ['ana', 'me', 'raj'])
+
+        record_interaction(self.raj, 'journal', today=self.today)
+        record_interaction(self.raj, 'chat', today=self.today)
+        self.assertEqual(self.usernames(self.me), ['raj', 'ana', 'me'])
+        self.assertEqual(leaderboard.board(self.me, today=self.today)['my_rank'], 3)
+
+    def test_friendship_changes_update_built_boards(self):
+        leaderboard.ensure_board(self.me, today=self.today)
+        leaderboard.ensure_board(self.ana, today=self.today)
+        self.assertEqual(sorted(self.usernames(self.ana)), ['ana', 'me'])
+
+        newcomer = User.objects.create_user(username='zoe', email='zoe@example.com', password='x')
+        self.me.friends.add(newcomer)
+        self.assertIn('zoe', self.usernames(self.me))
+
+        self.me.friends.remove(self.ana)
+        self.assertNotIn('ana', self.usernames(self.me))
+        self.assertEqual(self.usernames(self.ana), ['ana'])
+
+    def test_weekly_rank_ignores_previous_weeks(self):
+        last_week = self.today - timedelta(days=7)
+        record_interaction(self.ana, 'journal', today=last_week)
+        leaderboard.ensure_board(self.me, today=last_week)
+        record_interaction(self.me, 'chat', today=self.today)
+
+        board = leaderboard.board(self.me, 'weekly', today=self.today)
+        self.assertEqual(board['entries'][0]['username'], 'me')
+        self.assertEqual([row['weekly_xp'] for row in board['entries']], [12, 0, 0])
+        self.assertEqual(FriendRankEntry.objects.filter(owner=self.me).count(), 3)
+
+
+class ActivityEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='events', email='events@example.com', password='x')
+
+    def test_batch_awards_xp_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with events.batch():
+                first = events.emit(self.user, 'mood_log', 'Logged mood')
+                second = events.emit(self.user, 'journal', 'Wrote journal entry')
+                self.assertEqual(first.results, {})
+
+        pet = WellnessPet.objects.get(user=self.user)
+        self.assertEqual(PetActivity.objects.filter(pet=pet).count(), 2)
+        self.assertEqual(second.results['pet']['total_xp'], pet.total_xp)
+
+    def test_rolled_back_batch_awards_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with events.batch():
+                    events.emit(self.user, 'journal')
+                    raise ValueError
+            events.emit(self.user, 'unknown-activity')
+
+        self.assertFalse(PetActivity.objects.exists())
+
+
+
+class ActivityEventResponseTests(TransactionTestCase):
+    def test_mood_entry_response_includes_pet_update(self):
+        user = User.objects.create_user(username='mood', email='mood@example.com', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post('/api/mood/entries/', {'mood_score': 4}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['pet']['xp_earned'], 17)
+        self.assertEqual(WellnessPet.objects.get(user=user).total_xp, 17)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'needs row-level locking')
+class ConcurrentInteractionTests(TransactionTestCase):
+    def test_parallel_interactions_do_not_lose_updates(self):
+        user = User.objects.create_user(username='racer', email='racer@example.com', password='x')
+        WellnessPet.objects.create(user=user)
+        threads, per_thread = 8, 5
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(per_thread):
+                    record_interaction(user, 'mood_log')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        pet = WellnessPet.objects.get(user=user)
+        activities = PetActivity.objects.filter(pet=pet)
+        self.assertEqual(activities.count(), threads * per_thread)
+        self.assertEqual(pet.total_xp, sum(activities.values_list('xp_earned', flat=True)))
+        self.assertEqual(pet.current_streak, 1)
@@ -3,12 +3,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 
-from .models import PetType, WellnessPet, PetActivity, XP_REWARDS, HAPPINESS_BOOSTS
+from .models import PetType, WellnessPet
 from .serializers import (
-    PetTypeSerializer, WellnessPetSerializer, PetActivitySerializer,
-    PetInteractionSerializer, PetFeedSerializer
+    PetTypeSerializer, WellnessPetSerializer, WellnessPetStateSerializer,
+    PetActivitySerializer, PetInteractionSerializer, PetFeedSerializer
 )
+from .interaction_service import record_interaction
+from .ledger import breakdown
+from . import leaderboard
 
 
 class PetTypeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -32,15 +36,27 @@ class WellnessPetViewSet(viewsets.ModelViewSet):
             user=self.request.user,
             defaults={'name': 'Buddy'}
         )
-        # Check for stat decay
-        pet.decay_stats()
+        # Decay is computed on read; it is only saved on the next interaction
         return pet
     
+    def _etag(self, pet, view):
+        """Pet reads only change when the row is saved or the day rolls over."""
+        return f'"pet-{pet.pk}-{view}-{pet.updated_at.timestamp()}-{timezone.now().date()}"'
+    
+    def _cached_response(self, request, pet, view, build):
+        etag = self._etag(pet, view)
+        not_modified = get_conditional_response(request, etag=etag)
+        response = not_modified or Response(build())
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
     def list(self, request):
         """Get user's pet (auto-create if doesn't exist)"""
         pet = self.get_object()
-        serializer = self.get_serializer(pet)
-        return Response(serializer.data)
+        return self._cached_response(
+            request, pet, 'detail', lambda: self.get_serializer(pet).data
+        )
     
     def create(self, request):
         """Create or update user's pet"""
@@ -63,43 +79,21 @@ class WellnessPetViewSet(viewsets.ModelViewSet):
         serializer = PetInteractionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        pet = self.get_object()
         activity_type = serializer.validated_data['activity_type']
-        description = serializer.validated_data.get('description', '')
-        
-        # Calculate rewards
-        xp = XP_REWARDS.get(activity_type, 10)
-        happiness_boost = HAPPINESS_BOOSTS.get(activity_type, 5)
-        
-        # Update pet streak
-        pet.update_streak()
-        
-        # Add streak bonus
-        streak_bonus = min(pet.current_streak * 2, 20)  # Max 20 bonus XP
-        
-        # Apply changes
-        pet.happiness = min(100, pet.happiness + happiness_boost)
-        pet.energy = min(100, pet.energy + 5)
-        
-        leveled_up = pet.add_experience(xp + streak_bonus, activity_type)
-        
-        # Log the activity
-        activity = PetActivity.objects.create(
-            pet=pet,
-            activity_type=activity_type,
-            xp_earned=xp + streak_bonus,
-            happiness_change=happiness_boost,
-            energy_change=5,
-            description=description or f"Completed {activity_type}"
+        result = record_interaction(
+            request.user,
+            activity_type,
+            serializer.validated_data.get('description', ''),
         )
+        pet = result['pet']
         
         response_data = {
-            'pet': WellnessPetSerializer(pet).data,
-            'activity': PetActivitySerializer(activity).data,
-            'xp_earned': xp + streak_bonus,
-            'streak_bonus': streak_bonus,
-            'leveled_up': leveled_up,
-            'message': self._get_pet_message(pet, activity_type, leveled_up)
+            'pet': WellnessPetStateSerializer(pet).data,
+            'activity': PetActivitySerializer(result['activity']).data,
+            'xp_earned': result['xp_earned'],
+            'streak_bonus': result['streak_bonus'],
+            'leveled_up': result['leveled_up'],
+            'message': self._get_pet_message(pet, activity_type, result['leveled_up'])
         }
         
         return Response(response_data)
@@ -133,7 +127,7 @@ class WellnessPetViewSet(viewsets.ModelViewSet):
             )
         
         pet.equipped_accessory = accessory
-        pet.save()
+        pet.save(update_fields=['equipped_accessory', 'updated_at'])
         
         return Response({
             'pet': WellnessPetSerializer(pet).data,
@@ -144,28 +138,42 @@ class WellnessPetViewSet(viewsets.ModelViewSet):
     def activities(self, request):
         """Get pet's activity history"""
         pet = self.get_object()
-        activities = pet.activities.all()[:20]
-        serializer = PetActivitySerializer(activities, many=True)
-        return Response(serializer.data)
+        return self._cached_response(
+            request, pet, 'activities',
+            lambda: PetActivitySerializer(pet.activities.all()[:20], many=True).data
+        )
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get pet stats summary"""
         pet = self.get_object()
-        
-        # Get activity counts by type
-        from django.db.models import Sum, Count
-        activity_summary = pet.activities.values('activity_type').annotate(
-            count=Count('id'),
-            total_xp=Sum('xp_earned')
-        )
-        
-        return Response({
+        return self._cached_response(request, pet, 'stats', lambda: self._stats(pet))
+    
+    def _stats(self, pet):
+        activity_summary = breakdown(pet)
+        return {
             'pet': WellnessPetSerializer(pet).data,
-            'total_activities': pet.activities.count(),
-            'activity_breakdown': list(activity_summary),
+            'total_activities': sum(row['count'] for row in activity_summary),
+            'activity_breakdown': activity_summary,
             'achievements': self._get_achievements(pet)
-        })
+        }
+    
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """Rank the user among their friends by XP, streak or weekly XP"""
+        metric = request.query_params.get('metric', 'xp')
+        if metric not in leaderboard.METRICS:
+            return Response(
+                {'error': f"metric must be one of: {', '.join(leaderboard.METRICS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        except ValueError:
+            limit = 50
+        
+        leaderboard.ensure_board(request.user)
+        return Response(leaderboard.board(request.user, metric, limit))
     
     def _get_pet_message(self, pet, activity_type, leveled_up):
         """Generate a cute message from the pet"""
@@ -0,0 +1,163 @@
+"""
+Background deletion of accounts and chat history.
+
+Deleting a user with ``user.delete()`` makes Django's collector load every
+dependent row (messages, mood and journal entries, pet activity, crisis
+logs, notifications, ...) into memory and send signals for each before
+issuing the deletes, which times out for long-time users. Instead a request
+only records a DeletionJob (and, for an account, deactivates the user so
+their tokens stop working) and the rows are removed afterwards on a worker
+thread, one table at a time, with bounded ``DELETE ... WHERE id IN (...)``
+statements, children before parents.
+
+The tables to clear are found by walking the cascading foreign keys that
+lead to the root model, so new user-owned models are picked up without
+changes here. Other ``on_delete`` behaviours are left to the final ORM
+delete of the root rows, which has nothing left to cascade by then. Model
+signals are not sent for the rows removed in batches.
+
+Jobs save their progress after every batch. A job whose worker died is
+picked up again by the process_deletions command; re-running is safe since
+every batch re-selects what is left.
+"""
+import logging
+import threading
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from chat.models import Conversation
+from .models import DeletionJob
+
+logger = logging.getLogger(__name__)
+
+# A running job not updated for this long is assumed to have lost its worker
+STALE_AFTER = timedelta(minutes=10)
+
+
+@lru_cache(maxsize=None)
+def plan(model):
+    """``(model, lookup)`` pairs to delete before ``model``, children first.
+
+    ``lookup`` leads from the child to the root's primary key.
+    """
+    return tuple(_plan(model, model, '', ()))
+
+
+def _plan(root, model, path, seen):
+    for rel in model._meta.get_fields(include_hidden=True):
+        if not (rel.auto_created and not rel.concrete and (rel.one_to_many or rel.one_to_one)):
+            continue
+        if rel.on_delete is not models.CASCADE:
+            continue
+        child = rel.related_model
+        if child is root or child in seen:
+            continue
+        lookup = f'{rel.field.name}__{path}' if path else rel.field.name
+        yield from _plan(root, child, lookup, seen + (model,))
+        yield child, lookup
+
+
+def schedule(user, scope):
+    """Queue the deletion of ``user``'s account or chat history; returns the job"""
+    with transaction.atomic():
+        job = DeletionJob.objects.filter(
+            user_id=user.pk, scope=scope, status__in=('pending', 'running')
+        ).first()
+        if job is None:
+            job = DeletionJob.objects.create(user_id=user.pk, scope=scope)
+            transaction.on_commit(lambda: start(job.pk))
+        if scope == 'account' and user.is_active:
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+    return job
+
+
+def start(job_id):
+    threading.Thread(target=_run_in_background, args=(job_id,), name=f'deletion-{job_id}', daemon=True).start()
+
+
+def _run_in_background(job_id):
+    try:
+        run(job_id)
+    finally:
+        connections.close_all()
+
+
+def claimable(now=None):
+    """Jobs nobody is working on: queued ones and running ones gone stale"""
+    now = now or timezone.now()
+    return DeletionJob.objects.filter(
+        Q(status='pending') | Q(status='running', updated_at__lt=now - STALE_AFTER)
+    )
+
+
+def run(job_id, batch_size=None):
+    """Delete everything a job covers; returns the job, or None if it was taken"""
+    batch_size = batch_size or settings.DATA_DELETION_BATCH_SIZE
+    # Claim the job so two workers never run it at once
+    if not claimable().filter(pk=job_id).update(status='running', updated_at=timezone.now()):
+        return None
+    job = DeletionJob.objects.get(pk=job_id)
+
+    try:
+        if job.scope == 'account':
+            _delete_tree(job, get_user_model(), [job.user_id], batch_size)
+            get_user_model().objects.filter(pk=job.user_id).delete()
+        else:
+            # Conversations started after the request are kept
+            conversations = Conversation.objects.filter(
+                user_id=job.user_id, created_at__lte=job.created_at
+            ).order_by().values_list('pk', flat=True)
+            while True:
+                ids = list(conversations[:batch_size])
+                if not ids:
+                    break
+                _delete_tree(job, Conversation, ids, batch_size)
+                _record(job, Conversation, _delete_rows(Conversation, ids))
+    except Exception as exc:
+        logger.exception('Deletion job %s failed', job.pk)
+        job.status = 'failed'
+        job.error = str(exc)
+    else:
+        job.status = 'finished'
+        job.current_table = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'current_table', 'finished_at', 'updated_at'])
+    return job
+
+
+def _delete_tree(job, root, root_ids, batch_size):
+    """Delete the rows of every table cascading from ``root_ids``"""
+    for model, lookup in plan(root):
+        rows = model._base_manager.filter(**{f'{lookup}__in': root_ids}).order_by().values_list('pk', flat=True)
+        while True:
+            ids = list(rows[:batch_size])
+            if not ids:
+                break
+            _record(job, model, _delete_rows(model, ids))
+
+
+def _delete_rows(model, ids):
+    meta = model._meta
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(meta.db_table)} WHERE {quote(meta.pk.column)} IN ({placeholders})',
+            ids,
+        )
+        return cursor.rowcount
+
+
+def _record(job, model, deleted):
+    label = model._meta.label
+    job.current_table = label
+    job.progress[label] = job.progress.get(label, 0) + deleted
+    job.rows_deleted += deleted
+    job.save(update_fields=['current_table', 'progress', 'rows_deleted', 'updated_at'])
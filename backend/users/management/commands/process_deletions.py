@@ -0,0 +1,47 @@
+"""
+Run queued account and chat history deletions.
+
+Deletions normally run on a thread started by the request; this picks up
+jobs whose worker was stopped part-way. Run it from cron, or keep it running:
+
+    python manage.py process_deletions --every 300
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users import deletion
+
+
+class Command(BaseCommand):
+    help = 'Run pending deletion jobs and resume ones left unfinished.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0,
+            help='Repeat every N seconds instead of running once'
+        )
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            self._run_once(options)
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+            close_old_connections()
+
+    def _run_once(self, options):
+        finished = failed = 0
+        for job_id in list(deletion.claimable().order_by('created_at').values_list('pk', flat=True)):
+            job = deletion.run(job_id, batch_size=options['batch_size'])
+            if job is None:
+                continue
+            if job.status == 'finished':
+                finished += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Deletion job {job.pk} failed: {job.error}")
+        if finished or failed or options['verbosity'] > 1:
+            self.stdout.write(f"Finished {finished} deletion job(s), {failed} failed.")
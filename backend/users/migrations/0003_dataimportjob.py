@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_friends_user_invite_code_user_invited_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('mood', 'Mood entries'), ('journal', 'Journal entries'), ('coping', 'Coping tool usage')], max_length=10)),
+                ('format', models.CharField(choices=[('ndjson', 'NDJSON'), ('csv', 'CSV')], default='ndjson', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Waiting for upload'), ('running', 'Importing'), ('finished', 'Finished'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('rows_read', models.IntegerField(default=0)),
+                ('rows_imported', models.IntegerField(default=0)),
+                ('rows_skipped', models.IntegerField(default=0)),
+                ('rows_failed', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
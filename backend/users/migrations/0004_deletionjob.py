@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_dataimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(db_index=True)),
+                ('scope', models.CharField(choices=[('account', 'Whole account'), ('chat', 'Chat history')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Queued'), ('running', 'Deleting'), ('finished', 'Finished'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('current_table', models.CharField(blank=True, max_length=100)),
+                ('rows_deleted', models.BigIntegerField(default=0)),
+                ('progress', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='users_delet_status_70e6f3_idx')],
+            },
+        ),
+    ]
@@ -52,3 +52,84 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"Profile of {self.user.email}"
+
+
+class DataImportJob(models.Model):
+    """Progress of a bulk import of mood, journal or coping history."""
+    
+    KIND_CHOICES = [
+        ('mood', 'Mood entries'),
+        ('journal', 'Journal entries'),
+        ('coping', 'Coping tool usage'),
+    ]
+    FORMAT_CHOICES = [
+        ('ndjson', 'NDJSON'),
+        ('csv', 'CSV'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Waiting for upload'),
+        ('running', 'Importing'),
+        ('finished', 'Finished'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_jobs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='ndjson')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    
+    rows_read = models.IntegerField(default=0)
+    rows_imported = models.IntegerField(default=0)
+    rows_skipped = models.IntegerField(default=0)  # Duplicates of existing rows
+    rows_failed = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # First few [line, message] pairs
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.kind} import for {self.user.email} ({self.status})"
+
+
+class DeletionJob(models.Model):
+    """Progress of deleting a user's account or chat history in the background.
+    
+    Keeps the user's id rather than a foreign key so the job outlives the account.
+    """
+    
+    SCOPE_CHOICES = [
+        ('account', 'Whole account'),
+        ('chat', 'Chat history'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Queued'),
+        ('running', 'Deleting'),
+        ('finished', 'Finished'),
+        ('failed', 'Failed'),
+    ]
+    
+    user_id = models.BigIntegerField(db_index=True)
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    
+    current_table = models.CharField(max_length=100, blank=True)
+    rows_deleted = models.BigIntegerField(default=0)
+    progress = models.JSONField(default=dict, blank=True)  # Rows deleted per table
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} deletion for user {self.user_id} ({self.status})"
@@ -0,0 +1,438 @@
+"""
+Bulk import and export of mood, journal and coping history.
+
+Imports read an NDJSON or CSV stream line by line, validate rows in chunks of
+CHUNK_SIZE and write each chunk with one bulk_create, committing progress on
+the DataImportJob after every chunk so the client can poll it. The upload
+view only spools the file (in memory, then on disk past SPOOL_MAX_SIZE) and
+the import runs on a background thread, so a large file does not hold a
+request worker for the whole import. Mood entries
+upsert on their (user, date) uniqueness; journal entries and coping usage
+skip rows whose timestamp the user already has, so re-running an import is
+safe. Bulk writes skip model signals, so touched heatmap years are dropped
+explicitly at the end.
+
+Exports stream the same columns back with iterator(), a chunk of rows per
+response chunk, in a form the importer accepts. The full account export
+(export_archive) streams a zip with one NDJSON file per kind of data, written
+through a non-seekable zip stream so the first bytes go out before the
+largest table has been read.
+"""
+import csv
+import io
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from chat.models import ArchivedMessage, Conversation, CrisisLog, Message
+from coping.models import CopingTool, CopingToolUsage
+from games.models import EmotionGameRecommendation, GameSession, Player
+from insights.models import InsightNotification, MoodAnalysis, TriggerPattern
+from journal.models import JournalEntry
+from mood import heatmap
+from mood.models import MoodEntry, MoodInsight
+from pet.models import PetActivity, WellnessPet
+from .models import DataImportJob, UserProfile
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+MAX_ERRORS = 50
+SPOOL_MAX_SIZE = 1024 * 1024
+# CSV cells holding lists use this separator
+LIST_SEPARATOR = ';'
+
+
+def _text(row, field, max_length=None):
+    value = row.get(field)
+    value = '' if value is None else str(value)
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{field} is longer than {max_length} characters')
+    return value
+
+
+def _int(row, field, low, high, required=False):
+    value = row.get(field)
+    if value in (None, ''):
+        if required:
+            raise ValueError(f'{field} is required')
+        return None
+    number = int(value)
+    if not low <= number <= high:
+        raise ValueError(f'{field} must be between {low} and {high}')
+    return number
+
+
+def _bool(row, field, default):
+    value = row.get(field)
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+
+def _list(row, field):
+    value = row.get(field)
+    if value in (None, ''):
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [item.strip() for item in str(value).split(LIST_SEPARATOR) if item.strip()]
+
+
+def _date(row, field):
+    value = parse_date(str(row.get(field) or ''))
+    if value is None:
+        raise ValueError(f'{field} must be a YYYY-MM-DD date')
+    return value
+
+
+def _datetime(row, field, default_date=None):
+    raw = str(row.get(field) or '')
+    value = parse_datetime(raw)
+    if value is None:
+        day = parse_date(raw) or default_date
+        if day is None:
+            raise ValueError(f'{field} must be an ISO date or date-time')
+        value = datetime.combine(day, time(12))
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class MoodImporter:
+    model = MoodEntry
+    fields = ('date', 'mood_score', 'emotions', 'note', 'activities', 'sleep_quality', 'energy_level', 'created_at')
+    list_fields = ('emotions', 'activities')
+    order_by = 'date'
+    update_fields = ['mood_score', 'emotions', 'note', 'activities', 'sleep_quality', 'energy_level', 'updated_at']
+
+    def build(self, user, row):
+        day = _date(row, 'date')
+        return MoodEntry(
+            user=user,
+            date=day,
+            mood_score=_int(row, 'mood_score', 1, 5, required=True),
+            emotions=_list(row, 'emotions'),
+            note=_text(row, 'note'),
+            activities=_list(row, 'activities'),
+            sleep_quality=_int(row, 'sleep_quality', 1, 5),
+            energy_level=_int(row, 'energy_level', 1, 5),
+            created_at=_datetime(row, 'created_at', default_date=day),
+        )
+
+    def write(self, user, objs):
+        """Upsert on (user, date); returns (imported, skipped)"""
+        # A file may repeat a day; the last row wins, as it would on upsert
+        by_date = {obj.date: obj for obj in objs}
+        MoodEntry.objects.bulk_create(
+            list(by_date.values()),
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=self.update_fields,
+        )
+        return len(by_date), len(objs) - len(by_date)
+
+
+class JournalImporter:
+    model = JournalEntry
+    fields = ('created_at', 'title', 'content', 'tags', 'mood_at_writing', 'is_private')
+    list_fields = ('tags',)
+    order_by = 'created_at'
+
+    def build(self, user, row):
+        content = _text(row, 'content')
+        if not content:
+            raise ValueError('content is required')
+        return JournalEntry(
+            user=user,
+            title=_text(row, 'title', max_length=255),
+            content=content,
+            tags=_list(row, 'tags'),
+            mood_at_writing=_int(row, 'mood_at_writing', 1, 5),
+            is_private=_bool(row, 'is_private', True),
+            # Imported entries already happened; no AI reflection for them
+            ai_reflection_enabled=False,
+            created_at=_datetime(row, 'created_at'),
+        )
+
+    def write(self, user, objs):
+        return _insert_new(objs, lambda obj: obj.created_at, JournalEntry.objects.filter(
+            user=user, created_at__in=[obj.created_at for obj in objs]
+        ).values_list('created_at', flat=True))
+
+
+class CopingImporter:
+    model = CopingToolUsage
+    fields = ('created_at', 'tool', 'tool__title', 'completed', 'mood_before', 'mood_after', 'feedback')
+    list_fields = ()
+    order_by = 'created_at'
+
+    def __init__(self):
+        tools = list(CopingTool.objects.values_list('id', 'title'))
+        self.tool_ids = {tool_id for tool_id, _ in tools}
+        self.tools_by_title = {title.strip().lower(): tool_id for tool_id, title in tools}
+
+    def build(self, user, row):
+        tool_id = None
+        if row.get('tool') not in (None, ''):
+            tool_id = int(row['tool'])
+        elif row.get('tool__title'):
+            tool_id = self.tools_by_title.get(str(row['tool__title']).strip().lower())
+        if tool_id not in self.tool_ids:
+            raise ValueError('tool must be a known coping tool id or tool__title')
+        return CopingToolUsage(
+            user=user,
+            tool_id=tool_id,
+            completed=_bool(row, 'completed', False),
+            mood_before=_int(row, 'mood_before', 1, 5),
+            mood_after=_int(row, 'mood_after', 1, 5),
+            feedback=_text(row, 'feedback'),
+            created_at=_datetime(row, 'created_at'),
+        )
+
+    def write(self, user, objs):
+        return _insert_new(objs, lambda obj: (obj.tool_id, obj.created_at), CopingToolUsage.objects.filter(
+            user=user, created_at__in=[obj.created_at for obj in objs]
+        ).values_list('tool_id', 'created_at'))
+
+
+IMPORTERS = {
+    'mood': MoodImporter,
+    'journal': JournalImporter,
+    'coping': CopingImporter,
+}
+
+
+def _insert_new(objs, key, existing):
+    """bulk_create the objects whose key is not in ``existing``; returns (imported, skipped)"""
+    seen = set(existing)
+    new = []
+    for obj in objs:
+        if key(obj) not in seen:
+            seen.add(key(obj))
+            new.append(obj)
+    type(objs[0]).objects.bulk_create(new)
+    return len(new), len(objs) - len(new)
+
+
+def _chunks(lines, fmt):
+    """``[(line_number, row_or_error), ...]`` chunks from an iterable of byte lines"""
+    text = (line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in lines)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        rows = ((reader.line_num, row) for row in reader)
+    else:
+        rows = _ndjson(text)
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _ndjson(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, ValueError('not valid JSON')
+            continue
+        yield number, row if isinstance(row, dict) else ValueError('each line must be a JSON object')
+
+
+def run_import(job, lines):
+    """Import ``lines`` (an iterable of bytes or str) into ``job``'s user"""
+    importer = IMPORTERS[job.kind]()
+    job.status = 'running'
+    job.save(update_fields=['status', 'updated_at'])
+    years = set()
+    try:
+        for chunk in _chunks(lines, job.format):
+            objs = []
+            for number, row in chunk:
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    objs.append(importer.build(job.user, row))
+                except (ValueError, TypeError) as e:
+                    job.rows_failed += 1
+                    if len(job.errors) < MAX_ERRORS:
+                        job.errors.append([number, str(e)])
+            job.rows_read += len(chunk)
+            with transaction.atomic():
+                if objs:
+                    imported, skipped = importer.write(job.user, objs)
+                    job.rows_imported += imported
+                    job.rows_skipped += skipped
+                job.save()
+            years.update(
+                (obj.date if job.kind == 'mood' else timezone.localdate(obj.created_at)).year for obj in objs
+            )
+        job.status = 'finished'
+    except Exception as e:
+        logger.exception('Import job %s failed', job.pk)
+        job.status = 'failed'
+        job.errors.append([job.rows_read, f'Import stopped: {e}'])
+    finally:
+        job.finished_at = timezone.now()
+        job.save()
+        for year in years:
+            heatmap.invalidate(job.user.pk, year)
+    return job
+
+
+def spool(source):
+    """Copy a readable upload (file or request body) into a temporary file"""
+    upload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    shutil.copyfileobj(source, upload, 64 * 1024)
+    upload.seek(0)
+    return upload
+
+
+def start_import(job_id, upload):
+    threading.Thread(target=_import_in_background, args=(job_id, upload), name=f'import-{job_id}', daemon=True).start()
+
+
+def _import_in_background(job_id, upload):
+    try:
+        import_upload(job_id, upload)
+    finally:
+        connections.close_all()
+
+
+def import_upload(job_id, upload):
+    """Run ``job_id``'s import from a spooled upload, closing it afterwards"""
+    with upload:
+        return run_import(DataImportJob.objects.select_related('user').get(pk=job_id), upload)
+
+
+def export_chunks(user, kind, fmt='ndjson', chunk_size=CHUNK_SIZE):
+    """Yield the user's ``kind`` rows as NDJSON or CSV text, a chunk at a time"""
+    importer = IMPORTERS[kind]
+    rows = importer.model.objects.filter(user=user).order_by(importer.order_by, 'pk').values(
+        *importer.fields
+    ).iterator(chunk_size=chunk_size)
+
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=importer.fields, extrasaction='ignore')
+        writer.writeheader()
+    count = 0
+    for row in rows:
+        if writer:
+            for field in importer.list_fields:
+                row[field] = LIST_SEPARATOR.join(row[field] or [])
+            writer.writerow({field: _csv_value(value) for field, value in row.items()})
+        else:
+            buffer.write(json.dumps(row, cls=DjangoJSONEncoder))
+            buffer.write('\n')
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# Account fields worth handing back; credentials and internal flags stay out
+PROFILE_FIELDS = (
+    'email', 'username', 'first_name', 'last_name', 'avatar', 'preferred_tone', 'is_anonymous',
+    'onboarding_completed', 'data_collection_consent', 'reminder_enabled', 'reminder_time',
+    'created_at', 'date_joined', 'last_login',
+)
+
+
+def archive_sections(user):
+    """``(file name, queryset)`` for every kind of data held about ``user``"""
+    return [
+        ('profile.ndjson', type(user).objects.filter(pk=user.pk).values(*PROFILE_FIELDS)),
+        ('profile_details.ndjson', UserProfile.objects.filter(user=user).values()),
+        ('conversations.ndjson', Conversation.objects.filter(user=user).order_by('pk').values()),
+        ('messages.ndjson', Message.objects.filter(conversation__user=user).order_by('pk').values()),
+        ('archived_messages.ndjson', ArchivedMessage.objects.filter(conversation__user=user).order_by('pk').values()),
+        ('crisis_logs.ndjson', CrisisLog.objects.filter(user=user).order_by('pk').values()),
+        ('mood_entries.ndjson', MoodEntry.objects.filter(user=user).order_by('pk').values()),
+        ('mood_insights.ndjson', MoodInsight.objects.filter(user=user).order_by('pk').values()),
+        ('journal_entries.ndjson', JournalEntry.objects.filter(user=user).order_by('pk').values()),
+        ('coping_usage.ndjson', CopingToolUsage.objects.filter(user=user).order_by('pk').values(
+            'id', 'tool_id', 'tool__title', 'completed', 'mood_before', 'mood_after', 'feedback', 'created_at',
+        )),
+        ('pet.ndjson', WellnessPet.objects.filter(user=user).values()),
+        ('pet_activities.ndjson', PetActivity.objects.filter(pet__user=user).order_by('pk').values()),
+        ('trigger_patterns.ndjson', TriggerPattern.objects.filter(user=user).order_by('pk').values()),
+        ('insight_notifications.ndjson', InsightNotification.objects.filter(user=user).order_by('pk').values()),
+        ('mood_analyses.ndjson', MoodAnalysis.objects.filter(user=user).order_by('pk').values()),
+        ('game_sessions.ndjson', GameSession.objects.filter(user=user).order_by('pk').values(
+            'id', 'game_id', 'game__name', *(
+                field.attname for field in GameSession._meta.concrete_fields
+                if field.attname not in ('id', 'user_id', 'game_id')
+            ),
+        )),
+        ('multiplayer_games.ndjson', Player.objects.filter(user=user).order_by('pk').values(
+            'id', 'game_session__room_code', 'game_session__game_type', 'game_session__status',
+            'game_session__created_at', *(
+                field.attname for field in Player._meta.concrete_fields
+                if field.attname not in ('id', 'user_id', 'game_session_id')
+            ),
+        )),
+        ('game_recommendations.ndjson', EmotionGameRecommendation.objects.filter(user=user).order_by('pk').values()),
+        ('import_jobs.ndjson', DataImportJob.objects.filter(user=user).order_by('pk').values()),
+    ]
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands zip bytes back as they are produced."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def export_archive(user, chunk_size=CHUNK_SIZE):
+    """Yield a zip of NDJSON files with all of ``user``'s data, chunk by chunk"""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, queryset in archive_sections(user):
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for count, row in enumerate(queryset.iterator(chunk_size=chunk_size), 1):
+                    entry.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8'))
+                    entry.write(b'\n')
+                    if count % chunk_size == 0:
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
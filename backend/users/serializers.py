@@ -2,7 +2,7 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from .models import UserProfile
+from .models import DataImportJob, DeletionJob, UserProfile
 
 User = get_user_model()
 
@@ -88,3 +88,27 @@ class OnboardingSerializer(serializers.Serializer):
     age_range = serializers.CharField(required=False, allow_blank=True)
     primary_concerns = serializers.ListField(child=serializers.CharField(), required=False)
     coping_preferences = serializers.ListField(child=serializers.CharField(), required=False)
+
+
+class DataImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataImportJob
+        fields = [
+            'id', 'kind', 'format', 'status',
+            'rows_read', 'rows_imported', 'rows_skipped', 'rows_failed', 'errors',
+            'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'status', 'rows_read', 'rows_imported', 'rows_skipped', 'rows_failed', 'errors',
+            'created_at', 'updated_at', 'finished_at'
+        ]
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'scope', 'status', 'current_table', 'rows_deleted', 'progress',
+            'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
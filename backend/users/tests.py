@@ -0,0 +1,236 @@
+import io
+import json
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.models import Conversation, CrisisLog, Message
+from coping.models import CopingTool, CopingToolUsage
+from games.models import GameSession, MultiplayerGameSession, Player, TherapeuticGame
+from insights.models import InsightNotification, TriggerPattern
+from journal.models import JournalEntry
+from mood.models import MoodEntry
+from pet.interaction_service import record_interaction
+from pet.models import PetActivity, WellnessPet
+from . import deletion, portability
+from .models import DataImportJob, DeletionJob, UserProfile
+
+User = get_user_model()
+
+
+def make_history(user):
+    """One row or so in every table the export and deletion cover"""
+    UserProfile.objects.create(user=user, bio='hello')
+    conversation = Conversation.objects.create(user=user, title='First chat')
+    message = Message.objects.create(conversation=conversation, role='user', content='I feel low', is_crisis=True)
+    Message.objects.create(conversation=conversation, role='assistant', content="I'm here")
+    CrisisLog.objects.create(user=user, message=message, trigger_phrase='low', response_given="I'm here")
+    MoodEntry.objects.create(user=user, mood_score=3, emotions=['calm'])
+    JournalEntry.objects.create(user=user, title='Day one', content='Wrote things')
+    tool = CopingTool.objects.create(title='Box breathing', description='', category='breathing')
+    CopingToolUsage.objects.create(user=user, tool=tool, completed=True)
+    record_interaction(user, 'journal')
+    pattern = TriggerPattern.objects.create(
+        user=user, trigger_type='time', emotion_type='stress', pattern_name='Morning Blues',
+        description='', time_of_day='morning', confidence_score=0.8,
+    )
+    InsightNotification.objects.create(
+        user=user, trigger_pattern=pattern, notification_type='trigger_alert', title='Heads up', message='',
+    )
+    game = TherapeuticGame.objects.create(
+        name='Zen Garden', description='', emotion_category='anxiety', game_type='relaxing',
+        therapeutic_benefit='Calms',
+    )
+    GameSession.objects.create(user=user, game=game, emotion_before='anxious')
+    room = MultiplayerGameSession.objects.create(host=user)
+    Player.objects.create(user=user, game_session=room, symbol='X')
+
+
+class ExportArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', email='exporter@example.com', password='pw')
+        make_history(self.user)
+
+    def read_archive(self, data):
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(archive.testzip())
+        return {
+            name: [json.loads(line) for line in archive.read(name).decode('utf-8').splitlines()]
+            for name in archive.namelist()
+        }
+
+    def test_archive_holds_every_section(self):
+        files = self.read_archive(b''.join(portability.export_archive(self.user, chunk_size=1)))
+        self.assertEqual(
+            sorted(files), sorted(name for name, _ in portability.archive_sections(self.user))
+        )
+        self.assertNotIn('password', files['profile.ndjson'][0])
+        self.assertEqual(len(files['messages.ndjson']), 2)
+        self.assertEqual(files['game_sessions.ndjson'][0]['game__name'], 'Zen Garden')
+        self.assertEqual(files['multiplayer_games.ndjson'][0]['symbol'], 'X')
+        self.assertEqual(len(files['pet_activities.ndjson']), 1)
+
+    def test_export_view_streams_a_complete_zip(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/auth/data/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        files = self.read_archive(b''.join(response.streaming_content))
+        self.assertEqual(files['journal_entries.ndjson'][0]['title'], 'Day one')
+
+
+class DeletionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='leaving', email='leaving@example.com', password='pw')
+        self.other = User.objects.create_user(username='staying', email='staying@example.com', password='pw')
+        make_history(self.user)
+        Conversation.objects.create(user=self.other, title='Not mine')
+        record_interaction(self.other, 'chat')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_plan_deletes_children_before_parents(self):
+        steps = [(model._meta.label, lookup) for model, lookup in deletion.plan(User)]
+        self.assertIn(('chat.Message', 'conversation__user'), steps)
+        self.assertIn(('chat.CrisisLog', 'message__conversation__user'), steps)
+        self.assertIn(('pet.PetActivity', 'pet__user'), steps)
+        self.assertIn(('games.Player', 'game_session__host'), steps)
+        labels = [label for label, _ in steps]
+        self.assertLess(labels.index('chat.CrisisLog'), labels.index('chat.Message'))
+        self.assertLess(labels.index('chat.Message'), labels.index('chat.Conversation'))
+        self.assertLess(labels.index('pet.PetActivity'), labels.index('pet.WellnessPet'))
+
+    def test_account_is_deactivated_then_deleted_in_batches(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete('/api/auth/delete-account/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(callbacks), 1)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        job = DeletionJob.objects.get(pk=response.json()['job']['id'])
+        self.assertEqual((job.scope, job.status), ('account', 'pending'))
+
+        job = deletion.run(job.pk, batch_size=1)
+        self.assertEqual(job.status, 'finished')
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(job.progress['chat.Message'], 2)
+        self.assertEqual(job.rows_deleted, sum(job.progress.values()))
+        self.assertFalse(Message.objects.filter(conversation__user_id=self.user.pk).exists())
+        self.assertFalse(MoodEntry.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(WellnessPet.objects.filter(user_id=self.user.pk).exists())
+        # Nobody else's data goes with it
+        self.assertTrue(Conversation.objects.filter(user=self.other).exists())
+        self.assertEqual(PetActivity.objects.filter(pet__user=self.other).count(), 1)
+
+    def test_repeated_requests_share_one_job(self):
+        first = deletion.schedule(self.user, 'account')
+        self.assertEqual(deletion.schedule(self.user, 'account'), first)
+
+    def test_stale_running_job_is_resumed(self):
+        job = DeletionJob.objects.create(user_id=self.user.pk, scope='chat')
+        DeletionJob.objects.filter(pk=job.pk).update(status='running', updated_at=timezone.now())
+        self.assertFalse(deletion.claimable().filter(pk=job.pk).exists())
+        self.assertIsNone(deletion.run(job.pk))
+
+        DeletionJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - deletion.STALE_AFTER - timedelta(minutes=1)
+        )
+        self.assertTrue(deletion.claimable().filter(pk=job.pk).exists())
+        self.assertEqual(deletion.run(job.pk).status, 'finished')
+        self.assertFalse(Conversation.objects.filter(user=self.user).exists())
+
+    def test_chat_history_keeps_conversations_started_afterwards(self):
+        response = self.client.delete('/api/chat/delete-history/')
+        self.assertEqual(response.status_code, 202)
+        job = DeletionJob.objects.get(pk=response.json()['job']['id'])
+        newer = Conversation.objects.create(user=self.user, title='After the request')
+        Conversation.objects.filter(pk=newer.pk).update(created_at=job.created_at + timedelta(seconds=1))
+
+        job = deletion.run(job.pk, batch_size=1)
+        self.assertEqual(job.status, 'finished')
+        self.assertEqual(list(Conversation.objects.filter(user=self.user)), [newer])
+        self.assertFalse(CrisisLog.objects.filter(user=self.user).exists())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertTrue(MoodEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get(f'/api/auth/deletions/{job.pk}/').json()['status'], 'finished')
+
+
+class DataImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', email='importer@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, kind, body, fmt='ndjson'):
+        """Create a job and upload ``body``, running the background import inline"""
+        job = self.client.post('/api/auth/data/imports/', {'kind': kind, 'format': fmt}, format='json').json()
+        self.assertEqual(job['status'], 'pending')
+        with mock.patch.object(portability, 'start_import', portability.import_upload):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = self.client.put(
+                    f"/api/auth/data/imports/{job['id']}/upload/", body.encode('utf-8'), content_type='text/plain',
+                )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'running')
+        self.assertEqual(len(callbacks), 1)
+        return DataImportJob.objects.get(pk=job['id'])
+
+    def test_ndjson_mood_rows_upsert_by_day(self):
+        MoodEntry.objects.create(user=self.user, mood_score=2, date=date(2024, 1, 1))
+        job = self.upload('mood', '\n'.join(json.dumps(row) for row in [
+            {'date': '2024-01-01', 'mood_score': 5, 'emotions': ['happy']},
+            {'date': '2024-01-02', 'mood_score': 3},
+        ]))
+
+        self.assertEqual(job.status, 'finished')
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual((job.rows_read, job.rows_imported, job.rows_failed), (2, 2, 0))
+        self.assertEqual(
+            dict(MoodEntry.objects.filter(user=self.user).values_list('date', 'mood_score')),
+            {date(2024, 1, 1): 5, date(2024, 1, 2): 3},
+        )
+
+    def test_csv_journal_import_and_reimport_is_a_no_op(self):
+        body = (
+            'created_at,title,content,tags\n'
+            '2024-03-01T09:00:00+00:00,Monday,Long day,work;tired\n'
+            '2024-03-02T09:00:00+00:00,Tuesday,Better,\n'
+        )
+        job = self.upload('journal', body, fmt='csv')
+        self.assertEqual((job.status, job.rows_imported, job.rows_skipped), ('finished', 2, 0))
+        self.assertEqual(JournalEntry.objects.get(title='Monday').tags, ['work', 'tired'])
+
+        again = self.upload('journal', body, fmt='csv')
+        self.assertEqual((again.status, again.rows_imported, again.rows_skipped), ('finished', 0, 2))
+        self.assertEqual(JournalEntry.objects.filter(user=self.user).count(), 2)
+
+    def test_bad_lines_are_reported_and_the_rest_imported(self):
+        job = self.upload('mood', '\n'.join([
+            '{"date": "2024-01-01", "mood_score": 4}',
+            '{not json',
+            '[1, 2]',
+            '{"date": "2024-01-03", "mood_score": 9}',
+            '{"date": "2024-01-04", "mood_score": 1}',
+        ]))
+        self.assertEqual(job.status, 'finished')
+        self.assertEqual((job.rows_read, job.rows_imported, job.rows_failed), (5, 2, 3))
+        self.assertEqual([line for line, _ in job.errors], [2, 3, 4])
+        self.assertEqual(job.errors[0][1], 'not valid JSON')
+
+    def test_a_job_takes_one_file(self):
+        job = self.upload('mood', '{"date": "2024-01-01", "mood_score": 4}')
+        response = self.client.put(f'/api/auth/data/imports/{job.pk}/upload/', b'', content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+
+        pending = DataImportJob.objects.create(user=self.user, kind='mood')
+        response = self.client.post(f'/api/auth/data/imports/{pending.pk}/upload/', {}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'failed')
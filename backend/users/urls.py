@@ -1,8 +1,10 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
-    RegisterView, ProfileView, ChangePasswordView, OnboardingView, DeleteAccountView,
-    FriendsListView, InviteLinkView
+    RegisterView, ProfileView, ChangePasswordView, OnboardingView, DeleteAccountView, DeletionJobDetailView,
+    FriendsListView, InviteLinkView,
+    DataImportListCreateView, DataImportDetailView, DataImportUploadView, DataExportView,
+    AccountExportView,
 )
 from .serializers import CustomTokenObtainPairSerializer
 
@@ -20,8 +22,16 @@ urlpatterns = [
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('onboarding/', OnboardingView.as_view(), name='onboarding'),
     path('delete-account/', DeleteAccountView.as_view(), name='delete_account'),
+    path('deletions/<int:pk>/', DeletionJobDetailView.as_view(), name='deletion_detail'),
     
     # Friends and Invites
     path('friends/', FriendsListView.as_view(), name='friends_list'),
     path('invite-link/', InviteLinkView.as_view(), name='invite_link'),
+    
+    # Bulk import and export
+    path('data/imports/', DataImportListCreateView.as_view(), name='data_imports'),
+    path('data/imports/<int:pk>/', DataImportDetailView.as_view(), name='data_import_detail'),
+    path('data/imports/<int:pk>/upload/', DataImportUploadView.as_view(), name='data_import_upload'),
+    path('data/export/', AccountExportView.as_view(), name='account_export'),
+    path('data/export/<str:kind>/', DataExportView.as_view(), name='data_export'),
 ]
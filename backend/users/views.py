@@ -3,10 +3,14 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from .serializers import (
-    UserSerializer, RegisterSerializer, ChangePasswordSerializer, OnboardingSerializer
+    UserSerializer, RegisterSerializer, ChangePasswordSerializer, OnboardingSerializer,
+    DataImportJobSerializer, DeletionJobSerializer
 )
-from .models import UserProfile
+from .models import DataImportJob, DeletionJob, UserProfile
+from . import deletion, portability
 
 User = get_user_model()
 
@@ -87,9 +91,101 @@ class OnboardingView(APIView):
 
 
 class DeleteAccountView(APIView):
-    """Delete user account and all associated data."""
+    """Deactivate the account now and delete it with all its data in the background."""
     
     def delete(self, request):
-        user = request.user
-        user.delete()
-        return Response({"message": "Account deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+        job = deletion.schedule(request.user, 'account')
+        return Response({
+            "message": "Account deactivated and scheduled for deletion.",
+            "job": DeletionJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class DeletionJobDetailView(generics.RetrieveAPIView):
+    """Progress of an account or chat history deletion."""
+    serializer_class = DeletionJobSerializer
+    
+    def get_queryset(self):
+        return DeletionJob.objects.filter(user_id=self.request.user.pk)
+
+
+class DataImportListCreateView(generics.ListCreateAPIView):
+    """List import jobs or start one for a kind of data and a format.
+    
+    Upload the file to the job's ``upload/`` URL next; poll the job for progress.
+    """
+    serializer_class = DataImportJobSerializer
+    pagination_class = None
+    
+    def get_queryset(self):
+        return DataImportJob.objects.filter(user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class DataImportDetailView(generics.RetrieveAPIView):
+    """Progress of one import job."""
+    serializer_class = DataImportJobSerializer
+    
+    def get_queryset(self):
+        return DataImportJob.objects.filter(user=self.request.user)
+
+
+class DataImportUploadView(APIView):
+    """Upload the NDJSON or CSV file of a pending import job.
+    
+    Send the file as the raw request body, or as ``file`` in a multipart form.
+    The file is spooled and imported in the background; poll the job.
+    """
+    
+    def put(self, request, pk):
+        job = DataImportJob.objects.filter(user=request.user, pk=pk).first()
+        if job is None:
+            return Response({'error': 'Import job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        # Claim the job so a repeated upload cannot import the file twice
+        if not DataImportJob.objects.filter(pk=job.pk, status='pending').update(status='running'):
+            return Response({'error': 'This import job has already received its file.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                job.status = 'failed'
+                job.save(update_fields=['status', 'updated_at'])
+                return Response({'error': 'No file provided.'}, status=status.HTTP_400_BAD_REQUEST)
+            source = upload
+        else:
+            source = request._request
+        
+        upload = portability.spool(source)
+        transaction.on_commit(lambda: portability.start_import(job.pk, upload))
+        job.status = 'running'
+        return Response(DataImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    post = put
+
+
+class DataExportView(APIView):
+    """Stream all of the user's mood, journal or coping rows as NDJSON or CSV."""
+    
+    def get(self, request, kind):
+        if kind not in portability.IMPORTERS:
+            return Response({'error': f"kind must be one of {', '.join(portability.IMPORTERS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        fmt = 'csv' if request.query_params.get('export_format') == 'csv' else 'ndjson'
+        response = StreamingHttpResponse(
+            portability.export_chunks(request.user, kind, fmt),
+            content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="dost-{kind}.{fmt}"'
+        return response
+
+
+class AccountExportView(APIView):
+    """Stream everything stored about the user as a zip of NDJSON files."""
+    
+    def get(self, request):
+        response = StreamingHttpResponse(portability.export_archive(request.user), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="dost-account-export.zip"'
+        return response
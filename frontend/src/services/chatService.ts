@@ -1,6 +1,5 @@
 import api from './api';
 import { Conversation, Message } from '../types';
-import { petService } from './petService';
 
 export const chatService = {
   async getConversations(): Promise<Conversation[]> {
@@ -35,13 +34,6 @@ export const chatService = {
       conversation_id: conversationId,
     });
     
-    // Award XP to pet for chatting
-    try {
-      await petService.interact('chat', 'Had a conversation');
-    } catch {
-      // Pet interaction failed silently
-    }
-    
     return response.data;
   },
 
@@ -1,6 +1,5 @@
 import api from './api';
 import { JournalEntry, JournalPrompt } from '../types';
-import { petService } from './petService';
 
 export const journalService = {
   async getEntries(search?: string, tag?: string): Promise<JournalEntry[]> {
@@ -26,13 +25,6 @@ export const journalService = {
   }): Promise<JournalEntry> {
     const response = await api.post('/journal/entries/', data);
     
-    // Award XP to pet for journaling
-    try {
-      await petService.interact('journal', 'Wrote journal entry');
-    } catch {
-      // Pet interaction failed silently
-    }
-    
     return response.data;
   },
 